@@ -2,6 +2,7 @@
 Configuration settings for the NL Query System
 """
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -17,24 +18,86 @@ SCHOOL_DATA_PATH = DATA_DIR / 'school_data.json'
 ADMIN_ROLES_PATH = DATA_DIR / 'admin_roles.json'
 
 # OpenAI configuration
-# Try Streamlit secrets first, then fall back to environment variables
-try:
-    import streamlit as st
-    if "OPENAI_API_KEY" in st.secrets:
-        OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-        OPENAI_MODEL = st.secrets.get("OPENAI_MODEL", "gpt-3.5-turbo")
-    else:
-        OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-        OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
-except Exception:
+# Try Streamlit secrets first, then fall back to environment variables.
+# Streamlit is only consulted when the app is already running under it,
+# so CLI and batch tools don't pay for importing it.
+def _read_streamlit_secrets():
+    """Read secrets from Streamlit if it is loaded and has an API key, otherwise None."""
+    if 'streamlit' not in sys.modules:
+        return None
+    try:
+        st = sys.modules['streamlit']
+        if "OPENAI_API_KEY" in st.secrets:
+            return st.secrets
+    except Exception:
+        pass
+    return None
+
+
+_secrets = _read_streamlit_secrets()
+if _secrets is not None:
+    OPENAI_API_KEY = _secrets["OPENAI_API_KEY"]
+    OPENAI_MODEL = _secrets.get("OPENAI_MODEL", "gpt-3.5-turbo")
+else:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
 
+# LLM call limits: calls beyond the rate or concurrency limits, calls past
+# the timeout, and all calls while the circuit breaker is open are answered
+# by the local rule-based parser instead
+LLM_RATE_PER_SECOND = float(os.getenv('LLM_RATE_PER_SECOND', '5'))
+LLM_BURST = int(os.getenv('LLM_BURST', '10'))
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '4'))
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '15'))
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+
+# Data validation: check keys, references, scope columns and dates when
+# data is loaded, and show any issues with the load timings
+ENABLE_DATA_VALIDATION = os.getenv('ENABLE_DATA_VALIDATION', 'true').lower() in ('1', 'true', 'yes')
+
+# Data sharding: serve each region from its own worker process
+ENABLE_DATA_SHARDING = os.getenv('ENABLE_DATA_SHARDING', 'false').lower() in ('1', 'true', 'yes')
+
+# Multi-tenant hosting: one entry per school in tenants.json. Without the
+# file, the data and roles files above are served as a single school.
+TENANTS_PATH = DATA_DIR / 'tenants.json'
+TENANT_MEMORY_BUDGET_MB = int(os.getenv('TENANT_MEMORY_BUDGET_MB', '1024'))
+
+# Query caching and warmup: recorded queries are replayed at startup so
+# frequent questions are answered from cache
+QUERY_LOG_PATH = DATA_DIR / 'query_log.jsonl'
+ENABLE_QUERY_LOG = os.getenv('ENABLE_QUERY_LOG', 'true').lower() in ('1', 'true', 'yes')
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '128'))
+WARMUP_MAX_QUERIES = int(os.getenv('WARMUP_MAX_QUERIES', '50'))
+WARMUP_BUDGET_SECONDS = float(os.getenv('WARMUP_BUDGET_SECONDS', '60'))
+WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', '2'))
+
+# Background query execution: queries run on a shared pool of
+# QUERY_WORKERS threads, each admin may have MAX_QUERIES_PER_ADMIN running,
+# and the page checks on a running query every QUERY_POLL_SECONDS
+QUERY_WORKERS = int(os.getenv('QUERY_WORKERS', '4'))
+MAX_QUERIES_PER_ADMIN = int(os.getenv('MAX_QUERIES_PER_ADMIN', '2'))
+QUERY_POLL_SECONDS = float(os.getenv('QUERY_POLL_SECONDS', '0.3'))
+
+# Rows shown in the results table; downloads always include every row
+MAX_DISPLAY_ROWS = int(os.getenv('MAX_DISPLAY_ROWS', '1000'))
+
+# Memory report: admins listed here as tenant:admin_id (e.g., default:A001)
+# get a Memory page, and a port serves the report as JSON at
+# http://127.0.0.1:<port>/memory. Both are off by default, and nothing is
+# tracked or traced while they are.
+MEMORY_REPORT_ADMINS = [a.strip() for a in os.getenv('MEMORY_REPORT_ADMINS', '').split(',') if a.strip()]
+MEMORY_REPORT_PORT = int(os.getenv('MEMORY_REPORT_PORT', '0'))
+MEMORY_REPORT_TOKEN = os.getenv('MEMORY_REPORT_TOKEN') or None
+
 # Supported intent types
 INTENT_TYPES = [
     'homework_status',
     'performance',
     'upcoming_quizzes',
+    'homework_analytics',
+    'performance_trend',
     'general'
 ]
 
@@ -45,5 +108,9 @@ EXAMPLE_QUERIES = [
     "List all upcoming quizzes scheduled for next week",
     "Who submitted the Math Chapter 5 assignment?",
     "Show me all students in my scope",
-    "What are the quiz scores for my classes?"
+    "What are the quiz scores for my classes?",
+    "Top 5 students in 9A by quiz score",
+    "What percent of 8A submitted Math Chapter 5?",
+    "Which assignments have the lowest completion?",
+    "Which students' scores dropped over the last month?"
 ]
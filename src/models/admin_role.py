@@ -2,10 +2,204 @@
 Admin Role - Data class for admin user roles and access scope
 """
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
-@dataclass
+# Column each scope dimension binds to, and the type its values are stored as.
+# Dimensions are listed from the top of the org chart down.
+SCOPE_COLUMN_TYPES = {
+    'region': str,
+    'grade': int,
+    'class': str
+}
+
+
+@dataclass(frozen=True)
+class ScopePredicate:
+    """
+    Precompiled condition on one scope dimension: the column to match and its typed values.
+    
+    Attributes:
+        column: Data column the condition applies to, or None for an unknown dimension
+        values: Values converted to the column's type, sorted
+    """
+    __slots__ = ('column', 'values')
+    
+    column: Optional[str]
+    values: Tuple[Any, ...]
+    
+    @classmethod
+    def compile(cls, scope_type: str, scope_values: Iterable[Any]) -> 'ScopePredicate':
+        """
+        Build the predicate for a scope dimension and its raw values.
+        
+        Args:
+            scope_type: Scope dimension (region, grade, class)
+            scope_values: Raw scope values as configured
+        
+        Returns:
+            ScopePredicate: Predicate bound to the scope column
+        """
+        value_type = SCOPE_COLUMN_TYPES.get(scope_type)
+        if value_type is None:
+            return cls(column=None, values=())
+        return cls(column=scope_type, values=tuple(sorted({value_type(v) for v in scope_values})))
+    
+    def covers(self, other: 'ScopePredicate') -> bool:
+        """Check whether every value allowed by other is also allowed here."""
+        return self.column == other.column and set(other.values) <= set(self.values)
+    
+    def __str__(self) -> str:
+        return f"{self.column}={'/'.join(str(v) for v in self.values)}"
+    
+    def __getstate__(self):
+        return (self.column, self.values)
+    
+    def __setstate__(self, state):
+        object.__setattr__(self, 'column', state[0])
+        object.__setattr__(self, 'values', state[1])
+
+
+@dataclass(frozen=True)
+class Scope:
+    """
+    Normalized access scope made of one or more clauses.
+    
+    A row is in scope when it matches any clause, and it matches a clause
+    when it satisfies every predicate in it. For example, "all of North
+    plus class 10A" is two clauses, while "grade 9 within North" is one
+    clause with two predicates.
+    
+    Attributes:
+        clauses: Deduplicated clauses, each a tuple of predicates sorted by dimension
+    """
+    __slots__ = ('clauses',)
+    
+    clauses: Tuple[Tuple[ScopePredicate, ...], ...]
+    
+    @classmethod
+    def compile(cls, clauses: Iterable[Dict[str, Iterable[Any]]]) -> 'Scope':
+        """
+        Build a scope from raw clause dictionaries.
+        
+        Clauses that differ in a single dimension are merged, and clauses
+        already covered by a broader clause are dropped, so evaluation cost
+        does not grow with redundant configuration.
+        
+        Args:
+            clauses: Clauses mapping scope dimension to raw values
+        
+        Returns:
+            Scope: The normalized scope
+        """
+        compiled: List[Dict[Optional[str], ScopePredicate]] = []
+        for clause in clauses:
+            predicates = {}
+            for scope_type, scope_values in clause.items():
+                predicate = ScopePredicate.compile(scope_type, scope_values)
+                predicates[predicate.column] = predicate
+            # An empty clause would grant everything; an empty value list grants nothing
+            if predicates and all(p.values for p in predicates.values()):
+                compiled.append(predicates)
+        
+        merged = True
+        while merged:
+            merged = False
+            for i, left in enumerate(compiled):
+                for j in range(i + 1, len(compiled)):
+                    right = compiled[j]
+                    if left.keys() != right.keys():
+                        continue
+                    differing = [c for c in left if left[c] != right[c]]
+                    if len(differing) <= 1:
+                        for column in differing:
+                            left[column] = ScopePredicate.compile(
+                                column, left[column].values + right[column].values
+                            )
+                        del compiled[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        
+        kept = [
+            clause for i, clause in enumerate(compiled)
+            if not any(
+                j != i and cls._clause_covers(other, clause)
+                for j, other in enumerate(compiled)
+            )
+        ]
+        
+        return cls(clauses=tuple(
+            tuple(clause[column] for column in sorted(clause, key=cls._dimension_order))
+            for clause in kept
+        ))
+    
+    @staticmethod
+    def _dimension_order(column: Optional[str]) -> int:
+        order = list(SCOPE_COLUMN_TYPES)
+        return order.index(column) if column in order else len(order)
+    
+    @staticmethod
+    def _clause_covers(broad: Dict[Optional[str], ScopePredicate], narrow: Dict[Optional[str], ScopePredicate]) -> bool:
+        """Check whether every row matching narrow also matches broad."""
+        if broad == narrow or None in broad:
+            return False
+        return all(column in narrow and broad[column].covers(narrow[column]) for column in broad)
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Scope columns referenced by any clause."""
+        found = {p.column for clause in self.clauses for p in clause if p.column is not None}
+        return tuple(sorted(found, key=self._dimension_order))
+    
+    def allows(self, query_params: dict) -> bool:
+        """
+        Check whether requested scope values can fall inside this scope.
+        
+        A request is allowed when some clause accepts every requested value
+        for the dimensions it constrains.
+        
+        Args:
+            query_params: Dictionary of query parameters
+        
+        Returns:
+            bool: True if access is allowed, False otherwise
+        """
+        for clause in self.clauses:
+            allowed = True
+            for predicate in clause:
+                if predicate.column is None:
+                    allowed = False
+                    break
+                if predicate.column not in query_params:
+                    continue
+                requested = query_params[predicate.column]
+                if not isinstance(requested, list):
+                    requested = [requested]
+                try:
+                    requested = ScopePredicate.compile(predicate.column, requested)
+                except (TypeError, ValueError):
+                    allowed = False
+                    break
+                if not predicate.covers(requested):
+                    allowed = False
+                    break
+            if allowed:
+                return True
+        return False
+    
+    def __str__(self) -> str:
+        return " + ".join(" & ".join(str(p) for p in clause) for clause in self.clauses)
+    
+    def __getstate__(self):
+        return self.clauses
+    
+    def __setstate__(self, state):
+        object.__setattr__(self, 'clauses', state)
+
+
+@dataclass(frozen=True, init=False)
 class AdminRole:
     """
     Represents an admin user's role and access scope.
@@ -13,13 +207,61 @@ class AdminRole:
     Attributes:
         admin_id: Unique identifier for the admin
         name: Admin's display name
-        scope_type: Type of scope (grade, class, region)
-        scope_values: List of values defining the scope (e.g., ["8", "9"] for grades)
+        scope: Compiled access scope
     """
+    __slots__ = ('admin_id', 'name', 'scope')
+    
     admin_id: str
     name: str
-    scope_type: str  # 'grade', 'class', or 'region'
-    scope_values: List[str]
+    scope: Scope
+    
+    def __init__(
+        self,
+        admin_id: str,
+        name: str,
+        scope_type: Optional[str] = None,
+        scope_values: Optional[Iterable[str]] = None,
+        scopes: Optional[Iterable[Dict[str, Iterable[Any]]]] = None
+    ):
+        """
+        Initialize the admin role.
+        
+        Args:
+            admin_id: Unique identifier for the admin
+            name: Admin's display name
+            scope_type: Type of a single-dimension scope (grade, class, region)
+            scope_values: Values for scope_type (e.g., ["8", "9"] for grades)
+            scopes: Multi-dimensional clauses, e.g. [{"region": ["North"]}, {"class": ["10A"]}]
+        """
+        clauses = list(scopes or [])
+        if scope_type is not None:
+            clauses.append({scope_type: list(scope_values or [])})
+        
+        object.__setattr__(self, 'admin_id', admin_id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'scope', Scope.compile(clauses))
+    
+    @property
+    def scope_type(self) -> str:
+        """Scope dimension for single-dimension scopes, otherwise 'mixed'."""
+        clauses = self.scope.clauses
+        if len(clauses) == 1 and len(clauses[0]) == 1 and clauses[0][0].column:
+            return clauses[0][0].column
+        return 'mixed'
+    
+    @property
+    def scope_values(self) -> Tuple[str, ...]:
+        """Scope values for display; one entry per clause for mixed scopes."""
+        if self.scope_type != 'mixed':
+            return tuple(str(v) for v in self.scope.clauses[0][0].values)
+        return tuple(" & ".join(str(p) for p in clause) for clause in self.scope.clauses)
+    
+    def __getstate__(self):
+        return (self.admin_id, self.name, self.scope)
+    
+    def __setstate__(self, state):
+        for name, value in zip(('admin_id', 'name', 'scope'), state):
+            object.__setattr__(self, name, value)
     
     def __str__(self) -> str:
         """String representation of the admin role."""
@@ -2,7 +2,7 @@
 Query Intent - Data class for parsed natural language query intent
 """
 from dataclasses import dataclass, field
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 @dataclass
@@ -11,14 +11,61 @@ class QueryIntent:
     Represents the parsed intent from a natural language query.
     
     Attributes:
-        intent_type: Type of query (homework_status, performance, upcoming_quizzes, general)
+        intent_type: Type of query (homework_status, homework_analytics, performance, upcoming_quizzes, general)
         filters: Dictionary of filter criteria extracted from the query
         confidence: Confidence score of the parsing (0.0 to 1.0)
+        order_by: Field to rank results by (e.g., "score", "submission_date"), if any
+        ascending: Rank direction; False puts the highest values first
+        limit: Maximum number of rows to return (e.g., 5 for "top 5"), if any
     """
     intent_type: str
     filters: Dict[str, Any] = field(default_factory=dict)
     confidence: float = 1.0
+    order_by: Optional[str] = None
+    ascending: bool = False
+    limit: Optional[int] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the intent to a JSON-serializable dictionary.
+        
+        Returns:
+            Dict[str, Any]: Intent fields
+        """
+        return {
+            'intent_type': self.intent_type,
+            'filters': dict(self.filters),
+            'confidence': self.confidence,
+            'order_by': self.order_by,
+            'ascending': self.ascending,
+            'limit': self.limit
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QueryIntent':
+        """
+        Rebuild an intent from the output of to_dict.
+        
+        Args:
+            data: Intent fields
+            
+        Returns:
+            QueryIntent: The intent
+        """
+        return cls(
+            intent_type=data['intent_type'],
+            filters=dict(data.get('filters') or {}),
+            confidence=data.get('confidence', 1.0),
+            order_by=data.get('order_by'),
+            ascending=data.get('ascending', False),
+            limit=data.get('limit')
+        )
     
     def __str__(self) -> str:
         """String representation of the query intent."""
-        return f"Intent: {self.intent_type}, Filters: {self.filters}, Confidence: {self.confidence:.2f}"
+        text = f"Intent: {self.intent_type}, Filters: {self.filters}, Confidence: {self.confidence:.2f}"
+        if self.order_by:
+            text += f", Order: {self.order_by} {'asc' if self.ascending else 'desc'}"
+        if self.limit is not None:
+            text += f", Limit: {self.limit}"
+        return text
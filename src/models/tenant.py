@@ -0,0 +1,25 @@
+"""
+Tenant - Data class for a school served by the shared process
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """
+    A school with its own data and admin roles.
+    
+    Attributes:
+        tenant_id: Unique identifier for the school
+        name: School display name
+        data_path: Path to the school's data JSON file
+        roles_path: Path to the school's admin roles JSON file
+    """
+    tenant_id: str
+    name: str
+    data_path: str
+    roles_path: str
+    
+    def __str__(self) -> str:
+        """String representation of the tenant."""
+        return f"{self.name} ({self.tenant_id})"
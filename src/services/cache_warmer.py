@@ -0,0 +1,226 @@
+"""
+Cache Warmer - Replays popular queries to pre-fill parse and result caches
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.config import EXAMPLE_QUERIES
+from src.services.nl_query_parser import NLQueryParser
+from src.services.query_executor import QueryExecutor
+from src.services.query_log import read_query_log
+from src.services.role_manager import RoleManager
+from src.services.tenant_manager import DEFAULT_TENANT_ID
+
+
+class CacheWarmer:
+    """
+    Replays the most frequent (question, admin) pairs in the background.
+    
+    Each pair goes through the parser and the executor, which fills the
+    parse cache and the result cache and builds the per-table indexes, so
+    the first admins after a restart or reload don't pay for them. Pairs
+    come from the query log, most frequent first, followed by the example
+    queries for every admin. Work stops once the time budget is spent.
+    """
+    
+    def __init__(
+        self,
+        parser: NLQueryParser,
+        executor: QueryExecutor,
+        role_manager: RoleManager,
+        max_queries: int = 50,
+        budget_seconds: float = 60.0,
+        max_workers: int = 2,
+        tenant_id: Optional[str] = None
+    ):
+        """
+        Initialize the cache warmer.
+        
+        Args:
+            parser: Parser whose cache is warmed
+            executor: Executor whose cache is warmed (or a TenantContext)
+            role_manager: Source of admin roles
+            max_queries: Most (question, admin) pairs to replay
+            budget_seconds: Wall-clock budget for a warmup run
+            max_workers: Worker threads replaying queries
+            tenant_id: School whose logged queries are replayed (None to
+                replay entries regardless of school)
+        """
+        self.parser = parser
+        self.executor = executor
+        self.role_manager = role_manager
+        self.max_queries = max_queries
+        self.budget_seconds = budget_seconds
+        self.max_workers = max_workers
+        self.tenant_id = tenant_id
+        
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._run = 0
+        self._reset([])
+    
+    def _reset(self, pairs: List[Tuple[str, str]]):
+        """Clear progress for a new run over the given pairs."""
+        self.pairs = pairs
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.deadline = 0.0
+        self._baseline: Dict[str, Dict[str, float]] = {}
+    
+    def seed(self, log_path: Optional[Union[str, Path]] = None) -> List[Tuple[str, str]]:
+        """
+        Choose the (question, admin_id) pairs to replay.
+        
+        Args:
+            log_path: Query log to rank pairs from (None to use examples only)
+        
+        Returns:
+            List[Tuple[str, str]]: Up to max_queries distinct pairs, most
+            frequent first
+        """
+        admin_ids = [admin.admin_id for admin in self.role_manager.get_all_admins()]
+        known = set(admin_ids)
+        
+        counts: Counter = Counter()
+        if log_path is not None:
+            for entry in read_query_log(log_path):
+                if self.tenant_id is not None and entry.get('tenant_id', DEFAULT_TENANT_ID) != self.tenant_id:
+                    continue
+                question = entry.get('question')
+                admin_id = entry.get('admin_id')
+                if isinstance(question, str) and question.strip() and admin_id in known:
+                    counts[(question, admin_id)] += 1
+        
+        pairs = [pair for pair, _ in counts.most_common()]
+        seen = set(pairs)
+        for question in EXAMPLE_QUERIES:
+            for admin_id in admin_ids:
+                if (question, admin_id) not in seen:
+                    seen.add((question, admin_id))
+                    pairs.append((question, admin_id))
+        
+        return pairs[:self.max_queries]
+    
+    def start(self, log_path: Optional[Union[str, Path]] = None):
+        """
+        Start a warmup run in the background, replacing any earlier run.
+        
+        Pairs left over from an earlier run are skipped, so a reload can
+        start a fresh warmup straight away.
+        
+        Args:
+            log_path: Query log to rank pairs from
+        """
+        pairs = self.seed(log_path)
+        
+        with self._lock:
+            self._run += 1
+            run = self._run
+            self._reset(pairs)
+            self.started_at = time.perf_counter()
+            self.deadline = self.started_at + self.budget_seconds
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='cache-warmer'
+                )
+            pool = self._pool
+        
+        if not pairs:
+            self._finish(run)
+            return
+        
+        for question, admin_id in pairs:
+            pool.submit(self._warm, run, question, admin_id)
+    
+    def _warm(self, run: int, question: str, admin_id: str):
+        """
+        Replay one pair, unless the run was replaced or is out of budget.
+        
+        Args:
+            run: Run the pair belongs to
+            question: Question to replay
+            admin_id: Admin to replay it as
+        """
+        with self._lock:
+            if run != self._run:
+                return
+            out_of_budget = time.perf_counter() > self.deadline
+        
+        outcome = 'skipped'
+        if not out_of_budget:
+            try:
+                admin = self.role_manager.load_admin_role(admin_id)
+                if admin is not None:
+                    intent = self.parser.parse_query(question)
+                    self.executor.execute(intent, admin)
+                    outcome = 'completed'
+            except Exception:
+                outcome = 'failed'
+        
+        with self._lock:
+            if run != self._run:
+                return
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            done = self.completed + self.failed + self.skipped == len(self.pairs)
+        if done:
+            self._finish(run)
+    
+    def _finish(self, run: int):
+        """Record the end time of a run and the cache counters at that point."""
+        baseline = self._cache_stats()
+        with self._lock:
+            if run == self._run:
+                self.finished_at = time.perf_counter()
+                self._baseline = baseline
+    
+    def _cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get parse and result cache statistics."""
+        return {
+            'parse_cache': self.parser.get_cache_stats(),
+            'result_cache': self.executor.get_cache_stats()
+        }
+    
+    def progress(self) -> Dict[str, Any]:
+        """
+        Get progress of the current run and cache hit rates.
+        
+        Once a run has finished, each cache also reports
+        post_warmup_hit_rate: the hit rate of lookups made since then.
+        
+        Returns:
+            Dict[str, Any]: Pair counts, elapsed seconds, whether the run is
+            still going, and parse/result cache statistics
+        """
+        with self._lock:
+            end = self.finished_at or time.perf_counter()
+            report = {
+                'total': len(self.pairs),
+                'completed': self.completed,
+                'failed': self.failed,
+                'skipped': self.skipped,
+                'elapsed_seconds': end - self.started_at if self.started_at else 0.0,
+                'running': self.started_at is not None and self.finished_at is None
+            }
+            baseline = self._baseline
+        
+        for name, stats in self._cache_stats().items():
+            if name in baseline:
+                hits = stats['hits'] - baseline[name]['hits']
+                lookups = hits + stats['misses'] - baseline[name]['misses']
+                stats['post_warmup_hit_rate'] = hits / lookups if lookups else None
+            report[name] = stats
+        return report
+    
+    def shutdown(self):
+        """Cancel pending work and stop the worker threads."""
+        with self._lock:
+            self._run += 1
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
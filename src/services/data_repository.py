@@ -3,7 +3,9 @@ Data Repository - Abstract base class for data access
 """
 from abc import ABC, abstractmethod
 import pandas as pd
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.models.admin_role import AdminRole
+from src.services.data_validator import ValidationReport
 
 
 class DataRepository(ABC):
@@ -29,7 +31,7 @@ class DataRepository(ABC):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered student records
         """
@@ -42,7 +44,7 @@ class DataRepository(ABC):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered homework records
         """
@@ -55,7 +57,7 @@ class DataRepository(ABC):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered quiz records
         """
@@ -68,8 +70,126 @@ class DataRepository(ABC):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered performance records
         """
         pass
+    
+    def get_table(self, name: str) -> pd.DataFrame:
+        """
+        Get a full table without copying it.
+        
+        The returned DataFrame may be shared with other callers and with
+        cached indexes, so it must be treated as read-only.
+        
+        Args:
+            name: Table name (students, homework, quizzes, performance)
+        
+        Returns:
+            pd.DataFrame: The shared table
+        """
+        return self.load_data()[name]
+    
+    def scoped(self, admin: AdminRole) -> 'DataRepository':
+        """
+        Get a repository view for serving queries from an admin.
+        
+        Partitioned implementations override this to route requests to
+        the partitions that overlap the admin's scope. Scope filtering
+        itself is still applied by ScopeFilter.
+        
+        Args:
+            admin: AdminRole the queries are served for
+        
+        Returns:
+            DataRepository: Repository to query on the admin's behalf
+        """
+        return self
+    
+    def select_rows(self, plan: Any, admin: AdminRole, planner: Any) -> Optional[Tuple[pd.DataFrame, Any]]:
+        """
+        Apply a query plan's scope and row filters.
+        
+        Partitioned implementations override this to filter each
+        partition where it is stored and merge only the matching rows.
+        
+        Args:
+            plan: QueryPlan being executed
+            admin: Admin role for access control
+            planner: QueryPlanner running the plan
+        
+        Returns:
+            Optional[Tuple[pd.DataFrame, Any]]: A table and the positions of
+            its matching rows in table order, or None if no row is in the
+            admin's scope
+        """
+        return planner.select(plan, self, admin)
+    
+    def get_matching(self, name: str, column: str, values: Iterable[Any]) -> pd.DataFrame:
+        """
+        Get the rows of a table that a join on column could match.
+        
+        The result may hold other rows too (this default returns the whole
+        shared table), so callers still match on the column themselves.
+        Partitioned implementations return only the matching rows.
+        
+        Args:
+            name: Table name
+            column: Join column
+            values: Values of the join column on the other side
+        
+        Returns:
+            pd.DataFrame: Table rows (read-only)
+        """
+        return self.get_table(name)
+    
+    def reload(self) -> Dict[str, pd.DataFrame]:
+        """
+        Load the data again from its source.
+        
+        Repositories that cache their tables drop the cache and bump the
+        data version.
+        
+        Returns:
+            Dict[str, pd.DataFrame]: Dictionary containing all data tables
+        """
+        return self.load_data()
+    
+    def release_tables(self) -> None:
+        """
+        Drop tables held in memory once another component holds the data.
+        
+        The next load reads the source again. Repositories that don't
+        cache their tables have nothing to release.
+        """
+        pass
+    
+    def get_data_version(self) -> int:
+        """
+        Get a counter that changes whenever the underlying data is reloaded.
+        
+        Caches of derived results key on this value.
+        
+        Returns:
+            int: Current data version
+        """
+        return 0
+    
+    def get_load_timings(self) -> Dict[str, float]:
+        """
+        Get the time spent loading each table.
+        
+        Returns:
+            Dict[str, float]: Seconds per table name (empty if not tracked)
+        """
+        return {}
+    
+    def get_validation_report(self) -> Optional[ValidationReport]:
+        """
+        Get the result of validating the loaded data.
+        
+        Returns:
+            Optional[ValidationReport]: The report, or None if the data isn't validated
+        """
+        return None
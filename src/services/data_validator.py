@@ -0,0 +1,370 @@
+"""
+Data Validator - Vectorized integrity checks run when data is loaded
+"""
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from src.models.admin_role import SCOPE_COLUMN_TYPES
+from src.services.scope_filter import ScopeIndex
+
+
+# Key column of each table
+PRIMARY_KEYS = {
+    'students': 'student_id',
+    'homework': 'homework_id',
+    'quizzes': 'quiz_id',
+    'performance': 'performance_id'
+}
+
+# (table, column, referenced table); the reference is to its primary key
+FOREIGN_KEYS = [
+    ('homework', 'student_id', 'students'),
+    ('performance', 'student_id', 'students'),
+    ('performance', 'quiz_id', 'quizzes')
+]
+
+# Fact tables whose scope columns must agree with the student's record
+STUDENT_SCOPED_TABLES = ('homework', 'performance')
+
+# Date columns every row needs; values that don't parse stop the load.
+# Other date columns (a submission date) may be blank or bad per row.
+REQUIRED_DATE_COLUMNS = {
+    'homework': ('due_date',),
+    'quizzes': ('scheduled_date',),
+    'performance': ('date',)
+}
+
+# Offending values listed per issue
+MAX_EXAMPLES = 5
+
+# A referenced table's key index and the row of each key
+KeyIndex = Tuple[pd.Index, np.ndarray]
+
+
+@dataclass
+class ValidationIssue:
+    """
+    One failed check.
+    
+    Attributes:
+        table: Table the check ran on
+        check: duplicate_key, missing_key, missing_reference,
+            scope_mismatch or invalid_date
+        column: Column that failed
+        rows: Number of offending rows
+        examples: A few offending values
+        fatal: Whether the data can't be used with this issue
+    """
+    table: str
+    check: str
+    column: str
+    rows: int
+    examples: List[Any] = field(default_factory=list)
+    fatal: bool = False
+    
+    def __str__(self) -> str:
+        examples = ', '.join(str(value) for value in self.examples)
+        fatal = " (fatal)" if self.fatal else ""
+        return f"{self.table}.{self.column}: {self.rows} rows fail {self.check}{fatal} (e.g. {examples})"
+
+
+@dataclass
+class ValidationReport:
+    """
+    Result of validating a set of tables.
+    
+    Attributes:
+        issues: Failed checks
+        rows_checked: Rows per table
+        seconds: Time spent validating
+    """
+    issues: List[ValidationIssue] = field(default_factory=list)
+    rows_checked: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        """Whether every check passed."""
+        return not self.issues
+    
+    @property
+    def fatal_issues(self) -> List[ValidationIssue]:
+        """Issues the data can't be loaded with."""
+        return [issue for issue in self.issues if issue.fatal]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the report to a JSON-serializable dictionary.
+        
+        Returns:
+            Dict[str, Any]: Report data
+        """
+        report = asdict(self)
+        report['ok'] = self.ok
+        report['fatal'] = bool(self.fatal_issues)
+        for issue in report['issues']:
+            issue['examples'] = [str(value) for value in issue['examples']]
+        return report
+
+
+def _sorted_unique(keys: pd.Series) -> bool:
+    """
+    Whether keys are present and strictly increasing, which proves them unique.
+    
+    Exports usually list rows in key order, and comparing neighbours is
+    one pass with no hashing; callers fall back to a hash check otherwise.
+    """
+    if keys.hasnans:
+        return False
+    if len(keys) < 2:
+        return True
+    array = keys.array
+    try:
+        return bool(np.all(np.asarray(array[1:] > array[:-1])))
+    except TypeError:
+        # Mixed types that don't order
+        return False
+
+
+def _examples(values: pd.Series, mask: np.ndarray) -> List[Any]:
+    """First distinct offending values."""
+    return list(pd.unique(values.to_numpy()[np.flatnonzero(mask)[:MAX_EXAMPLES * 4]])[:MAX_EXAMPLES])
+
+
+class DataValidator:
+    """
+    Checks key uniqueness, foreign keys and scope consistency of loaded tables.
+    
+    Every check is a handful of array operations over a column. Keys are
+    first checked for sorted order, which proves them unique in one pass,
+    and hashed only when they aren't sorted. Foreign keys are
+    dictionary-encoded, so only the distinct values are looked up in the
+    referenced table's key index and the positions are gathered back to
+    rows. Those positions then give each fact row its student's scope
+    values, compared through the ScopeIndex codes queries use anyway (the
+    indexes built here serve the first queries). Checks run on a thread
+    pool, since pandas releases the GIL in the hashing and gathering loops.
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize the validator.
+        
+        Args:
+            max_workers: Threads used to check tables in parallel
+        """
+        self.max_workers = max(1, max_workers)
+    
+    def validate(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        date_failures: Optional[Dict[str, Dict[str, Tuple[int, List[Any]]]]] = None
+    ) -> ValidationReport:
+        """
+        Validate a set of tables.
+        
+        Args:
+            tables: Table name to DataFrame
+            date_failures: Per table and column, the number of values that
+                didn't parse as dates and a few of them (from the loader)
+        
+        Returns:
+            ValidationReport: Issues found
+        """
+        started = time.perf_counter()
+        report = ValidationReport(rows_checked={name: len(df) for name, df in tables.items()})
+        referenced = {parent for _, _, parent in FOREIGN_KEYS if parent in tables}
+        scoped = [name for name in STUDENT_SCOPED_TABLES if name in tables and 'students' in tables]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Keys and scope indexes first; the referenced tables' key
+            # indexes are shared by the foreign key checks
+            key_futures = {name: pool.submit(self._check_referenced, name, tables[name]) for name in referenced}
+            key_checks = [
+                pool.submit(self._check_primary_key, name, tables[name])
+                for name in tables if name not in referenced
+            ]
+            index_builds = [pool.submit(ScopeIndex.for_frame, tables[name]) for name in scoped + ['students'] if name in tables]
+            
+            key_indexes: Dict[str, KeyIndex] = {}
+            for name, future in key_futures.items():
+                issues, key_indexes[name] = future.result()
+                report.issues.extend(issues)
+            for future in key_checks:
+                report.issues.extend(future.result())
+            for future in index_builds:
+                future.result()
+            
+            reference_checks = [
+                pool.submit(self._check_references, name, tables, key_indexes)
+                for name in tables if any(child == name for child, _, _ in FOREIGN_KEYS)
+            ]
+            for future in reference_checks:
+                report.issues.extend(future.result())
+        
+        report.issues.extend(self.date_issues(date_failures))
+        
+        report.seconds = time.perf_counter() - started
+        return report
+    
+    @staticmethod
+    def date_issues(date_failures: Optional[Dict[str, Dict[str, Tuple[int, List[Any]]]]]) -> List[ValidationIssue]:
+        """
+        Report date values that didn't parse.
+        
+        Failures in REQUIRED_DATE_COLUMNS are fatal; the others leave the
+        value missing for that row.
+        
+        Args:
+            date_failures: Per table and column, the number of values that
+                didn't parse as dates and a few of them (from the loader)
+        
+        Returns:
+            List[ValidationIssue]: One invalid_date issue per failing column
+        """
+        issues = []
+        for table, columns in (date_failures or {}).items():
+            for column, (rows, examples) in columns.items():
+                if rows:
+                    fatal = column in REQUIRED_DATE_COLUMNS.get(table, ())
+                    issues.append(ValidationIssue(table, 'invalid_date', column, rows, examples, fatal))
+        return issues
+    
+    def _check_referenced(self, name: str, table: pd.DataFrame) -> Tuple[List[ValidationIssue], KeyIndex]:
+        """
+        Check a referenced table's key and index it for foreign key lookups.
+        
+        Keys in sorted order are unique without hashing; otherwise the
+        index's hash table answers the uniqueness check, and the foreign key
+        lookups reuse it.
+        
+        Args:
+            name: Table name
+            table: The table
+        
+        Returns:
+            Tuple[List[ValidationIssue], KeyIndex]: Issues, and an index of
+            the keys with their row positions (duplicated keys resolve to
+            their first row)
+        """
+        key = PRIMARY_KEYS.get(name)
+        if key not in table.columns:
+            return [], (pd.Index([]), np.array([], dtype=np.int64))
+        
+        keys = table[key]
+        index = pd.Index(keys, copy=False)
+        if _sorted_unique(keys) or (index.is_unique and not index.hasnans):
+            return [], (index, np.arange(len(table)))
+        
+        issues = self._check_primary_key(name, table)
+        first = ~keys.duplicated().to_numpy() & keys.notna().to_numpy()
+        return issues, (pd.Index(keys[first], copy=False), np.flatnonzero(first))
+    
+    @staticmethod
+    def _check_primary_key(name: str, table: pd.DataFrame) -> List[ValidationIssue]:
+        """Check that a table's key column is unique and present."""
+        key = PRIMARY_KEYS.get(name)
+        if key is None or key not in table.columns or table.empty:
+            return []
+        keys = table[key]
+        if _sorted_unique(keys) or (keys.is_unique and not keys.hasnans):
+            return []
+        
+        duplicated = keys.duplicated(keep=False).to_numpy() & keys.notna().to_numpy()
+        issues = []
+        if duplicated.any():
+            issues.append(ValidationIssue(name, 'duplicate_key', key, int(duplicated.sum()), _examples(keys, duplicated)))
+        missing = keys.isna().to_numpy()
+        if missing.any():
+            issues.append(ValidationIssue(name, 'missing_key', key, int(missing.sum())))
+        return issues
+    
+    def _check_references(self, name: str, tables: Dict[str, pd.DataFrame], key_indexes: Dict[str, KeyIndex]) -> List[ValidationIssue]:
+        """
+        Check a table's foreign keys, then its scope columns against its students.
+        
+        Args:
+            name: Table name
+            tables: All tables
+            key_indexes: Key index and row positions per referenced table
+        
+        Returns:
+            List[ValidationIssue]: Issues found
+        """
+        table = tables[name]
+        issues: List[ValidationIssue] = []
+        if table.empty:
+            return issues
+        
+        student_rows = None
+        for child, column, parent in FOREIGN_KEYS:
+            if child != name or column not in table.columns or parent not in key_indexes:
+                continue
+            rows = self._resolve(table[column], *key_indexes[parent])
+            missing = rows < 0
+            if missing.any():
+                issues.append(ValidationIssue(name, 'missing_reference', column, int(missing.sum()), _examples(table[column], missing)))
+            if parent == 'students':
+                student_rows = rows
+        
+        if name in STUDENT_SCOPED_TABLES and student_rows is not None:
+            issues.extend(self._check_scope(name, table, tables['students'], student_rows))
+        return issues
+    
+    @staticmethod
+    def _resolve(values: pd.Series, key_index: pd.Index, key_rows: np.ndarray) -> np.ndarray:
+        """
+        Find the referenced row of every foreign key value.
+        
+        Args:
+            values: Foreign key column
+            key_index: Index of the referenced keys
+            key_rows: Referenced table row of each index entry
+        
+        Returns:
+            np.ndarray: Referenced row per value, -1 where the key is missing
+        """
+        codes, distinct = pd.factorize(values)
+        found = key_index.get_indexer(distinct)
+        lookup = np.full(len(distinct) + 1, -1, dtype=np.int64)
+        lookup[:-1][found >= 0] = key_rows[found[found >= 0]]
+        # factorize codes missing values as -1, which picks the trailing -1
+        return lookup[codes]
+    
+    @staticmethod
+    def _check_scope(name: str, table: pd.DataFrame, students: pd.DataFrame, student_rows: np.ndarray) -> List[ValidationIssue]:
+        """
+        Check that a fact table's scope columns match its students' records.
+        
+        Args:
+            name: Table name
+            table: Fact table
+            students: Students table
+            student_rows: Student row of each fact row (-1 if unknown)
+        
+        Returns:
+            List[ValidationIssue]: One issue per mismatching column
+        """
+        issues = []
+        known = student_rows >= 0
+        fact_index = ScopeIndex.for_frame(table)
+        student_index = ScopeIndex.for_frame(students)
+        
+        for column in SCOPE_COLUMN_TYPES:
+            if column not in fact_index.codes or column not in student_index.codes:
+                continue
+            # Translate the fact table's codes to the students table's codes;
+            # values the students table never uses can't match (-1)
+            translated = student_index.uniques[column].get_indexer(fact_index.uniques[column])
+            lookup = np.zeros(len(translated) + 1, dtype=np.int64)
+            lookup[1:] = np.where(translated >= 0, translated + 1, -1)
+            
+            fact_codes = lookup[fact_index.codes[column]]
+            student_codes = student_index.codes[column][np.where(known, student_rows, 0)]
+            mismatch = known & (fact_codes != student_codes)
+            if mismatch.any():
+                issues.append(ValidationIssue(name, 'scope_mismatch', column, int(mismatch.sum()), _examples(table[column], mismatch)))
+        return issues
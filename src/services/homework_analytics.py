@@ -0,0 +1,237 @@
+"""
+Homework Analytics - Completion, overdue and late counters per assignment and class
+"""
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from src.models.admin_role import AdminRole
+from src.models.query_intent import QueryIntent
+from src.services.query_planner import assignment_predicate, date_range_predicate, normalize_filter_values
+from src.services.scope_filter import ScopeFilter, student_rows
+
+
+# Columns identifying a counter group. An assignment has one due date per
+# class, so keeping it in the key lets overdue counts be answered per group.
+# Region is the student's, so region-scoped admins can be answered from groups.
+GROUP_COLUMNS = ['assignment_name', 'grade', 'class', 'region', 'due_date']
+
+# Columns of the result rows when no group_by is asked for
+DETAIL_COLUMNS = ['assignment_name', 'grade', 'class', 'due_date']
+
+# Counters kept per group
+COUNTER_COLUMNS = ['students', 'submitted', 'pending', 'not_submitted', 'late', 'late_days']
+
+# Accepted order_by names mapped to result columns
+ORDER_COLUMNS = {
+    'completion': 'Completion %',
+    'completion_rate': 'Completion %',
+    'percentage': 'Completion %',
+    'overdue': 'Overdue',
+    'late': 'Late',
+    'submitted': 'Submitted',
+    'not_submitted': 'Not Submitted',
+    'assignment': 'Assignment',
+    'class': 'Class',
+    'due_date': 'Due Date',
+    'date': 'Due Date'
+}
+
+
+def student_regions(homework: pd.DataFrame, students: Optional[pd.DataFrame]) -> pd.Series:
+    """
+    Get the region of each homework row.
+    
+    Homework rows don't carry a region in the sample data, so it is looked
+    up from the row's student; unknown students get a missing region.
+    
+    Args:
+        homework: Homework rows
+        students: Students table, or None
+    
+    Returns:
+        pd.Series: Region per homework row
+    """
+    if 'region' in homework.columns:
+        return homework['region']
+    if students is None or 'region' not in students.columns or 'student_id' not in homework.columns:
+        return pd.Series(pd.NA, index=homework.index, dtype=object)
+    
+    positions = student_rows(homework['student_id'], students['student_id'])
+    regions = students['region'].to_numpy(dtype=object, na_value=None)
+    # Unknown students (-1) take the appended missing value
+    regions = np.append(regions, None)
+    return pd.Series(regions[positions], index=homework.index, dtype=students['region'].dtype)
+
+
+def count_groups(homework: pd.DataFrame, students: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Count homework rows per (assignment, grade, class, region, due date) group.
+    
+    A submission is late when it was made after the due date; late_days
+    sums how late those submissions were.
+    
+    Args:
+        homework: Homework rows
+        students: Students table the rows' regions are looked up in
+    
+    Returns:
+        pd.DataFrame: One row per group with GROUP_COLUMNS and COUNTER_COLUMNS
+    """
+    status = homework['submission_status']
+    submitted = (status == 'submitted').to_numpy(dtype=bool, na_value=False)
+    days_late = (homework['submission_date'] - homework['due_date']).dt.days.to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    late = submitted & (days_late > 0)
+    
+    counters = pd.DataFrame({
+        'students': np.ones(len(homework), dtype=np.int64),
+        'submitted': submitted.astype(np.int64),
+        'pending': (status == 'pending').to_numpy(dtype=np.int64, na_value=0),
+        'not_submitted': (status == 'not_submitted').to_numpy(dtype=np.int64, na_value=0),
+        'late': late.astype(np.int64),
+        'late_days': np.where(late, days_late, 0).astype(np.int64)
+    }, index=homework.index)
+    
+    keys = [
+        student_regions(homework, students).rename('region') if column == 'region' else homework[column]
+        for column in GROUP_COLUMNS
+    ]
+    return counters.groupby(keys, dropna=False, sort=False).sum().reset_index()
+
+
+class HomeworkCounters:
+    """
+    Completion counters for every assignment × class group.
+    
+    Counters are built once from the homework table, so answering a
+    question costs O(groups) instead of a pass over every homework row.
+    After a reload they are built again: the reload has already read
+    every row, and finding the changed rows would cost as much as
+    counting them all.
+    """
+    
+    def __init__(self, homework: pd.DataFrame, students: Optional[pd.DataFrame] = None):
+        """
+        Build the counters from a homework table.
+        
+        Args:
+            homework: Homework rows
+            students: Students table, for the rows' regions
+        """
+        # Only the counts are kept, not the tables they were counted from
+        self.groups = count_groups(homework, students)
+    
+    def query(self, intent: QueryIntent, admin: AdminRole, today: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Answer a homework analytics question from the counters.
+        
+        Supported filters are class, grade, region (the students'),
+        assignment (case-insensitive substring), date_range (on the due
+        date) and group_by: 'assignment' or 'class' to aggregate across the
+        other dimension. Groups hold no students, so a student_name filter
+        is answered from counters over that student's rows
+        (QueryExecutor.student_homework_counters).
+        
+        Args:
+            intent: Parsed query intent
+            admin: Admin role for access control
+            today: Date overdue counts are measured against (defaults to today)
+        
+        Returns:
+            pd.DataFrame: One row per group with counts, completion rate,
+            overdue and late statistics
+        """
+        today = today if today is not None else pd.Timestamp.now().normalize()
+        groups = self.groups
+        
+        # Scope applies to groups, which carry the grade, class and region of their rows
+        mask = ScopeFilter.scope_mask(groups, admin)
+        
+        filters = intent.filters
+        if filters.get('class'):
+            mask &= groups['class'].isin(normalize_filter_values('class', filters['class'])).to_numpy()
+        if filters.get('grade'):
+            mask &= groups['grade'].isin(normalize_filter_values('grade', filters['grade'])).to_numpy()
+        if filters.get('region'):
+            mask &= groups['region'].isin(normalize_filter_values('region', filters['region'])).to_numpy(dtype=bool, na_value=False)
+        if filters.get('assignment'):
+            mask &= assignment_predicate(filters['assignment']).evaluate(groups['assignment_name'])
+        if filters.get('date_range'):
+            predicate = date_range_predicate('due_date', filters['date_range'])
+            if predicate is not None:
+                mask &= predicate.evaluate(groups['due_date'])
+        
+        selected = groups[mask]
+        unsubmitted = selected['students'] - selected['submitted']
+        selected = selected.assign(overdue=np.where(selected['due_date'] < today, unsubmitted, 0))
+        
+        group_by = str(filters.get('group_by', '')).lower()
+        if group_by == 'assignment':
+            keys = ['assignment_name']
+        elif group_by == 'class':
+            keys = ['grade', 'class']
+        else:
+            keys = DETAIL_COLUMNS
+        
+        counted = COUNTER_COLUMNS + ['overdue']
+        if keys != GROUP_COLUMNS:
+            selected = selected.groupby(keys, dropna=False, sort=False)[counted].sum().reset_index()
+        
+        return self._present(selected, keys, intent)
+    
+    @staticmethod
+    def _present(selected: pd.DataFrame, keys: List[str], intent: QueryIntent) -> pd.DataFrame:
+        """
+        Turn group counters into the result table.
+        
+        Args:
+            selected: Counters per output group
+            keys: Group columns kept in the output
+            intent: Parsed query intent, for ordering and limit
+        
+        Returns:
+            pd.DataFrame: Result table
+        """
+        students = selected['students'].to_numpy(dtype=np.float64)
+        late = selected['late'].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            completion = np.round(selected['submitted'].to_numpy(dtype=np.float64) / students * 100, 2)
+            average_late = np.round(selected['late_days'].to_numpy(dtype=np.float64) / late, 1)
+        
+        labels: Dict[str, str] = {
+            'assignment_name': 'Assignment',
+            'class': 'Class',
+            'due_date': 'Due Date'
+        }
+        result = pd.DataFrame({labels[key]: selected[key].to_numpy() for key in keys if key in labels})
+        result['Students'] = selected['students'].to_numpy()
+        result['Submitted'] = selected['submitted'].to_numpy()
+        result['Pending'] = selected['pending'].to_numpy()
+        result['Not Submitted'] = selected['not_submitted'].to_numpy()
+        result['Completion %'] = completion
+        result['Overdue'] = selected['overdue'].to_numpy()
+        result['Late'] = selected['late'].to_numpy()
+        result['Avg Days Late'] = average_late
+        
+        sort_by = [column for column in ('Assignment', 'Class') if column in result.columns]
+        ascending = True
+        if intent.order_by:
+            key = re.sub(r"[\s-]+", "_", str(intent.order_by).strip().lower())
+            if ORDER_COLUMNS.get(key) in result.columns:
+                sort_by = [ORDER_COLUMNS[key]]
+                ascending = bool(intent.ascending)
+        if sort_by:
+            result = result.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+        
+        result = result.reset_index(drop=True)
+        if intent.limit is not None:
+            try:
+                limit = int(intent.limit)
+            except (TypeError, ValueError):
+                limit = 0
+            if limit > 0:
+                result = result.head(limit)
+        
+        return result
@@ -2,10 +2,13 @@
 JSON Data Repository - Concrete implementation for JSON file data source
 """
 import json
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from .data_repository import DataRepository
+from .data_validator import MAX_EXAMPLES, DataValidator, ValidationReport
 
 
 class JSONDataRepository(DataRepository):
@@ -13,75 +16,206 @@ class JSONDataRepository(DataRepository):
     Concrete implementation of DataRepository for JSON files.
     """
     
-    def __init__(self, data_file_path: str):
+    TABLES = ('students', 'homework', 'quizzes', 'performance')
+    
+    # UTC offset at the end of an ISO 8601 timestamp (Z, +05:30, -0800)
+    UTC_OFFSET = r'(?:Z|[+-]\d{2}:?\d{2})$'
+    
+    # Date columns per table. Values that don't parse become NaT and are
+    # counted; the validation report decides which failures stop the load.
+    # Dates in the export are ISO 8601 (plain dates or timestamps such as
+    # 2025-11-10T08:00:00), so the ISO parser is used instead of
+    # per-element format inference. Timestamps with an offset keep their
+    # own wall-clock time and are stored without a zone, like the plain
+    # ones, so a due date never moves to another calendar day.
+    DATE_COLUMNS = {
+        'homework': ('due_date', 'submission_date'),
+        'quizzes': ('scheduled_date',),
+        'performance': ('date',),
+    }
+    DATE_FORMAT = 'ISO8601'
+    
+    def __init__(self, data_file_path: str, max_workers: int = 4, validate: bool = True):
         """
         Initialize the JSON data repository.
         
         Args:
             data_file_path: Path to the JSON data file
+            max_workers: Number of threads used to build tables at load time
+            validate: Check keys, references and scope columns after loading
+                (date columns are always checked)
         """
         self.data_file_path = Path(data_file_path)
+        self.max_workers = max(1, max_workers)
+        self.validate = validate
         self._data_cache = None
-        
+        self._data_version = 0
+        self.load_timings: Dict[str, float] = {}
+        self.validation_report: Optional[ValidationReport] = None
+    
     def load_data(self) -> Dict[str, pd.DataFrame]:
         """
         Load all data from JSON file.
         
         Returns:
             Dict[str, pd.DataFrame]: Dictionary containing all data tables
-            
+        
         Raises:
             FileNotFoundError: If data file doesn't exist
             json.JSONDecodeError: If JSON is malformed
+            ValueError: If the validation report has fatal issues
         """
         if self._data_cache is not None:
             return self._data_cache
-            
+        
         try:
             with open(self.data_file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # Convert to DataFrames
-            self._data_cache = {
-                'students': pd.DataFrame(data.get('students', [])),
-                'homework': pd.DataFrame(data.get('homework', [])),
-                'quizzes': pd.DataFrame(data.get('quizzes', [])),
-                'performance': pd.DataFrame(data.get('performance', []))
-            }
+            # Build each table and convert its date columns on a worker pool.
+            # Building a frame from a list of dicts holds the GIL, so that
+            # step runs one table at a time; threads avoid pickling the
+            # records and let the remaining per-table work overlap.
+            workers = min(self.max_workers, len(self.TABLES))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    table: pool.submit(self._build_table, table, data.get(table, []))
+                    for table in self.TABLES
+                }
+                built = {table: future.result() for table, future in futures.items()}
             
-            # Convert date columns to datetime
-            if not self._data_cache['homework'].empty:
-                self._data_cache['homework']['due_date'] = pd.to_datetime(
-                    self._data_cache['homework']['due_date']
-                )
-                self._data_cache['homework']['submission_date'] = pd.to_datetime(
-                    self._data_cache['homework']['submission_date'], errors='coerce'
-                )
+            tables = {table: df for table, (df, _, _) in built.items()}
+            self.load_timings = {table: elapsed for table, (_, elapsed, _) in built.items()}
             
-            if not self._data_cache['quizzes'].empty:
-                self._data_cache['quizzes']['scheduled_date'] = pd.to_datetime(
-                    self._data_cache['quizzes']['scheduled_date']
+            date_failures = {table: failures for table, (_, _, failures) in built.items() if failures}
+            if self.validate:
+                self.validation_report = DataValidator(self.max_workers).validate(tables, date_failures)
+                self.load_timings['validation'] = self.validation_report.seconds
+            else:
+                self.validation_report = ValidationReport(
+                    issues=DataValidator.date_issues(date_failures),
+                    rows_checked={table: len(df) for table, df in tables.items()}
                 )
             
-            if not self._data_cache['performance'].empty:
-                self._data_cache['performance']['date'] = pd.to_datetime(
-                    self._data_cache['performance']['date']
+            fatal = self.validation_report.fatal_issues
+            if fatal:
+                raise ValueError(
+                    f"Invalid data in {self.data_file_path}: " + "; ".join(str(issue) for issue in fatal)
                 )
             
+            self._data_cache = tables
             return self._data_cache
-            
+        
         except FileNotFoundError:
             raise FileNotFoundError(f"Data file not found: {self.data_file_path}")
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(f"Invalid JSON in data file: {e.msg}", e.doc, e.pos)
     
+    def reload(self) -> Dict[str, pd.DataFrame]:
+        """
+        Drop the cached tables and load the data file again.
+        
+        Returns:
+            Dict[str, pd.DataFrame]: Dictionary containing all data tables
+        """
+        self._data_cache = None
+        self._data_version += 1
+        return self.load_data()
+    
+    def release_tables(self) -> None:
+        """
+        Drop the cached tables without bumping the data version.
+        
+        The next load reads the data file again.
+        """
+        self._data_cache = None
+    
+    def get_data_version(self) -> int:
+        """
+        Get the number of times the data has been reloaded.
+        
+        Returns:
+            int: Current data version
+        """
+        return self._data_version
+    
+    def _parse_dates(self, raw: pd.Series) -> pd.Series:
+        """
+        Parse a date column, keeping each value's local wall-clock time.
+        
+        Args:
+            raw: Raw values of the column
+        
+        Returns:
+            pd.Series: Zone-naive timestamps; values that don't parse are NaT
+        """
+        try:
+            parsed = pd.to_datetime(raw, format=self.DATE_FORMAT, errors='coerce')
+        except ValueError:
+            # Offsets differ between values (or mix with plain dates), which
+            # pandas can't put in one column: drop them and keep the time
+            # as written
+            stripped = raw.where(raw.isna(), raw.astype(str).str.replace(self.UTC_OFFSET, '', regex=True))
+            parsed = pd.to_datetime(stripped, format=self.DATE_FORMAT, errors='coerce')
+        if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+            parsed = parsed.dt.tz_localize(None)
+        return parsed
+    
+    def _build_table(self, table: str, records: List[dict]) -> Tuple[pd.DataFrame, float, Dict[str, Tuple[int, List[Any]]]]:
+        """
+        Build a single table and convert its date columns.
+        
+        Args:
+            table: Name of the table
+            records: Raw records for the table
+        
+        Returns:
+            Tuple[pd.DataFrame, float, Dict[str, Tuple[int, List[Any]]]]: The
+            table, the seconds spent building it, and per date column the
+            number of values that didn't parse with a few examples
+        """
+        started = time.perf_counter()
+        df = pd.DataFrame(records)
+        date_failures: Dict[str, Tuple[int, List[Any]]] = {}
+        
+        if not df.empty:
+            for column in self.DATE_COLUMNS.get(table, ()):
+                raw = df[column]
+                df[column] = self._parse_dates(raw)
+                failed = (df[column].isna() & raw.notna()).to_numpy()
+                if failed.any():
+                    date_failures[column] = (int(failed.sum()), list(raw[failed].unique()[:MAX_EXAMPLES]))
+        
+        return df, time.perf_counter() - started, date_failures
+    
+    def get_load_timings(self) -> Dict[str, float]:
+        """
+        Get the time spent building each table during the last load.
+        
+        Returns:
+            Dict[str, float]: Seconds per table name
+        """
+        self.load_data()
+        return dict(self.load_timings)
+    
+    def get_validation_report(self) -> Optional[ValidationReport]:
+        """
+        Get the result of validating the last load.
+        
+        Returns:
+            Optional[ValidationReport]: The report; with validation off it
+            only covers the date columns
+        """
+        self.load_data()
+        return self.validation_report
+    
     def get_students(self, filters: Optional[Dict] = None) -> pd.DataFrame:
         """
         Get student records with optional filters.
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered student records
         """
@@ -99,7 +233,7 @@ class JSONDataRepository(DataRepository):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered homework records
         """
@@ -117,7 +251,7 @@ class JSONDataRepository(DataRepository):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered quiz records
         """
@@ -135,7 +269,7 @@ class JSONDataRepository(DataRepository):
         
         Args:
             filters: Optional dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered performance records
         """
@@ -154,7 +288,7 @@ class JSONDataRepository(DataRepository):
         Args:
             df: DataFrame to filter
             filters: Dictionary of filter criteria
-            
+        
         Returns:
             pd.DataFrame: Filtered DataFrame
         """
@@ -0,0 +1,331 @@
+"""
+LLM Governor - Rate limiting, concurrency caps, timeouts and a circuit breaker for LLM calls
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+
+# How often a waiting caller checks whether its query was cancelled
+CANCEL_POLL_SECONDS = 0.05
+
+
+class LLMCallShed(Exception):
+    """
+    Raised when the governor refuses or abandons an LLM call.
+    
+    Attributes:
+        reason: Why the call was shed (circuit_open, rate_limited,
+            concurrency, timeout, or cancelled when the caller gave up)
+    """
+    
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+    
+    Tokens refill continuously at rate per second up to capacity. A call
+    takes one token or is refused, so bursts up to capacity pass and the
+    sustained rate is capped.
+    """
+    
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens the bucket holds
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> bool:
+        """
+        Take one token if available.
+        
+        Returns:
+            bool: True if a token was taken
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over consecutive call failures.
+    
+    After failure_threshold consecutive failures the breaker opens and
+    refuses calls. Once reset_seconds have passed it lets a single probe
+    call through (half-open): success closes it, failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a closed breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_seconds: Time the breaker stays open before a probe
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the reset time has passed."""
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            return self._state
+    
+    def allow(self) -> bool:
+        """
+        Check whether a call may go ahead.
+        
+        Returns:
+            bool: True when closed, or for the single probe when half-open
+        """
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    def cancel_probe(self) -> None:
+        """Give up a half-open probe that was admitted but never made."""
+        with self._lock:
+            self._probing = False
+    
+    def record_success(self) -> None:
+        """Close the breaker and reset the failure count."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker at the threshold or after a failed probe."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+
+class LLMGovernor:
+    """
+    Guards calls to an LLM client.
+    
+    Each call must pass the circuit breaker, take a rate-limit token and
+    get one of max_in_flight slots, or it is shed immediately rather than
+    queued. Admitted calls run on the governor's worker threads and are
+    abandoned when their deadline passes; the slot stays taken until the
+    call really returns, so a slow provider can't pile up threads. Errors
+    and timeouts count as breaker failures.
+    """
+    
+    def __init__(
+        self,
+        rate_per_second: float = 5.0,
+        burst: int = 10,
+        max_in_flight: int = 4,
+        timeout_seconds: float = 15.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the governor.
+        
+        Args:
+            rate_per_second: Sustained calls per second
+            burst: Calls allowed at once above the sustained rate
+            max_in_flight: Calls running at the same time
+            timeout_seconds: Deadline for each call
+            failure_threshold: Consecutive failures that open the breaker
+            reset_seconds: Time the breaker stays open before a probe
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.timeout_seconds = timeout_seconds
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate_per_second, burst, clock)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds, clock)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='llm-call')
+        self._lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'shed_circuit_open': 0,
+            'shed_rate_limited': 0,
+            'shed_concurrency': 0,
+            'shed_timeout': 0,
+            'cancelled': 0
+        }
+    
+    def _shed(self, reason: str, message: str) -> LLMCallShed:
+        """Count a shed call and build its exception."""
+        with self._lock:
+            self.stats[f'shed_{reason}'] += 1
+        return LLMCallShed(reason, message)
+    
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[Any] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run an LLM call under the governor's limits.
+        
+        A call whose cancel token is already cancelled is not started, so
+        it takes no rate token or slot. A caller whose token is cancelled
+        while waiting stops waiting; like a timed-out call, the request
+        keeps its slot until it returns, but it doesn't count as a failure.
+        
+        Args:
+            fn: The call to make (e.g., a model's invoke)
+            *args: Positional arguments for fn
+            timeout: Deadline in seconds (defaults to timeout_seconds)
+            cancel_token: CancellationToken of the query making the call
+            **kwargs: Keyword arguments for fn
+        
+        Returns:
+            Any: What fn returned
+        
+        Raises:
+            LLMCallShed: If the call was refused, timed out or cancelled
+            Exception: Whatever fn raised
+        """
+        if cancel_token is not None and cancel_token.cancelled:
+            raise self._cancelled()
+        if not self.breaker.allow():
+            raise self._shed('circuit_open', "LLM circuit breaker is open")
+        if not self.bucket.try_acquire():
+            self.breaker.cancel_probe()
+            raise self._shed('rate_limited', "LLM rate limit reached")
+        if not self._slots.acquire(blocking=False):
+            self.breaker.cancel_probe()
+            raise self._shed('concurrency', f"{self.max_in_flight} LLM calls already in flight")
+        
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['in_flight'] += 1
+        
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._finish_slot(None)
+            raise
+        future.add_done_callback(self._finish_slot)
+        
+        try:
+            result = self._wait(future, timeout if timeout is not None else self.timeout_seconds, cancel_token)
+        except LLMCallShed:
+            future.cancel()
+            self.breaker.cancel_probe()
+            raise
+        except FutureTimeoutError:
+            self.breaker.record_failure()
+            with self._lock:
+                self.stats['failed'] += 1
+            raise self._shed('timeout', "LLM call timed out")
+        except Exception:
+            self.breaker.record_failure()
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+        
+        self.breaker.record_success()
+        with self._lock:
+            self.stats['succeeded'] += 1
+        return result
+    
+    def _wait(self, future, timeout: float, cancel_token: Optional[Any]) -> Any:
+        """
+        Wait for a call's result until its deadline or its query is cancelled.
+        
+        Raises:
+            LLMCallShed: If the cancel token was cancelled
+            FutureTimeoutError: If the deadline passed
+        """
+        if cancel_token is None:
+            return future.result(timeout=timeout)
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                return future.result(timeout=max(0.0, min(remaining, CANCEL_POLL_SECONDS)))
+            except FutureTimeoutError:
+                if cancel_token.cancelled:
+                    raise self._cancelled()
+                if remaining <= CANCEL_POLL_SECONDS:
+                    raise
+    
+    def _cancelled(self) -> LLMCallShed:
+        """Count a call given up by its caller and build its exception."""
+        with self._lock:
+            self.stats['cancelled'] += 1
+        return LLMCallShed('cancelled', "Query was cancelled")
+    
+    def _finish_slot(self, future) -> None:
+        """Free a call's slot once it has really returned."""
+        with self._lock:
+            self.stats['in_flight'] -= 1
+        self._slots.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker state and call counters.
+        
+        Returns:
+            Dict[str, Any]: Breaker state, calls, failures, in-flight,
+            shed counts per reason and calls cancelled by their callers
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats['breaker_state'] = self.breaker.state
+        stats['shed'] = sum(value for key, value in stats.items() if key.startswith('shed_'))
+        return stats
+    
+    def shutdown(self) -> None:
+        """Stop the worker threads once running calls return."""
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,372 @@
+"""
+Memory Report - Memory held per table, cache, session and tenant, and allocation profiling
+"""
+import json
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from dataclasses import fields, is_dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set
+import numpy as np
+import pandas as pd
+from src.services.name_index import NameIndex
+from src.services.scope_filter import ScopeIndex
+
+
+MB = 2 ** 20
+
+
+def object_bytes(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the memory held by an object and what it references.
+    
+    DataFrames and Series are measured deeply (including string contents),
+    arrays by their buffers, and containers, dataclasses and plain objects
+    recursively. Objects already in seen are skipped, so passing the same
+    set across calls attributes shared objects to their first owner.
+    Buffers shared between views are counted once per view.
+    
+    Args:
+        obj: Object to measure
+        seen: ids of objects already counted (updated in place)
+    
+    Returns:
+        int: Estimated bytes
+    """
+    seen = set() if seen is None else seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += object_bytes(key, seen) + object_bytes(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += object_bytes(item, seen)
+    elif is_dataclass(obj):
+        for field in fields(obj):
+            size += object_bytes(getattr(obj, field.name), seen)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += object_bytes(vars(obj), seen)
+    return size
+
+
+def process_memory() -> Dict[str, Optional[float]]:
+    """
+    Get the process's resident memory and what tracemalloc is tracing.
+    
+    Returns:
+        Dict[str, Optional[float]]: rss_mb and peak_rss_mb (None where the
+        platform doesn't report them) and traced_mb when tracing
+    """
+    rss = peak = None
+    try:
+        with open('/proc/self/status', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024 / MB
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) * 1024 / MB
+    except OSError:
+        try:
+            import resource
+            
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            scale = 1 if sys.platform == 'darwin' else 1024
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / MB
+        except ImportError:
+            pass
+    
+    memory = {'rss_mb': rss, 'peak_rss_mb': peak}
+    if tracemalloc.is_tracing():
+        memory['traced_mb'] = tracemalloc.get_traced_memory()[0] / MB
+    return memory
+
+
+class QueryHistory(list):
+    """
+    A session's query history.
+    
+    A list that can be weakly referenced, so SessionRegistry can find it
+    for the memory report without keeping an ended session's results alive.
+    """
+
+
+class SessionRegistry:
+    """
+    Weak references to every live session's query history.
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def track(self, session_id: str, history: QueryHistory, tenant_id: Optional[str], admin_id: Optional[str]) -> None:
+        """
+        Record a session's current history, tenant and admin.
+        
+        Args:
+            session_id: Session identifier
+            history: The session's query history
+            tenant_id: Tenant the session is bound to
+            admin_id: Admin selected in the session
+        """
+        with self._lock:
+            self._sessions[session_id] = {
+                'history': weakref.ref(history),
+                'tenant_id': tenant_id,
+                'admin_id': admin_id
+            }
+    
+    def sessions(self) -> List[Dict[str, Any]]:
+        """
+        Get the live sessions, dropping those whose history is gone.
+        
+        Returns:
+            List[Dict[str, Any]]: session_id, tenant_id, admin_id and history
+        """
+        live = []
+        with self._lock:
+            for session_id, entry in list(self._sessions.items()):
+                history = entry['history']()
+                if history is None:
+                    del self._sessions[session_id]
+                    continue
+                live.append({
+                    'session_id': session_id,
+                    'tenant_id': entry['tenant_id'],
+                    'admin_id': entry['admin_id'],
+                    'history': history
+                })
+        return live
+
+
+def _tenant_memory(context: Any, seen: Set[int]) -> Dict[str, Any]:
+    """
+    Account for one tenant's tables, indexes, derived data and result cache.
+    
+    Args:
+        context: The tenant's TenantContext
+        seen: ids of objects already counted (updated in place)
+    
+    Returns:
+        Dict[str, Any]: Bytes per table and per cache for the tenant
+    """
+    report: Dict[str, Any] = {
+        'tenant_id': context.tenant.tenant_id,
+        'name': context.tenant.name,
+        'loaded': context.loaded,
+        'tables': {},
+        'indexes_bytes': 0,
+        'result_cache_bytes': 0,
+        'result_cache_entries': 0,
+        'homework_counters_bytes': 0,
+        'score_series_bytes': 0
+    }
+    repository, executor = context.repository, context.executor
+    if repository is None or executor is None:
+        report['total_bytes'] = 0
+        return report
+    
+    tables = repository.load_data()
+    for name, table in tables.items():
+        report['tables'][name] = object_bytes(table, seen)
+    for table in tables.values():
+        for index in (ScopeIndex.cached(table), NameIndex.cached(table)):
+            report['indexes_bytes'] += object_bytes(index, seen)
+    
+    cached = executor.get_cached_objects()
+    report['homework_counters_bytes'] = object_bytes(cached['homework_counters'], seen)
+    report['score_series_bytes'] = object_bytes(cached['score_series'], seen)
+    for derived in (cached['homework_counters'], cached['score_series']):
+        for frame in (getattr(derived, 'groups', None), getattr(derived, 'series', None)):
+            if frame is not None:
+                report['indexes_bytes'] += object_bytes(ScopeIndex.cached(frame), seen)
+    report['result_cache_entries'] = len(cached['result_cache'])
+    report['result_cache_bytes'] = sum(object_bytes(frame, seen) for frame in cached['result_cache'])
+    
+    report['total_bytes'] = (
+        sum(report['tables'].values()) + report['indexes_bytes'] + report['result_cache_bytes']
+        + report['homework_counters_bytes'] + report['score_series_bytes']
+    )
+    return report
+
+
+def build_memory_report(
+    tenant_manager: Any,
+    query_parser: Optional[Any] = None,
+    session_registry: Optional[SessionRegistry] = None,
+    llm_governor: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Build a JSON-serializable report of where memory is held.
+    
+    Each object is attributed once, to the first owner in this order:
+    tenant tables, their indexes, homework counters, score series and
+    result cache, then the parse cache, then session histories. A
+    session's bytes are therefore what it holds beyond the shared caches.
+    
+    Args:
+        tenant_manager: TenantManager serving the tenants
+        query_parser: NLQueryParser whose parse cache to include
+        session_registry: Registry of live sessions' histories
+        llm_governor: LLMGovernor whose in-flight calls to include
+    
+    Returns:
+        Dict[str, Any]: Process memory and bytes per tenant, table,
+        cache and session
+    """
+    started = time.perf_counter()
+    seen: Set[int] = set()
+    
+    tenants = [_tenant_memory(context, seen) for context in tenant_manager.get_contexts()]
+    
+    caches: Dict[str, Any] = {}
+    if query_parser is not None:
+        parse_cache = query_parser.get_cached_objects()['parse_cache']
+        caches['parse_cache'] = {
+            'entries': len(parse_cache),
+            'bytes': sum(object_bytes(entry, seen) for entry in parse_cache)
+        }
+    if llm_governor is not None:
+        caches['llm_in_flight_calls'] = llm_governor.get_stats()['in_flight']
+    
+    sessions = []
+    if session_registry is not None:
+        for session in session_registry.sessions():
+            history = session['history']
+            sessions.append({
+                'session_id': session['session_id'],
+                'tenant_id': session['tenant_id'],
+                'admin_id': session['admin_id'],
+                'history_entries': len(history),
+                'bytes': object_bytes(list(history), seen)
+            })
+    
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'process': process_memory(),
+        'tenants': tenants,
+        'tenants_total_bytes': sum(t['total_bytes'] for t in tenants),
+        'caches': caches,
+        'sessions': sessions,
+        'sessions_total_bytes': sum(s['bytes'] for s in sessions),
+        'report_seconds': time.perf_counter() - started
+    }
+
+
+def profile_allocations(fn: Callable[..., Any], *args, top: int = 10, **kwargs) -> Dict[str, Any]:
+    """
+    Run one call under tracemalloc and report what it allocated.
+    
+    Tracing is started only for the call (unless it was already on), so
+    nothing is traced, and nothing slows down, outside a profile.
+    
+    Args:
+        fn: Call to profile (e.g., an executor's execute)
+        *args: Positional arguments for fn
+        top: Number of allocation sites to report
+        **kwargs: Keyword arguments for fn
+    
+    Returns:
+        Dict[str, Any]: 'result' of the call, 'seconds', 'allocated_bytes'
+        (net, still held after the call), 'peak_bytes' during the call and
+        'top' allocation sites by net size
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), 'lineno')
+    return {
+        'result': result,
+        'seconds': seconds,
+        'allocated_bytes': current - baseline,
+        'peak_bytes': peak - baseline,
+        'top': [
+            {
+                'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_bytes': stat.size_diff,
+                'count': stat.count_diff
+            }
+            for stat in differences[:top]
+        ]
+    }
+
+
+class MemoryReportServer:
+    """
+    Serves the memory report as JSON over HTTP.
+    
+    GET /memory returns build_memory_report's output. When a token is set,
+    requests must send it as "Authorization: Bearer <token>". The server
+    binds to localhost by default and runs on a daemon thread.
+    """
+    
+    def __init__(self, report: Callable[[], Dict[str, Any]], port: int, host: str = '127.0.0.1', token: Optional[str] = None):
+        """
+        Start serving.
+        
+        Args:
+            report: Builds the report for each request
+            port: Port to listen on
+            host: Interface to bind
+            token: Bearer token required from clients (None for no check)
+        """
+        expected = f"Bearer {token}" if token else None
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0].rstrip('/') != '/memory':
+                    self.send_error(404)
+                    return
+                if expected is not None and self.headers.get('Authorization') != expected:
+                    self.send_error(401)
+                    return
+                body = json.dumps(report(), default=str).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name='memory-report', daemon=True)
+        self._thread.start()
+    
+    def shutdown(self) -> None:
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
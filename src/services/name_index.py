@@ -0,0 +1,154 @@
+"""
+Name Index - Case-insensitive and fuzzy student name lookup
+"""
+import re
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+
+class NameIndex:
+    """
+    Prebuilt lookup from student names to student IDs.
+    
+    Names are matched case-insensitively, first as a whole name, then as a
+    set of whole words ("alice" matches "Alice Johnson"). If neither finds
+    anything, names sharing enough character trigrams with the query are
+    returned, which tolerates typos.
+    """
+    
+    # Minimum trigram Jaccard similarity for a fuzzy match
+    FUZZY_THRESHOLD = 0.4
+    
+    _cache: Dict[int, 'NameIndex'] = {}
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, students: pd.DataFrame):
+        """
+        Build the index from a students table.
+        
+        Args:
+            students: Table with student_id and name columns
+        """
+        self.student_ids = students['student_id'].to_numpy(dtype=object)
+        names = students['name'].fillna('').astype(str).str.casefold().to_numpy(dtype=object)
+        
+        full_names = defaultdict(list)
+        tokens = defaultdict(list)
+        trigrams = defaultdict(list)
+        self.trigram_counts = np.zeros(len(names), dtype=np.int32)
+        
+        for position, name in enumerate(names):
+            full_names[name].append(position)
+            for token in set(self._tokenize(name)):
+                tokens[token].append(position)
+            name_trigrams = self._trigrams(name)
+            self.trigram_counts[position] = len(name_trigrams)
+            for trigram in name_trigrams:
+                trigrams[trigram].append(position)
+        
+        self.full_names = {k: np.array(v, dtype=np.int64) for k, v in full_names.items()}
+        self.tokens = {k: np.array(v, dtype=np.int64) for k, v in tokens.items()}
+        self.trigrams = {k: np.array(v, dtype=np.int64) for k, v in trigrams.items()}
+    
+    @classmethod
+    def for_frame(cls, students: pd.DataFrame) -> 'NameIndex':
+        """
+        Get the cached index for a students table, building it on first use.
+        
+        Args:
+            students: Table with student_id and name columns
+        
+        Returns:
+            NameIndex: Index for the table
+        """
+        key = id(students)
+        index = cls._cache.get(key)
+        if index is not None:
+            return index
+        
+        index = cls(students)
+        with cls._cache_lock:
+            if key not in cls._cache:
+                cls._cache[key] = index
+                weakref.finalize(students, cls._cache.pop, key, None)
+        return index
+    
+    @classmethod
+    def cached(cls, students: pd.DataFrame) -> Optional['NameIndex']:
+        """
+        Get the index already built for a DataFrame, without building one.
+        
+        Args:
+            students: Indexed table
+        
+        Returns:
+            NameIndex: The cached index, or None
+        """
+        return cls._cache.get(id(students))
+    
+    @staticmethod
+    def _tokenize(name: str) -> List[str]:
+        return re.findall(r"\w+", name)
+    
+    @staticmethod
+    def _trigrams(name: str) -> Set[str]:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def lookup(self, name: str, fuzzy: bool = True) -> np.ndarray:
+        """
+        Find the student IDs matching a name.
+        
+        Args:
+            name: Full or partial student name, in any case
+            fuzzy: Whether to fall back to trigram similarity
+        
+        Returns:
+            np.ndarray: Matching student IDs (empty if none)
+        """
+        query = str(name).casefold().strip()
+        if not query:
+            return self.student_ids[:0]
+        
+        positions = self.full_names.get(query)
+        
+        if positions is None:
+            query_tokens = set(self._tokenize(query))
+            postings = [self.tokens.get(token) for token in query_tokens]
+            if query_tokens and all(p is not None for p in postings):
+                positions = postings[0]
+                for posting in postings[1:]:
+                    positions = np.intersect1d(positions, posting, assume_unique=True)
+        
+        if (positions is None or len(positions) == 0) and fuzzy:
+            positions = self._fuzzy_positions(query)
+        
+        if positions is None:
+            return self.student_ids[:0]
+        return np.unique(self.student_ids[positions])
+    
+    def _fuzzy_positions(self, query: str) -> np.ndarray:
+        """
+        Positions of names whose trigram similarity with the query passes the threshold.
+        
+        Args:
+            query: Casefolded query
+        
+        Returns:
+            np.ndarray: Matching row positions
+        """
+        query_trigrams = self._trigrams(query)
+        postings = [self.trigrams[t] for t in query_trigrams if t in self.trigrams]
+        if not postings:
+            return np.array([], dtype=np.int64)
+        
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.trigram_counts))
+        candidates = np.flatnonzero(shared)
+        union = len(query_trigrams) + self.trigram_counts[candidates] - shared[candidates]
+        similarity = shared[candidates] / union
+        
+        return candidates[similarity >= self.FUZZY_THRESHOLD]
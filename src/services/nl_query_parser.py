@@ -2,11 +2,74 @@
 Natural Language Query Parser - Uses LangChain and OpenAI to parse queries
 """
 import os
+import re
 import json
-from typing import Optional
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import INTENT_TYPES
 from src.models.query_intent import QueryIntent
+from src.services.llm_governor import LLMCallShed
+
+
+INTENT_TOOL_NAME = "record_query_intent"
+
+FILTER_KEYS = ('grade', 'class', 'region', 'status', 'date_range', 'student_name', 'assignment', 'group_by', 'direction')
+
+# Schema the model must fill in. Field descriptions carry the guidance that
+# used to live in the free-text prompt, so the system prompt stays short.
+INTENT_TOOL = {
+    "type": "function",
+    "function": {
+        "name": INTENT_TOOL_NAME,
+        "description": "Record the structured intent of an admin's question about school data.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "intent_type": {
+                    "type": "string",
+                    "enum": INTENT_TYPES,
+                    "description": (
+                        "homework_status: homework submissions; homework_analytics: completion "
+                        "rates, overdue or late counts per assignment/class; performance: grades, "
+                        "scores, quiz results; performance_trend: how students' scores changed over "
+                        "time (dropped, improved, trend); upcoming_quizzes: scheduled quizzes; general: anything else"
+                    )
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Only filters mentioned in the question.",
+                    "properties": {
+                        "grade": {"type": "integer", "description": "Grade level, e.g. 8"},
+                        "class": {"type": "string", "description": "Class name, e.g. 8A"},
+                        "region": {"type": "string", "description": "Region, e.g. North"},
+                        "status": {"type": "string", "enum": ["submitted", "not_submitted", "pending"]},
+                        "date_range": {"type": "string", "description": "e.g. last week, next week, upcoming"},
+                        "student_name": {"type": "string"},
+                        "assignment": {"type": "string", "description": "Assignment name, e.g. Math Chapter 5"},
+                        "group_by": {"type": "string", "enum": ["assignment", "class"], "description": "homework_analytics only: totals per assignment or per class"},
+                        "direction": {"type": "string", "enum": ["declining", "improving"], "description": "performance_trend only: students whose scores fell or rose"}
+                    },
+                    "additionalProperties": False
+                },
+                "order_by": {
+                    "type": ["string", "null"],
+                    "description": "Rank field for top/latest/lowest N questions: score, percentage, date, due_date, submission_date, name, completion, overdue, late, slope, change"
+                },
+                "order": {"type": "string", "enum": ["asc", "desc"]},
+                "limit": {"type": ["integer", "null"], "description": "N in top/latest N"},
+                "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+            },
+            "required": ["intent_type", "filters", "confidence"]
+        }
+    }
+}
+
+SYSTEM_PROMPT = (
+    f"Parse the school admin's question by calling {INTENT_TOOL_NAME}. "
+    "Extract only what the question states."
+)
 
 
 class NLQueryParser:
@@ -15,97 +78,407 @@ class NLQueryParser:
     Extracts intent and filters from user questions.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-3.5-turbo",
+        llm: Optional[Any] = None,
+        cache_size: int = 256,
+        governor: Optional[Any] = None,
+        fallback_parser: Optional[Any] = None,
+        timeout_seconds: Optional[float] = None
+    ):
         """
         Initialize the NL query parser.
         
         Args:
             api_key: OpenAI API key (if None, reads from environment)
             model: OpenAI model to use
+            llm: Chat model to use instead of ChatOpenAI (e.g., a fake model in tests)
+            cache_size: Number of parsed questions to keep (0 disables caching)
+            governor: LLMGovernor that rate-limits and times out model calls
+            fallback_parser: Local parser (e.g., RuleBasedParser) used when a
+                model call is shed or fails, or its output stays invalid
+            timeout_seconds: Request timeout for the ChatOpenAI client
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         self.model = model
+        self.governor = governor
+        self.fallback_parser = fallback_parser
+        self.timeout_seconds = timeout_seconds
         
-        if not self.api_key:
+        if not self.api_key and llm is None:
             raise ValueError("OpenAI API key not provided and not found in environment")
         
-        self.llm = ChatOpenAI(
-            api_key=self.api_key,
-            model=self.model,
-            temperature=0
-        )
+        # The LangChain client is created on first use, so building a parser
+        # (or importing this module) doesn't pull in langchain
+        self._llm = llm
+        self._structured_llm = None
         
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are a query parser for an educational admin system.
-Your job is to parse natural language questions and extract structured information.
-
-Parse the question and identify:
-1. Intent type: Choose ONE from these options:
-   - "homework_status": Questions about homework submissions, who submitted, who didn't submit
-   - "performance": Questions about grades, scores, quiz results, academic performance
-   - "upcoming_quizzes": Questions about scheduled quizzes, upcoming tests
-   - "general": Any other questions
-
-2. Filters: Extract any of these if mentioned:
-   - grade: Grade level (e.g., 6, 7, 8, 9, 10)
-   - class: Class name (e.g., "8A", "9B")
-   - region: Region name (e.g., "North", "South")
-   - status: Submission status ("submitted", "not_submitted", "pending")
-   - date_range: Time period mentioned (e.g., "last week", "next week", "upcoming")
-   - student_name: Specific student name if mentioned
-
-Return ONLY a valid JSON object with this exact structure:
-{{
-  "intent_type": "one of the intent types above",
-  "filters": {{
-    "key": "value"
-  }},
-  "confidence": 0.95
-}}
-
-Do not include any explanation, just the JSON."""),
-            ("user", "{question}")
-        ])
+        self._usage_lock = threading.Lock()
+        self._local = threading.local()
+        self.usage_stats = {
+            'calls': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'repairs': 0,
+            'fallbacks': 0,
+            'local_parses': 0
+        }
+        
+        self.cache_size = cache_size
+        self._parse_cache: "OrderedDict[str, QueryIntent]" = OrderedDict()
+        self.cache_stats = {'hits': 0, 'misses': 0}
+    
+    @property
+    def last_usage(self) -> Dict[str, int]:
+        """Token usage of the last LLM call made by the current thread."""
+        return getattr(self._local, 'last_usage', {})
+    
+    @property
+    def last_cache_hit(self) -> bool:
+        """Whether the last question parsed by the current thread came from the cache."""
+        return getattr(self._local, 'last_cache_hit', False)
+    
+    @property
+    def last_source(self) -> str:
+        """Where the current thread's last parse came from: 'cache', 'llm' or 'local'."""
+        return getattr(self._local, 'last_source', 'llm')
+    
+    @property
+    def last_shed_reason(self) -> Optional[str]:
+        """Why the current thread's last parse fell back to the local parser, if it did."""
+        return getattr(self._local, 'last_shed_reason', None)
+    
+    @property
+    def llm(self) -> Any:
+        """
+        Get the chat model client, creating it on first use.
+        
+        Returns:
+            ChatOpenAI: The LangChain chat model
+        """
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            
+            self._llm = ChatOpenAI(
+                api_key=self.api_key,
+                model=self.model,
+                temperature=0,
+                timeout=self.timeout_seconds
+            )
+        return self._llm
+    
+    @property
+    def structured_llm(self) -> Any:
+        """
+        Get the chat model bound to the intent tool, which it must call.
+        
+        Returns:
+            Runnable: The tool-bound chat model
+        """
+        if self._structured_llm is None:
+            self._structured_llm = self.llm.bind_tools(
+                [INTENT_TOOL], tool_choice=INTENT_TOOL_NAME
+            )
+        return self._structured_llm
+    
+    def _build_messages(self, question: str) -> List[Tuple[str, str]]:
+        """
+        Build the chat messages for a question.
+        
+        Args:
+            question: The natural language question
+        
+        Returns:
+            List[Tuple[str, str]]: (role, content) message pairs
+        """
+        return [
+            ("system", SYSTEM_PROMPT),
+            ("user", question)
+        ]
+    
+    def _build_repair_messages(self, question: str, output: str, error: str) -> List[Tuple[str, str]]:
+        """
+        Build the messages for one attempt at fixing an invalid output.
+        
+        Args:
+            question: The natural language question
+            output: The invalid output
+            error: Why the output was rejected
+        
+        Returns:
+            List[Tuple[str, str]]: (role, content) message pairs
+        """
+        return [
+            ("system", SYSTEM_PROMPT),
+            ("user", f"{question}\n\nYour previous output {output} was invalid: {error}. Call {INTENT_TOOL_NAME} again with corrected arguments.")
+        ]
+    
+    def _invoke(self, messages: List[Tuple[str, str]], cancel_token: Optional[Any] = None) -> Tuple[Any, str]:
+        """
+        Call the model (through the governor, if any) and record token usage.
+        
+        Args:
+            messages: Chat messages to send
+            cancel_token: CancellationToken of the query; a cancelled query
+                makes no further calls
+        
+        Returns:
+            Tuple[Any, str]: The tool arguments (or raw text when the model
+            answered without calling the tool) and their text form
+        
+        Raises:
+            LLMCallShed: If the governor refused or timed out the call, or
+                the query was cancelled
+        """
+        if self.governor is not None:
+            response = self.governor.call(self.structured_llm.invoke, messages, cancel_token=cancel_token)
+        else:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise LLMCallShed('cancelled', "Query was cancelled")
+            response = self.structured_llm.invoke(messages)
+        
+        usage = getattr(response, 'usage_metadata', None) or {}
+        last_usage = {
+            'input_tokens': int(usage.get('input_tokens', 0)),
+            'output_tokens': int(usage.get('output_tokens', 0))
+        }
+        self._local.last_usage = last_usage
+        with self._usage_lock:
+            self.usage_stats['calls'] += 1
+            self.usage_stats['input_tokens'] += last_usage['input_tokens']
+            self.usage_stats['output_tokens'] += last_usage['output_tokens']
+        
+        tool_calls = getattr(response, 'tool_calls', None) or []
+        for call in tool_calls:
+            if call.get('name') == INTENT_TOOL_NAME:
+                return call.get('args'), json.dumps(call.get('args'))
+        
+        content = getattr(response, 'content', '') or ''
+        return content, content
+    
+    @staticmethod
+    def _to_intent(result: Any) -> QueryIntent:
+        """
+        Validate model output and convert it to a QueryIntent.
+        
+        Args:
+            result: Tool arguments, or raw text holding a JSON object
+        
+        Returns:
+            QueryIntent: The validated intent
+        
+        Raises:
+            ValueError: If the output doesn't match the intent schema
+        """
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"not valid JSON ({e.msg})")
+        
+        if not isinstance(result, dict):
+            raise ValueError("expected a JSON object")
+        
+        intent_type = result.get('intent_type')
+        if intent_type not in INTENT_TYPES:
+            raise ValueError(f"intent_type must be one of {INTENT_TYPES}, got {intent_type!r}")
+        
+        filters = result.get('filters') or {}
+        if not isinstance(filters, dict):
+            raise ValueError("filters must be an object")
+        filters = {
+            key: value for key, value in filters.items()
+            if key in FILTER_KEYS and value not in (None, '')
+        }
+        
+        limit = result.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                raise ValueError(f"limit must be an integer, got {limit!r}")
+        
+        try:
+            confidence = min(max(float(result.get('confidence', 0.8)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            confidence = 0.8
+        
+        return QueryIntent(
+            intent_type=intent_type,
+            filters=filters,
+            confidence=confidence,
+            order_by=result.get('order_by'),
+            ascending=str(result.get('order', 'desc')).lower() == 'asc',
+            limit=limit
+        )
     
-    def parse_query(self, question: str) -> QueryIntent:
+    def parse_query(self, question: str, cancel_token: Optional[Any] = None) -> QueryIntent:
         """
         Parse a natural language question into a QueryIntent.
         
+        Repeated questions are answered from the parse cache. Otherwise the
+        model fills in a tool schema. Output that fails validation gets one
+        repair attempt. When the repaired output is still invalid, the
+        governor sheds the call, or the call fails, and a fallback parser
+        is set, the question is parsed locally instead; local parses are
+        not cached, so the question goes to the model again next time.
+        Without a fallback parser these cases raise.
+        
         Args:
             question: The natural language question
-            
+            cancel_token: CancellationToken of the query (see QueryRunner);
+                once it is cancelled no model call is started or waited for
+        
         Returns:
             QueryIntent: Parsed intent with filters
-            
+        
         Raises:
+            LLMCallShed: With reason 'cancelled' if the query was cancelled
             Exception: If parsing fails or API error occurs
         """
+        self._local.last_usage = {}
+        self._local.last_shed_reason = None
+        cache_key = self._cache_key(question)
+        cached = self._get_cached(cache_key)
+        self._local.last_cache_hit = cached is not None
+        if cached is not None:
+            self._local.last_source = 'cache'
+            return cached
+        
+        self._local.last_source = 'llm'
         try:
-            # Create the prompt
-            messages = self.prompt_template.format_messages(question=question)
+            result, output = self._invoke(self._build_messages(question), cancel_token)
+            try:
+                return self._store_cached(cache_key, self._to_intent(result))
+            except ValueError as e:
+                error = str(e)
             
-            # Get response from LLM
-            response = self.llm.invoke(messages)
+            # One repair attempt with the rejected output and the reason
+            with self._usage_lock:
+                self.usage_stats['repairs'] += 1
+            result, _ = self._invoke(self._build_repair_messages(question, output, error), cancel_token)
+            try:
+                return self._store_cached(cache_key, self._to_intent(result))
+            except ValueError:
+                pass
             
-            # Parse the JSON response
-            result = json.loads(response.content)
-            
-            # Create QueryIntent object
-            intent = QueryIntent(
-                intent_type=result.get('intent_type', 'general'),
-                filters=result.get('filters', {}),
-                confidence=result.get('confidence', 0.8)
-            )
-            
-            return intent
-            
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, return a general intent
-            return QueryIntent(
-                intent_type='general',
-                filters={},
-                confidence=0.3
-            )
+            # Still invalid: parse locally, or ask for a rephrase. An
+            # unfiltered general intent would list every student in scope.
+            with self._usage_lock:
+                self.usage_stats['fallbacks'] += 1
+            if self.fallback_parser is not None:
+                return self._parse_locally(question, 'invalid_output')
+            raise ValueError("the model's answer was still invalid after a repair; please rephrase the question")
+        
+        except LLMCallShed as e:
+            if e.reason == 'cancelled':
+                raise
+            if self.fallback_parser is None:
+                raise Exception(f"Error parsing query: {str(e)}")
+            return self._parse_locally(question, e.reason)
+        
         except Exception as e:
+            if self.fallback_parser is not None:
+                return self._parse_locally(question, 'error')
             # For any other error, re-raise with context
             raise Exception(f"Error parsing query: {str(e)}")
+    
+    def _parse_locally(self, question: str, reason: str) -> QueryIntent:
+        """
+        Parse a question with the fallback parser when the model's answer can't be used.
+        
+        Args:
+            question: The natural language question
+            reason: Why the model wasn't used
+        
+        Returns:
+            QueryIntent: Locally parsed intent (not cached)
+        """
+        with self._usage_lock:
+            self.usage_stats['local_parses'] += 1
+        self._local.last_source = 'local'
+        self._local.last_shed_reason = reason
+        return self.fallback_parser.parse_query(question)
+    
+    @staticmethod
+    def _cache_key(question: str) -> str:
+        """Normalize a question for parse cache lookups."""
+        return re.sub(r"\s+", " ", question).strip().casefold()
+    
+    def _get_cached(self, key: str) -> Optional[QueryIntent]:
+        """
+        Look up a parsed question, returning a copy the caller may modify.
+        
+        Args:
+            key: Normalized question
+        
+        Returns:
+            QueryIntent: Cached intent, or None on a miss
+        """
+        if self.cache_size <= 0:
+            return None
+        
+        with self._usage_lock:
+            intent = self._parse_cache.get(key)
+            if intent is None:
+                self.cache_stats['misses'] += 1
+                return None
+            self._parse_cache.move_to_end(key)
+            self.cache_stats['hits'] += 1
+        
+        return replace(intent, filters=dict(intent.filters))
+    
+    def _store_cached(self, key: str, intent: QueryIntent) -> QueryIntent:
+        """
+        Remember a parsed question.
+        
+        Args:
+            key: Normalized question
+            intent: Parsed intent
+        
+        Returns:
+            QueryIntent: The intent passed in
+        """
+        if self.cache_size > 0:
+            with self._usage_lock:
+                self._parse_cache[key] = replace(intent, filters=dict(intent.filters))
+                while len(self._parse_cache) > self.cache_size:
+                    self._parse_cache.popitem(last=False)
+        return intent
+    
+    def get_cache_stats(self) -> Dict[str, float]:
+        """
+        Get parse cache hits, misses, hit rate and size.
+        
+        Returns:
+            Dict[str, float]: Cache statistics
+        """
+        with self._usage_lock:
+            stats = dict(self.cache_stats)
+            stats['size'] = len(self._parse_cache)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    def get_cached_objects(self) -> Dict[str, Any]:
+        """
+        Get the parse cache entries, for memory accounting.
+        
+        Returns:
+            Dict[str, Any]: Normalized questions and their cached intents
+        """
+        with self._usage_lock:
+            return {'parse_cache': list(self._parse_cache.items())}
+    
+    def get_usage_stats(self) -> Dict[str, int]:
+        """
+        Get cumulative LLM usage for this parser.
+        
+        Returns:
+            Dict[str, int]: Calls, input/output tokens, repairs, fallbacks
+            and questions parsed locally
+        """
+        with self._usage_lock:
+            return dict(self.usage_stats)
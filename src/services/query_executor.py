@@ -1,13 +1,21 @@
 """
 Query Executor - Executes parsed queries and returns results
 """
+import json
+import threading
+from datetime import date
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
 from src.models.query_intent import QueryIntent
 from src.models.admin_role import AdminRole
 from src.services.data_repository import DataRepository
 from src.services.scope_filter import ScopeFilter
+from src.services.query_planner import QueryPlanner
+from src.services.homework_analytics import HomeworkCounters
+from src.services.name_index import NameIndex
+from src.services.score_series import ScoreSeries
 
 
 class QueryExecutor:
@@ -15,215 +23,206 @@ class QueryExecutor:
     Executes queries based on parsed intent and applies access control.
     """
     
-    def __init__(self, data_repository: DataRepository):
+    def __init__(self, data_repository: DataRepository, cache_size: int = 128):
         """
         Initialize the query executor.
         
         Args:
             data_repository: Data repository instance for data access
+            cache_size: Number of query results to keep (0 disables caching)
         """
         self.data_repository = data_repository
         self.scope_filter = ScopeFilter()
+        self.planner = QueryPlanner()
+        
+        self.cache_size = cache_size
+        self._result_cache: "OrderedDict[Hashable, pd.DataFrame]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self._local = threading.local()
+        
+        self._counters: Optional[HomeworkCounters] = None
+        self._counters_version: Optional[int] = None
+        self._counters_lock = threading.Lock()
+        
+        self._series: Optional[ScoreSeries] = None
+        self._series_version: Optional[int] = None
+        self._series_lock = threading.Lock()
     
-    def execute(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
+    @property
+    def last_cache_hit(self) -> bool:
+        """Whether the last query executed by the current thread came from the cache."""
+        return getattr(self._local, 'last_cache_hit', False)
+    
+    def execute(self, intent: QueryIntent, admin: AdminRole, use_cache: bool = True) -> pd.DataFrame:
         """
         Execute a query based on intent and admin scope.
         
         Args:
             intent: Parsed query intent
             admin: Admin role for access control
-            
+            use_cache: Answer from and store in the result cache; turn off
+                to measure the query itself (e.g., when profiling)
+        
         Returns:
             pd.DataFrame: Query results filtered by admin scope
         """
-        # Route to appropriate handler based on intent type
-        if intent.intent_type == 'homework_status':
-            return self._execute_homework_query(intent, admin)
-        elif intent.intent_type == 'performance':
-            return self._execute_performance_query(intent, admin)
-        elif intent.intent_type == 'upcoming_quizzes':
-            return self._execute_quiz_query(intent, admin)
+        key = self._cache_key(intent, admin) if use_cache else None
+        self._local.last_cache_hit = False
+        if key is not None:
+            with self._cache_lock:
+                cached = self._result_cache.get(key)
+                if cached is not None:
+                    self._result_cache.move_to_end(key)
+                    self.cache_stats['hits'] += 1
+                    self._local.last_cache_hit = True
+                    return cached
+                self.cache_stats['misses'] += 1
+        
+        if intent.intent_type == 'homework_analytics':
+            # Answered from per-group counters instead of scanning rows
+            if intent.filters.get('student_name'):
+                counters = self.student_homework_counters(intent.filters['student_name'])
+            else:
+                counters = self.homework_counters()
+            result = counters.query(intent, admin)
+        elif intent.intent_type == 'performance_trend':
+            # Answered from per-student score series
+            result = self.score_series().trend(intent, admin)
         else:
-            return self._execute_general_query(intent, admin)
-    
-    def _execute_homework_query(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
-        """Execute homework status query."""
-        # Get homework data
-        homework_df = self.data_repository.get_homework()
-        
-        # Apply scope filter
-        homework_df = self.scope_filter.apply_scope(homework_df, admin)
-        
-        if homework_df.empty:
-            return pd.DataFrame()
-        
-        # Apply status filter if specified
-        if 'status' in intent.filters:
-            status = intent.filters['status']
-            homework_df = homework_df[homework_df['submission_status'] == status]
-        
-        # Get student information
-        students_df = self.data_repository.get_students()
-        students_df = self.scope_filter.apply_scope(students_df, admin)
-        
-        # Merge with student names
-        result = homework_df.merge(
-            students_df[['student_id', 'name']],
-            on='student_id',
-            how='left'
-        )
+            # Each intent type compiles to a plan template; the planner orders
+            # predicates, prunes columns and runs the plan
+            plan = self.planner.build(intent)
+            result = self.planner.run(plan, self.data_repository.scoped(admin), admin)
         
-        # Select and rename columns for display
-        result = result[[
-            'name', 'class', 'assignment_name', 
-            'submission_status', 'due_date', 'submission_date'
-        ]]
-        result.columns = [
-            'Student Name', 'Class', 'Assignment', 
-            'Status', 'Due Date', 'Submission Date'
-        ]
+        if key is not None:
+            with self._cache_lock:
+                self._result_cache[key] = result
+                while len(self._result_cache) > self.cache_size:
+                    self._result_cache.popitem(last=False)
         
         return result
     
-    def _execute_performance_query(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
-        """Execute performance/grades query."""
-        # Get performance data
-        performance_df = self.data_repository.get_performance()
-        
-        # Apply scope filter
-        performance_df = self.scope_filter.apply_scope(performance_df, admin)
-        
-        if performance_df.empty:
-            return pd.DataFrame()
-        
-        # Apply date range filter if specified
-        if 'date_range' in intent.filters:
-            performance_df = self._apply_date_filter(
-                performance_df, 
-                intent.filters['date_range'],
-                'date'
-            )
-        
-        # Get student and quiz information
-        students_df = self.data_repository.get_students()
-        students_df = self.scope_filter.apply_scope(students_df, admin)
-        
-        quizzes_df = self.data_repository.get_quizzes()
-        quizzes_df = self.scope_filter.apply_scope(quizzes_df, admin)
-        
-        # Merge data
-        result = performance_df.merge(
-            students_df[['student_id', 'name']],
-            on='student_id',
-            how='left'
-        )
-        result = result.merge(
-            quizzes_df[['quiz_id', 'quiz_name']],
-            on='quiz_id',
-            how='left'
-        )
-        
-        # Calculate percentage
-        result['percentage'] = (result['score'] / result['max_score'] * 100).round(2)
+    def homework_counters(self) -> HomeworkCounters:
+        """
+        Get the homework completion counters for the current data.
         
-        # Select and rename columns
-        result = result[[
-            'name', 'class', 'quiz_name', 
-            'score', 'max_score', 'percentage', 'date'
-        ]]
-        result.columns = [
-            'Student Name', 'Class', 'Quiz', 
-            'Score', 'Max Score', 'Percentage', 'Date'
-        ]
+        Counters are built on first use and rebuilt after a reload.
         
-        return result
+        Returns:
+            HomeworkCounters: Counters for the current data version
+        """
+        version = self.data_repository.get_data_version()
+        with self._counters_lock:
+            if self._counters is None or self._counters_version != version:
+                self._counters = HomeworkCounters(
+                    self.data_repository.get_table('homework'),
+                    self.data_repository.get_table('students')
+                )
+                self._counters_version = version
+            return self._counters
     
-    def _execute_quiz_query(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
-        """Execute upcoming quizzes query."""
-        # Get quiz data
-        quizzes_df = self.data_repository.get_quizzes()
-        
-        # Apply scope filter
-        quizzes_df = self.scope_filter.apply_scope(quizzes_df, admin)
-        
-        if quizzes_df.empty:
-            return pd.DataFrame()
-        
-        # Filter for upcoming quizzes (future dates)
-        today = pd.Timestamp.now().normalize()
-        
-        if 'date_range' in intent.filters:
-            date_range = intent.filters['date_range'].lower()
-            if 'next week' in date_range or 'upcoming' in date_range:
-                next_week = today + timedelta(days=7)
-                quizzes_df = quizzes_df[
-                    (quizzes_df['scheduled_date'] >= today) &
-                    (quizzes_df['scheduled_date'] <= next_week)
-                ]
-            else:
-                # Default to all future quizzes
-                quizzes_df = quizzes_df[quizzes_df['scheduled_date'] >= today]
-        else:
-            # Default to all future quizzes
-            quizzes_df = quizzes_df[quizzes_df['scheduled_date'] >= today]
+    def student_homework_counters(self, names: Any) -> HomeworkCounters:
+        """
+        Count only the homework rows of named students.
         
-        # Select and rename columns
-        result = quizzes_df[[
-            'quiz_name', 'scheduled_date', 'grade', 'class'
-        ]].copy()
-        result.columns = [
-            'Quiz Name', 'Scheduled Date', 'Grade', 'Class'
-        ]
+        The shared counters are kept per assignment and class, not per
+        student, so a student_name filter is answered by counting that
+        student's rows instead.
         
-        # Sort by date
-        result = result.sort_values('Scheduled Date')
+        Args:
+            names: A student name or list of names (full or partial)
         
-        return result
+        Returns:
+            HomeworkCounters: Counters over the matching students' rows
+        """
+        students = self.data_repository.get_table('students')
+        names = names if isinstance(names, list) else [names]
+        name_index = NameIndex.for_frame(students)
+        student_ids = np.unique(np.concatenate([name_index.lookup(name) for name in names]))
+        homework = self.data_repository.get_homework({'student_id': student_ids.tolist()})
+        return HomeworkCounters(homework, students)
     
-    def _execute_general_query(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
-        """Execute general query - return students in scope."""
-        students_df = self.data_repository.get_students()
-        students_df = self.scope_filter.apply_scope(students_df, admin)
-        
-        if students_df.empty:
-            return pd.DataFrame()
+    def score_series(self) -> ScoreSeries:
+        """
+        Get the per-student score series for the current data.
         
-        # Select and rename columns
-        result = students_df[['name', 'grade', 'class', 'region']].copy()
-        result.columns = ['Student Name', 'Grade', 'Class', 'Region']
+        The series are built on the first trend question and rebuilt
+        after a reload.
         
-        return result
+        Returns:
+            ScoreSeries: Series for the current data version
+        """
+        version = self.data_repository.get_data_version()
+        with self._series_lock:
+            if self._series is None or self._series_version != version:
+                self._series = ScoreSeries(
+                    self.data_repository.get_table('performance'),
+                    self.data_repository.get_table('students')
+                )
+                self._series_version = version
+            return self._series
     
-    def _apply_date_filter(
-        self, 
-        df: pd.DataFrame, 
-        date_range: str, 
-        date_column: str
-    ) -> pd.DataFrame:
+    def _cache_key(self, intent: QueryIntent, admin: AdminRole) -> Optional[Hashable]:
         """
-        Apply date range filter to DataFrame.
+        Build the result cache key for a query.
+        
+        Results are shared between callers, who must not modify them.
         
         Args:
-            df: DataFrame to filter
-            date_range: Date range string (e.g., "last week", "this month")
-            date_column: Name of the date column to filter on
-            
+            intent: Parsed query intent
+            admin: Admin role for access control
+        
+        Returns:
+            Hashable: Cache key, or None when caching is disabled
+        """
+        if self.cache_size <= 0:
+            return None
+        
+        # Relative date ranges resolve against today's date
+        return (
+            date.today(),
+            self.data_repository.get_data_version(),
+            admin.admin_id,
+            admin.scope,
+            intent.intent_type,
+            json.dumps(intent.filters, sort_keys=True, default=str),
+            intent.order_by,
+            intent.ascending,
+            intent.limit
+        )
+    
+    def get_cached_objects(self) -> Dict[str, Any]:
+        """
+        Get the derived data this executor keeps, for memory accounting.
+        
         Returns:
-            pd.DataFrame: Filtered DataFrame
-        """
-        today = pd.Timestamp.now().normalize()
-        date_range_lower = date_range.lower()
-        
-        if 'last week' in date_range_lower:
-            start_date = today - timedelta(days=7)
-            end_date = today
-            df = df[(df[date_column] >= start_date) & (df[date_column] <= end_date)]
-        elif 'this week' in date_range_lower:
-            start_date = today - timedelta(days=today.weekday())
-            end_date = start_date + timedelta(days=6)
-            df = df[(df[date_column] >= start_date) & (df[date_column] <= end_date)]
-        elif 'last month' in date_range_lower:
-            start_date = today - timedelta(days=30)
-            df = df[df[date_column] >= start_date]
-        
-        return df
+            Dict[str, Any]: Cached result frames, homework counters and
+            score series (None where not built)
+        """
+        with self._cache_lock:
+            results = list(self._result_cache.values())
+        return {
+            'result_cache': results,
+            'homework_counters': self._counters,
+            'score_series': self._series
+        }
+    
+    def clear_cache(self) -> None:
+        """Drop all cached query results."""
+        with self._cache_lock:
+            self._result_cache.clear()
+    
+    def get_cache_stats(self) -> Dict[str, float]:
+        """
+        Get result cache hits, misses, hit rate and size.
+        
+        Returns:
+            Dict[str, float]: Cache statistics
+        """
+        with self._cache_lock:
+            stats = dict(self.cache_stats)
+            stats['size'] = len(self._result_cache)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,112 @@
+"""
+Query Log - Records and reads the questions admins ask and what they cost
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from src.models.query_intent import QueryIntent
+
+
+class QueryLog:
+    """
+    Append-only JSON-lines log of processed queries.
+    
+    Each line records one question: when it was asked, by which admin
+    (and school), the parsed intent, time spent in each stage, rows
+    returned and whether the parse and result caches were hit. Lines are written whole and
+    flushed, so a crash loses at most the line being written.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize the query log.
+        
+        Args:
+            path: Log file to append to (created on first write)
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+    
+    def record(
+        self,
+        question: str,
+        admin_id: str,
+        intent: Optional[QueryIntent],
+        timings: Dict[str, float],
+        rows: Optional[int],
+        cache: Dict[str, bool],
+        error: Optional[str] = None,
+        tenant_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Append one processed query to the log.
+        
+        Args:
+            question: The natural language question
+            admin_id: Admin who asked it
+            intent: Parsed intent (None if parsing failed)
+            timings: Seconds spent per stage (e.g., parse, execute, total)
+            rows: Rows returned (None if the query failed)
+            cache: Cache outcome per cache (True for a hit)
+            error: Error message if the query failed
+        
+        Returns:
+            Dict[str, Any]: The logged entry
+        """
+        entry = {
+            'ts': round(time.time(), 3),
+            'question': question,
+            'admin_id': admin_id,
+            'intent': intent.to_dict() if intent is not None else None,
+            'timings_ms': {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()},
+            'rows': rows,
+            'cache': cache
+        }
+        if error is not None:
+            entry['error'] = error
+        if tenant_id is not None:
+            entry['tenant_id'] = tenant_id
+        
+        line = json.dumps(entry, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        
+        return entry
+
+
+def read_query_log(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Read a JSON-lines query log.
+    
+    Lines that are blank or not valid JSON objects (for example a line cut
+    short by a crash while it was being written) are skipped.
+    
+    Args:
+        path: Path to the log file
+    
+    Returns:
+        List[Dict[str, Any]]: Logged entries in file order, empty if the
+        file doesn't exist
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+    
+    return entries
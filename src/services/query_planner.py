@@ -0,0 +1,842 @@
+"""
+Query Planner - Compiles query intents into optimized logical plans
+"""
+import re
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.models.query_intent import QueryIntent
+from src.models.admin_role import AdminRole
+from src.services.data_repository import DataRepository
+from src.services.name_index import NameIndex
+from src.services.scope_filter import ScopeFilter, ScopeIndex
+
+
+# Parsed filters that narrow rows by student attributes. They apply to every
+# table that has the column, or that links to students through student_id.
+ENTITY_FILTERS = ('grade', 'class', 'region', 'student_name')
+
+
+@dataclass
+class Predicate:
+    """
+    A row filter on a single column of the scanned table.
+    
+    Attributes:
+        column: Column to test
+        op: Comparison operator (eq, in, ge, le, between, contains)
+        value: Operand; a (low, high) tuple for between, a list for in,
+            a list of case-insensitive substrings for contains
+    """
+    column: str
+    op: str
+    value: Any
+    
+    def evaluate(self, values: pd.Series) -> np.ndarray:
+        """
+        Evaluate the predicate against column values.
+        
+        Args:
+            values: Column values to test
+        
+        Returns:
+            np.ndarray: Boolean mask, True where the predicate holds
+        """
+        if self.op == 'eq':
+            result = values == self.value
+        elif self.op == 'in':
+            result = values.isin(self.value)
+        elif self.op == 'ge':
+            result = values >= self.value
+        elif self.op == 'le':
+            result = values <= self.value
+        elif self.op == 'between':
+            low, high = self.value
+            result = (values >= low) & (values <= high)
+        elif self.op == 'contains':
+            pattern = "|".join(re.escape(str(text).strip()) for text in self.value)
+            result = values.str.contains(pattern, case=False, regex=True)
+        else:
+            raise ValueError(f"Unsupported predicate operator: {self.op}")
+        
+        return result.to_numpy(dtype=bool, na_value=False)
+
+
+@dataclass
+class Join:
+    """
+    A left join that pulls columns from another table.
+    
+    Attributes:
+        table: Table to join
+        on: Join key present in both tables
+        columns: Columns to pull from the joined table
+        scoped: Whether the joined table is restricted to the admin's scope
+    """
+    table: str
+    on: str
+    columns: List[str]
+    scoped: bool = True
+
+
+@dataclass
+class Derived:
+    """
+    A column computed from other columns after joins.
+    
+    Attributes:
+        name: Name of the new column
+        inputs: Columns the computation reads
+        compute: Function producing the column values from the frame
+    """
+    name: str
+    inputs: List[str]
+    compute: Callable[[pd.DataFrame], Any]
+
+
+@dataclass
+class QueryPlan:
+    """
+    Logical plan: scan -> predicates -> join -> derive -> sort -> project.
+    
+    Attributes:
+        table: Table to scan
+        projection: (source column, output label) pairs in output order
+        predicates: Row filters on the scanned table
+        filters: Entity filters (grade, class, region, student_name) resolved
+            to predicates against the data when the plan runs
+        joins: Left joins applied after filtering
+        derived: Columns computed after joins
+        sort_by: Column to sort by before projection, if any
+        ascending: Sort direction
+        limit: Maximum number of rows to return, if any
+    """
+    table: str
+    projection: List[Tuple[str, str]]
+    predicates: List[Predicate] = field(default_factory=list)
+    filters: Dict[str, Any] = field(default_factory=dict)
+    joins: List[Join] = field(default_factory=list)
+    derived: List[Derived] = field(default_factory=list)
+    sort_by: Optional[str] = None
+    ascending: bool = True
+    limit: Optional[int] = None
+    
+    @property
+    def output_columns(self) -> List[str]:
+        """Output labels in order."""
+        return [label for _, label in self.projection]
+
+
+def date_range_predicate(column: str, date_range: str) -> Optional[Predicate]:
+    """
+    Build a predicate for a relative date range phrase.
+    
+    Args:
+        column: Date column to filter on
+        date_range: Date range string (e.g., "last week", "this month")
+    
+    Returns:
+        Predicate: Predicate for the range, or None if the phrase isn't recognized
+    """
+    today = pd.Timestamp.now().normalize()
+    date_range_lower = date_range.lower()
+    
+    if 'last week' in date_range_lower:
+        return Predicate(column, 'between', (today - timedelta(days=7), today))
+    elif 'this week' in date_range_lower:
+        start_date = today - timedelta(days=today.weekday())
+        return Predicate(column, 'between', (start_date, start_date + timedelta(days=6)))
+    elif 'last month' in date_range_lower:
+        return Predicate(column, 'ge', today - timedelta(days=30))
+    
+    return None
+
+
+def entity_filters(intent: QueryIntent) -> Dict[str, Any]:
+    """
+    Pick the entity filters out of an intent's filters.
+    
+    Args:
+        intent: Parsed query intent
+    
+    Returns:
+        Dict[str, Any]: Non-empty grade, class, region and student_name filters
+    """
+    return {
+        key: value for key, value in intent.filters.items()
+        if key in ENTITY_FILTERS and value not in (None, '', [])
+    }
+
+
+def normalize_filter_values(column: str, value: Any) -> List[Any]:
+    """
+    Convert parsed filter values to the types and spelling used in the data.
+    
+    Values that can't be converted are dropped, so a filter with no
+    usable values matches nothing.
+    
+    Args:
+        column: Filter column (grade, class, region or status)
+        value: A parsed value or list of values
+    
+    Returns:
+        List[Any]: Normalized values
+    """
+    values = value if isinstance(value, list) else [value]
+    normalized = []
+    
+    for item in values:
+        text = str(item).strip()
+        if column == 'grade':
+            digits = re.search(r"\d+", text)
+            if digits:
+                normalized.append(int(digits.group()))
+        elif column == 'class':
+            # "Class 8A" names the class 8A
+            normalized.append(re.sub(r"^class(?=[\s\d])\s*", "", text, flags=re.IGNORECASE).upper())
+        elif column == 'region':
+            normalized.append(text.title())
+        elif column == 'status':
+            normalized.append(re.sub(r"[\s-]+", "_", text.lower()))
+        else:
+            normalized.append(item)
+    
+    return normalized
+
+
+def apply_ordering(plan: QueryPlan, intent: QueryIntent, order_columns: Dict[str, str]) -> QueryPlan:
+    """
+    Set a plan's ranking from the intent's order_by and limit.
+    
+    Args:
+        plan: Plan to update
+        intent: Parsed query intent
+        order_columns: Accepted order_by names mapped to plan columns
+    
+    Returns:
+        QueryPlan: The updated plan
+    """
+    if intent.order_by:
+        key = re.sub(r"[\s-]+", "_", str(intent.order_by).strip().lower())
+        if key in order_columns:
+            plan.sort_by = order_columns[key]
+            plan.ascending = bool(intent.ascending)
+    
+    if intent.limit is not None:
+        try:
+            limit = int(intent.limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit > 0:
+            plan.limit = limit
+    
+    return plan
+
+
+def assignment_predicate(value: Any) -> Predicate:
+    """
+    Build the predicate for an assignment filter.
+    
+    Assignments match by case-insensitive substring, so "math chapter 5"
+    finds "Math Chapter 5".
+    
+    Args:
+        value: An assignment name or list of names
+    
+    Returns:
+        Predicate: Predicate on assignment_name
+    """
+    names = value if isinstance(value, list) else [value]
+    return Predicate('assignment_name', 'contains', names)
+
+
+def _homework_plan(intent: QueryIntent) -> QueryPlan:
+    """Plan template for homework status queries."""
+    plan = QueryPlan(
+        table='homework',
+        filters=entity_filters(intent),
+        joins=[Join('students', 'student_id', ['name'])],
+        projection=[
+            ('name', 'Student Name'),
+            ('class', 'Class'),
+            ('assignment_name', 'Assignment'),
+            ('submission_status', 'Status'),
+            ('due_date', 'Due Date'),
+            ('submission_date', 'Submission Date')
+        ]
+    )
+    
+    if intent.filters.get('status'):
+        statuses = normalize_filter_values('status', intent.filters['status'])
+        plan.predicates.append(Predicate('submission_status', 'in', statuses))
+    
+    if intent.filters.get('assignment'):
+        plan.predicates.append(assignment_predicate(intent.filters['assignment']))
+    
+    return apply_ordering(plan, intent, {
+        'due_date': 'due_date',
+        'submission_date': 'submission_date',
+        'date': 'submission_date',
+        'assignment': 'assignment_name',
+        'name': 'name',
+        'student_name': 'name'
+    })
+
+
+def score_percentage(df: pd.DataFrame) -> np.ndarray:
+    """
+    Compute score / max_score as a percentage rounded to 2 decimals.
+    
+    Works in place on a single float buffer instead of allocating a
+    Series per arithmetic step.
+    
+    Args:
+        df: Frame with score and max_score columns
+    
+    Returns:
+        np.ndarray: Percentages (NaN where either input is missing)
+    """
+    percentage = df['score'].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(percentage, df['max_score'].to_numpy(dtype=np.float64, na_value=np.nan), out=percentage)
+    np.multiply(percentage, 100, out=percentage)
+    return np.round(percentage, 2, out=percentage)
+
+
+def _performance_plan(intent: QueryIntent) -> QueryPlan:
+    """Plan template for performance/grades queries."""
+    plan = QueryPlan(
+        table='performance',
+        filters=entity_filters(intent),
+        joins=[
+            Join('students', 'student_id', ['name']),
+            Join('quizzes', 'quiz_id', ['quiz_name'])
+        ],
+        derived=[
+            Derived(
+                'percentage',
+                ['score', 'max_score'],
+                score_percentage
+            )
+        ],
+        projection=[
+            ('name', 'Student Name'),
+            ('class', 'Class'),
+            ('quiz_name', 'Quiz'),
+            ('score', 'Score'),
+            ('max_score', 'Max Score'),
+            ('percentage', 'Percentage'),
+            ('date', 'Date')
+        ]
+    )
+    
+    if 'date_range' in intent.filters:
+        predicate = date_range_predicate('date', intent.filters['date_range'])
+        if predicate is not None:
+            plan.predicates.append(predicate)
+    
+    return apply_ordering(plan, intent, {
+        'score': 'score',
+        'quiz_score': 'score',
+        'percentage': 'percentage',
+        'date': 'date',
+        'name': 'name',
+        'student_name': 'name'
+    })
+
+
+def _quiz_plan(intent: QueryIntent) -> QueryPlan:
+    """Plan template for upcoming quiz queries."""
+    plan = QueryPlan(
+        table='quizzes',
+        filters=entity_filters(intent),
+        projection=[
+            ('quiz_name', 'Quiz Name'),
+            ('scheduled_date', 'Scheduled Date'),
+            ('grade', 'Grade'),
+            ('class', 'Class')
+        ],
+        sort_by='scheduled_date'
+    )
+    
+    # Upcoming quizzes only; "next week" narrows to the next seven days
+    today = pd.Timestamp.now().normalize()
+    date_range = str(intent.filters.get('date_range', '')).lower()
+    if 'next week' in date_range or 'upcoming' in date_range:
+        plan.predicates.append(
+            Predicate('scheduled_date', 'between', (today, today + timedelta(days=7)))
+        )
+    else:
+        plan.predicates.append(Predicate('scheduled_date', 'ge', today))
+    
+    return apply_ordering(plan, intent, {
+        'date': 'scheduled_date',
+        'scheduled_date': 'scheduled_date',
+        'name': 'quiz_name',
+        'quiz_name': 'quiz_name'
+    })
+
+
+def _general_plan(intent: QueryIntent) -> QueryPlan:
+    """Plan template for general queries - students in scope."""
+    plan = QueryPlan(
+        table='students',
+        filters=entity_filters(intent),
+        projection=[
+            ('name', 'Student Name'),
+            ('grade', 'Grade'),
+            ('class', 'Class'),
+            ('region', 'Region')
+        ]
+    )
+    
+    return apply_ordering(plan, intent, {
+        'name': 'name',
+        'student_name': 'name',
+        'grade': 'grade',
+        'class': 'class'
+    })
+
+
+class QueryPlanner:
+    """
+    Builds plans from query intents, optimizes them and runs them.
+    
+    Each intent type maps to a plan template; intents without a template
+    use the general plan.
+    """
+    
+    # Rows sampled to estimate predicate selectivity
+    SELECTIVITY_SAMPLE = 1024
+    
+    def __init__(self):
+        """Initialize the planner with the built-in plan templates."""
+        self.templates: Dict[str, Callable[[QueryIntent], QueryPlan]] = {
+            'homework_status': _homework_plan,
+            'performance': _performance_plan,
+            'upcoming_quizzes': _quiz_plan,
+            'general': _general_plan
+        }
+    
+    def register_template(self, intent_type: str, builder: Callable[[QueryIntent], QueryPlan]) -> None:
+        """
+        Register a plan template for an intent type.
+        
+        Args:
+            intent_type: Intent type the template handles
+            builder: Function building a QueryPlan from a QueryIntent
+        """
+        self.templates[intent_type] = builder
+    
+    def build(self, intent: QueryIntent) -> QueryPlan:
+        """
+        Build the logical plan for an intent.
+        
+        Args:
+            intent: Parsed query intent
+        
+        Returns:
+            QueryPlan: Unoptimized plan
+        """
+        builder = self.templates.get(intent.intent_type, _general_plan)
+        return builder(intent)
+    
+    def run(self, plan: QueryPlan, repository: DataRepository, admin: AdminRole) -> pd.DataFrame:
+        """
+        Execute a plan for an admin.
+        
+        Args:
+            plan: Plan to execute
+            repository: Repository to read tables from
+            admin: Admin role for access control
+        
+        Returns:
+            pd.DataFrame: Query results filtered by admin scope
+        """
+        # Partitioned repositories filter where their data lives
+        selected = repository.select_rows(plan, admin, self)
+        if selected is None:
+            return pd.DataFrame()
+        base, positions = selected
+        if len(positions) == 0:
+            return pd.DataFrame(columns=plan.output_columns)
+        
+        positions, ranked = self._rank(plan, base, positions)
+        
+        # Only carry the columns later steps read into the joins
+        needed = self._needed_columns(plan, base)
+        frame = base.iloc[positions, [base.columns.get_loc(c) for c in needed]]
+        
+        for join in plan.joins:
+            frame = self._join(frame, join, repository, admin)
+        
+        for derived in plan.derived:
+            frame[derived.name] = derived.compute(frame)
+        
+        if plan.sort_by is not None and not ranked:
+            frame = frame.sort_values(
+                plan.sort_by, ascending=plan.ascending, kind='stable', na_position='last'
+            )
+        
+        result = frame[[source for source, _ in plan.projection]]
+        result.columns = plan.output_columns
+        
+        if plan.limit is not None:
+            result = result.head(plan.limit)
+        
+        return result
+    
+    def select(
+        self,
+        plan: QueryPlan,
+        repository: DataRepository,
+        admin: AdminRole
+    ) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Apply a plan's scope and row filters to the scanned table.
+        
+        Args:
+            plan: Plan to execute
+            repository: Repository to read tables from
+            admin: Admin role for access control
+        
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: The scanned table and the
+            positions of matching rows in table order, or None if the table
+            is empty or none of its rows are in the admin's scope
+        """
+        base = repository.get_table(plan.table)
+        if base.empty:
+            return None
+        
+        # Scope first: it is evaluated from a cached index in one pass.
+        # Scope columns the table lacks are checked against each row's student.
+        students = repository.get_table('students') if plan.table != 'students' else None
+        positions = np.flatnonzero(ScopeFilter.scope_mask(base, admin, students))
+        if len(positions) == 0:
+            return None
+        
+        predicates = plan.predicates + self._filter_predicates(plan, base, repository)
+        
+        # Most selective predicate first, each on the surviving rows only
+        for predicate in self._order_predicates(predicates, base, positions):
+            positions = positions[self._evaluate(predicate, base, positions)]
+            if len(positions) == 0:
+                break
+        
+        return base, positions
+    
+    def select_partition(
+        self,
+        plan: QueryPlan,
+        repository: DataRepository,
+        admin: AdminRole
+    ) -> Optional[pd.DataFrame]:
+        """
+        Select a plan's rows from one partition of the data.
+        
+        Rows keep the table index and table order, so partitions can be
+        merged back in table order, and carry only the columns later steps
+        read. When the plan ranks on the scanned table, only the
+        partition's top rows are kept: the overall top rows are among them.
+        
+        Args:
+            plan: Plan to execute
+            repository: Repository over the partition's tables
+            admin: Admin role for access control
+        
+        Returns:
+            pd.DataFrame: Selected rows, or None if none of the partition's
+            rows are in the admin's scope
+        """
+        selected = self.select(plan, repository, admin)
+        if selected is None:
+            return None
+        base, positions = selected
+        if len(positions):
+            positions = np.sort(self._rank(plan, base, positions)[0])
+        
+        needed = self._needed_columns(plan, base)
+        return base.iloc[positions, [base.columns.get_loc(c) for c in needed]]
+    
+    def _rank(self, plan: QueryPlan, base: pd.DataFrame, positions: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """
+        Rank and cut rows on the scanned table when the sort key is available there.
+        
+        Joins and projection then only see the selected rows.
+        
+        Args:
+            plan: Plan being executed
+            base: Scanned table
+            positions: Matching row positions in table order
+        
+        Returns:
+            Tuple[np.ndarray, bool]: Row positions in output order, and
+            whether they were ranked
+        """
+        if plan.sort_by is not None or plan.limit is not None:
+            sort_values = self._base_sort_values(plan, base, positions)
+            if plan.sort_by is None or sort_values is not None:
+                return self._select(positions, sort_values, plan.ascending, plan.limit), True
+        return positions, False
+    
+    def _base_sort_values(
+        self,
+        plan: QueryPlan,
+        base: pd.DataFrame,
+        positions: np.ndarray
+    ) -> Optional[pd.Series]:
+        """
+        Sort key values for the given rows, if computable from the scanned table.
+        
+        Args:
+            plan: Plan being executed
+            base: Scanned table
+            positions: Candidate row positions
+        
+        Returns:
+            pd.Series: Key values aligned with positions, or None
+        """
+        if plan.sort_by is None:
+            return None
+        if plan.sort_by in base.columns:
+            return base[plan.sort_by].iloc[positions]
+        
+        for derived in plan.derived:
+            if derived.name == plan.sort_by and all(c in base.columns for c in derived.inputs):
+                inputs = base.iloc[positions, [base.columns.get_loc(c) for c in derived.inputs]]
+                return pd.Series(derived.compute(inputs), index=inputs.index)
+        
+        return None
+    
+    def _select(
+        self,
+        positions: np.ndarray,
+        sort_values: Optional[pd.Series],
+        ascending: bool,
+        limit: Optional[int]
+    ) -> np.ndarray:
+        """
+        Order rows by a key and keep the first limit of them.
+        
+        Numeric and date keys with a limit use partial selection
+        (np.partition finds the limit-th key), so only rows up to that key
+        are sorted. Ties keep table order, as with a stable sort, and
+        missing keys sort last.
+        
+        Args:
+            positions: Candidate row positions
+            sort_values: Key values aligned with positions, or None to keep table order
+            ascending: Sort direction
+            limit: Number of rows to keep, or None for all
+        
+        Returns:
+            np.ndarray: Selected row positions in output order
+        """
+        if sort_values is None:
+            return positions if limit is None else positions[:limit]
+        
+        keys = self._rank_keys(sort_values, ascending)
+        if keys is None:
+            order = sort_values.reset_index(drop=True).sort_values(
+                ascending=ascending, kind='stable', na_position='last'
+            ).index.to_numpy()
+            return positions[order if limit is None else order[:limit]]
+        
+        if limit is not None and limit < len(keys):
+            # Every row tied with the limit-th key is a candidate, so the
+            # tie-break below picks the same rows a stable sort would
+            kth = np.partition(keys, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(keys <= kth)
+        else:
+            candidates = np.arange(len(keys))
+        
+        order = candidates[np.lexsort((candidates, keys[candidates]))][:limit]
+        return positions[order]
+    
+    @staticmethod
+    def _rank_keys(values: pd.Series, ascending: bool) -> Optional[np.ndarray]:
+        """
+        Convert numeric or date values to float keys where smaller ranks first.
+        
+        Args:
+            values: Key values
+            ascending: Sort direction
+        
+        Returns:
+            np.ndarray: Float keys with missing values last, or None for other dtypes
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            keys = values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            keys = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            return None
+        
+        keys = keys.copy() if ascending else -keys
+        keys[values.isna().to_numpy()] = np.inf
+        return keys
+    
+    def _order_predicates(
+        self,
+        predicates: List[Predicate],
+        base: pd.DataFrame,
+        positions: np.ndarray
+    ) -> List[Predicate]:
+        """
+        Order predicates by estimated selectivity, most selective first.
+        
+        Selectivity is estimated on an evenly spaced sample of the rows
+        that survive the scope filter.
+        
+        Args:
+            predicates: Predicates to order
+            base: Scanned table
+            positions: Row positions surviving the scope filter
+        
+        Returns:
+            List[Predicate]: Predicates in evaluation order
+        """
+        if len(predicates) < 2:
+            return list(predicates)
+        
+        step = max(1, len(positions) // self.SELECTIVITY_SAMPLE)
+        sample = positions[::step]
+        
+        def selectivity(predicate: Predicate) -> float:
+            return self._evaluate(predicate, base, sample).mean()
+        
+        return sorted(predicates, key=selectivity)
+    
+    def _evaluate(self, predicate: Predicate, base: pd.DataFrame, positions: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a predicate on some rows, through the column index when possible.
+        
+        Args:
+            predicate: Predicate to evaluate
+            base: Scanned table
+            positions: Row positions to evaluate
+        
+        Returns:
+            np.ndarray: Boolean mask aligned with positions
+        """
+        if predicate.op in ('eq', 'in'):
+            index = ScopeIndex.for_frame(base)
+            if predicate.column in index.codes:
+                values = predicate.value if predicate.op == 'in' else [predicate.value]
+                return index.column_mask(predicate.column, values, positions)
+        
+        return predicate.evaluate(base[predicate.column].iloc[positions])
+    
+    def _filter_predicates(
+        self,
+        plan: QueryPlan,
+        base: pd.DataFrame,
+        repository: DataRepository
+    ) -> List[Predicate]:
+        """
+        Resolve a plan's entity filters to predicates on the scanned table.
+        
+        Filters on columns the table has become index lookups. Filters on
+        student attributes the table lacks, and student names, become a
+        student_id membership test resolved through the students table.
+        Filters that can't apply to the table are ignored.
+        
+        Args:
+            plan: Plan being executed
+            base: Scanned table
+            repository: Repository to read the students table from
+        
+        Returns:
+            List[Predicate]: Predicates for the filters
+        """
+        predicates = []
+        students = None
+        
+        for key, value in plan.filters.items():
+            if key != 'student_name' and key in base.columns:
+                predicates.append(Predicate(key, 'in', normalize_filter_values(key, value)))
+                continue
+            
+            if 'student_id' not in base.columns:
+                continue
+            if students is None:
+                students = repository.get_table('students')
+            
+            if key == 'student_name':
+                names = value if isinstance(value, list) else [value]
+                name_index = NameIndex.for_frame(students)
+                student_ids = np.unique(np.concatenate(
+                    [name_index.lookup(name) for name in names]
+                ))
+            elif key in students.columns:
+                matches = ScopeIndex.for_frame(students).column_mask(
+                    key, normalize_filter_values(key, value)
+                )
+                student_ids = students['student_id'].to_numpy()[matches]
+            else:
+                continue
+            
+            predicates.append(Predicate('student_id', 'in', student_ids))
+        
+        return predicates
+    
+    def _needed_columns(self, plan: QueryPlan, base: pd.DataFrame) -> List[str]:
+        """
+        Columns of the scanned table read by joins, derivations, sorting or projection.
+        
+        Args:
+            plan: Plan being executed
+            base: Scanned table
+        
+        Returns:
+            List[str]: Needed column names in table order
+        """
+        needed = {join.on for join in plan.joins}
+        needed.update(source for source, _ in plan.projection)
+        for derived in plan.derived:
+            needed.update(derived.inputs)
+        if plan.sort_by is not None:
+            needed.add(plan.sort_by)
+        
+        return [column for column in base.columns if column in needed]
+    
+    def _join(
+        self,
+        frame: pd.DataFrame,
+        join: Join,
+        repository: DataRepository,
+        admin: AdminRole
+    ) -> pd.DataFrame:
+        """
+        Left join pruned columns of another table onto the frame.
+        
+        Args:
+            frame: Current intermediate result
+            join: Join step
+            repository: Repository to read the joined table from
+            admin: Admin role for access control
+        
+        Returns:
+            pd.DataFrame: Frame with the joined columns added
+        """
+        right = repository.get_matching(join.table, join.on, frame[join.on])
+        
+        mask = None
+        if join.scoped and not right.empty:
+            mask = ScopeFilter.scope_mask(right, admin)
+        
+        # Skip the merge entirely when nothing on the right can match
+        if right.empty or (mask is not None and not mask.any()):
+            frame = frame.reset_index(drop=True)
+            for column in join.columns:
+                frame[column] = np.nan
+            return frame
+        
+        right = right[[join.on] + join.columns]
+        if mask is not None:
+            right = right[mask]
+        
+        return frame.merge(right, on=join.on, how='left')
@@ -0,0 +1,219 @@
+"""
+Query Refiner - Answers narrowing follow-ups from the previous result
+"""
+import re
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+from src.models.query_intent import QueryIntent
+from src.services.query_planner import normalize_filter_values
+
+
+# Follow-ups that narrow the previous question start with one of these
+REFINEMENT_CUES = re.compile(
+    r"^\s*(?:and\s+|but\s+|now\s+)?(?:only|just|filter(?:\s+(?:to|by|for))?|"
+    r"narrow(?:\s+(?:it|that|this))?(?:\s+down)?\s+to|limit(?:\s+(?:it|that))?\s+to|"
+    r"(?:of|among)\s+(?:those|them|these)|which\s+of\s+(?:those|them|these)|"
+    r"what\s+about\s+only)\b",
+    re.IGNORECASE
+)
+
+# Longer questions are new questions even when they start with a cue
+MAX_REFINEMENT_WORDS = 12
+
+STATUS_PATTERNS = [
+    # Negations may be separated from "submit" by "yet", "been" or "even"
+    ('not_submitted', re.compile(
+        r"\b(?:not|non|un|never|haven'?t|hasn'?t|didn'?t)[\s-]*(?:(?:yet|been|even|already)\s+)*submit(?:ted)?\b",
+        re.IGNORECASE
+    )),
+    ('pending', re.compile(r"\bpending\b", re.IGNORECASE)),
+    ('submitted', re.compile(r"\bsubmitted\b", re.IGNORECASE))
+]
+CLASS_PATTERN = re.compile(r"\b(?:class\s+)?(\d{1,2}[a-z])\b", re.IGNORECASE)
+GRADE_PATTERN = re.compile(r"\bgrades?\s+(\d{1,2}(?:\s*(?:,|and|or)\s*\d{1,2})*)\b", re.IGNORECASE)
+REGION_PATTERN = re.compile(r"\b(north|south|east|west)(?:ern)?\b(?:\s+region)?", re.IGNORECASE)
+
+# Result column each refinable filter is checked against
+RESULT_COLUMNS = {
+    'class': 'Class',
+    'grade': 'Grade',
+    'region': 'Region',
+    'status': 'Status'
+}
+
+
+class QueryRefiner:
+    """
+    Detects follow-ups that narrow the previous question and answers them
+    by filtering the previous result, with no LLM call or table scan.
+    
+    A follow-up is refined only when it starts with a narrowing cue
+    ("only", "just", "of those", ...), names values for class, grade,
+    region or status, names no intent other than the previous one,
+    doesn't contradict the previous filters, and the previous result has
+    the columns to check. Anything else is treated as
+    a new question.
+    """
+    
+    @staticmethod
+    def extract_filters(question: str) -> Optional[Dict[str, List[Any]]]:
+        """
+        Extract the filters named by a narrowing follow-up.
+        
+        Args:
+            question: The follow-up question
+        
+        Returns:
+            Dict[str, List[Any]]: Normalized filter values, or None if the
+            question isn't a recognizable narrowing follow-up
+        """
+        if not REFINEMENT_CUES.match(question) or len(question.split()) > MAX_REFINEMENT_WORDS:
+            return None
+        
+        filters: Dict[str, List[Any]] = {}
+        text = question
+        
+        for status, pattern in STATUS_PATTERNS:
+            if pattern.search(text):
+                filters['status'] = [status]
+                text = pattern.sub(' ', text)
+                break
+        
+        grades = GRADE_PATTERN.search(text)
+        if grades:
+            filters['grade'] = normalize_filter_values('grade', re.findall(r"\d+", grades.group(1)))
+            text = GRADE_PATTERN.sub(' ', text)
+        
+        classes = CLASS_PATTERN.findall(text)
+        if classes:
+            filters['class'] = normalize_filter_values('class', classes)
+        
+        regions = REGION_PATTERN.findall(text)
+        if regions:
+            filters['region'] = normalize_filter_values('region', regions)
+        
+        return filters or None
+    
+    @staticmethod
+    def changes_intent(question: str, intent_type: str) -> bool:
+        """
+        Whether a follow-up asks for a different kind of result.
+        
+        "Just the quiz scores for 8A" after a homework question narrows
+        nothing: it asks for scores, which the homework rows don't hold.
+        
+        Args:
+            question: The follow-up question
+            intent_type: Intent of the previous question
+        
+        Returns:
+            bool: True if the follow-up names an intent other than intent_type
+        
+        Examples:
+            >>> QueryRefiner.changes_intent("just the quiz scores for 8A", 'homework_status')
+            True
+            >>> QueryRefiner.changes_intent("only upcoming quizzes for 8A", 'homework_status')
+            True
+            >>> QueryRefiner.changes_intent("just show performance data for class 8A", 'homework_status')
+            True
+            >>> QueryRefiner.changes_intent("only the ones not yet submitted", 'homework_status')
+            False
+            >>> QueryRefiner.changes_intent("just 8A", 'performance')
+            False
+        """
+        # Imported here: the rule parser imports this module's patterns
+        from src.services.rule_based_parser import detect_intent
+        
+        named = detect_intent(question)
+        return named is not None and named != intent_type
+    
+    @staticmethod
+    def merge(previous: QueryIntent, narrowing: Dict[str, List[Any]]) -> Optional[QueryIntent]:
+        """
+        Combine the previous intent with narrowing filters.
+        
+        Args:
+            previous: Intent of the previous question
+            narrowing: Filters from the follow-up
+        
+        Returns:
+            QueryIntent: The combined intent, or None if a new value falls
+            outside what the previous question already filtered on
+        """
+        filters = dict(previous.filters)
+        for key, values in narrowing.items():
+            if filters.get(key) not in (None, '', []):
+                allowed = set(normalize_filter_values(key, filters[key]))
+                if not set(values) <= allowed:
+                    return None
+            filters[key] = values[0] if len(values) == 1 else values
+        return replace(previous, filters=filters)
+    
+    @staticmethod
+    def apply(results: pd.DataFrame, narrowing: Dict[str, List[Any]]) -> Optional[pd.DataFrame]:
+        """
+        Filter a previous result by the narrowing filters.
+        
+        Args:
+            results: Previous query result (not modified)
+            narrowing: Filters from the follow-up
+        
+        Returns:
+            pd.DataFrame: Matching rows, or None if the result lacks a
+            column needed to check a filter
+        """
+        mask = np.ones(len(results), dtype=bool)
+        for key, values in narrowing.items():
+            column = RESULT_COLUMNS.get(key)
+            if column not in results.columns:
+                return None
+            mask &= results[column].isin(values).to_numpy(dtype=bool, na_value=False)
+        return results[mask].reset_index(drop=True)
+    
+    def refine(
+        self,
+        question: str,
+        previous_intent: QueryIntent,
+        previous_results: pd.DataFrame
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer a follow-up from the previous result if it only narrows it.
+        
+        Results that were cut to the top N can't be narrowed (the top N of
+        a subset differ), so those follow-ups are left to a full query.
+        
+        Args:
+            question: The follow-up question
+            previous_intent: Intent of the previous question
+            previous_results: Result of the previous question
+        
+        Returns:
+            Dict[str, Any]: 'intent' (merged) and 'results', or None if the
+            follow-up needs a full query
+        
+        Examples:
+            >>> previous = QueryIntent('homework_status', {})
+            >>> rows = pd.DataFrame({'Class': ['8A', '8B']})
+            >>> QueryRefiner().refine("just the quiz scores for 8A", previous, rows) is None
+            True
+            >>> QueryRefiner().refine("only 8A", previous, rows)['results']['Class'].tolist()
+            ['8A']
+        """
+        if previous_intent.limit is not None:
+            return None
+        
+        narrowing = self.extract_filters(question)
+        if narrowing is None or self.changes_intent(question, previous_intent.intent_type):
+            return None
+        
+        intent = self.merge(previous_intent, narrowing)
+        if intent is None:
+            return None
+        
+        results = self.apply(previous_results, narrowing)
+        if results is None:
+            return None
+        
+        return {'intent': intent, 'results': results}
@@ -0,0 +1,264 @@
+"""
+Query Runner - Runs queries on a shared background pool with cancellation and per-admin limits
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueryCancelled(Exception):
+    """Raised inside a query once it has been cancelled."""
+
+
+class QueryRejected(Exception):
+    """Raised when an admin already has the most queries allowed running."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag shared by a query and whoever cancels it.
+    
+    Work can't be interrupted from outside a thread, so a query checks its
+    token between stages and hands it to calls that wait (the LLM governor
+    stops waiting on a cancelled token and starts no new calls).
+    """
+    
+    def __init__(self):
+        """Initialize an uncancelled token."""
+        self._event = threading.Event()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the query was cancelled."""
+        return self._event.is_set()
+    
+    def cancel(self) -> None:
+        """Ask the query to stop."""
+        self._event.set()
+    
+    def raise_if_cancelled(self) -> None:
+        """
+        Stop the query here if it was cancelled.
+        
+        Raises:
+            QueryCancelled: If the token was cancelled
+        """
+        if self._event.is_set():
+            raise QueryCancelled("Query was cancelled")
+
+
+class QueryJob:
+    """
+    A submitted query: its future, cancellation token and owner.
+    
+    Attributes:
+        job_id: Sequence number of the job
+        session_id: Session that submitted it
+        admin_id: Admin it runs as
+        question: The question asked
+        token: Its CancellationToken
+        future: Future of the query function's result
+        submitted_at: time.monotonic() at submission
+    """
+    
+    def __init__(self, job_id: int, session_id: str, admin_id: str, question: str):
+        self.job_id = job_id
+        self.session_id = session_id
+        self.admin_id = admin_id
+        self.question = question
+        self.token = CancellationToken()
+        self.future: Optional[Future] = None
+        self.submitted_at = time.monotonic()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the job was cancelled."""
+        return self.token.cancelled
+    
+    def done(self) -> bool:
+        """Whether the job has finished, failed or been cancelled."""
+        return self.future is not None and self.future.done()
+    
+    def elapsed(self) -> float:
+        """Seconds since the job was submitted."""
+        return time.monotonic() - self.submitted_at
+    
+    def result(self) -> Any:
+        """
+        Get a finished job's result.
+        
+        Returns:
+            Any: What the query function returned
+        
+        Raises:
+            QueryCancelled: If the job was cancelled
+            Exception: Whatever the query function raised
+        """
+        try:
+            return self.future.result(timeout=0)
+        except CancelledError:
+            raise QueryCancelled("Query was cancelled")
+
+
+class QueryRunner:
+    """
+    Shared background pool that runs the app's queries.
+    
+    Each session has at most one current query: submitting another cancels
+    the previous one, which stops at its next checkpoint (or never starts
+    if it was still queued). Each admin may have max_per_admin queries
+    running across sessions; further queries are rejected rather than
+    queued, like shed LLM calls, so one admin can't occupy the pool. A
+    cancelled query still holds its thread until it reaches a checkpoint,
+    so it counts against its admin until it has finished.
+    """
+    
+    def __init__(self, max_workers: int = 4, max_per_admin: int = 2):
+        """
+        Initialize the runner.
+        
+        Args:
+            max_workers: Queries running at the same time
+            max_per_admin: Queries one admin may have running at the same time
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_per_admin = max(1, max_per_admin)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='query')
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._running: Dict[int, QueryJob] = {}
+        self._by_session: Dict[str, QueryJob] = {}
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'rejected': 0
+        }
+    
+    def submit(
+        self,
+        session_id: str,
+        admin_id: str,
+        question: str,
+        fn: Callable[..., Any],
+        *args,
+        **kwargs
+    ) -> QueryJob:
+        """
+        Run a query in the background, replacing the session's current query.
+        
+        Args:
+            session_id: Session submitting the query
+            admin_id: Admin the query runs as (the per-admin limit's key)
+            question: The question, for reporting
+            fn: Query function; called as fn(token, *args, **kwargs) and
+                expected to check the token between stages
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+        
+        Returns:
+            QueryJob: The submitted job
+        
+        Raises:
+            QueryRejected: If the admin already has max_per_admin queries
+                running, including cancelled ones that haven't finished
+        """
+        with self._lock:
+            previous = self._by_session.get(session_id)
+            # Jobs leave _running only in _finish, once their thread is free
+            active = sum(1 for job in self._running.values() if job.admin_id == admin_id)
+            if active >= self.max_per_admin:
+                self.stats['rejected'] += 1
+                raise QueryRejected(
+                    f"{self.max_per_admin} queries are already running for this admin. "
+                    "Wait for one to finish and try again."
+                )
+            
+            job = QueryJob(next(self._ids), session_id, admin_id, question)
+            self._running[job.job_id] = job
+            self._by_session[session_id] = job
+            self.stats['submitted'] += 1
+            job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        
+        # Outside the lock: cancelling a queued future runs _finish at once
+        if previous is not None:
+            self._cancel(previous)
+        job.future.add_done_callback(lambda future: self._finish(job))
+        return job
+    
+    @staticmethod
+    def _run(job: QueryJob, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run a job's function unless it was cancelled while queued."""
+        job.token.raise_if_cancelled()
+        try:
+            return fn(job.token, *args, **kwargs)
+        except Exception:
+            # Errors from work cut short by a cancel are the cancel
+            job.token.raise_if_cancelled()
+            raise
+    
+    def _cancel(self, job: QueryJob) -> None:
+        """Cancel a job, dropping it from the pool's queue if it hasn't started."""
+        job.token.cancel()
+        if job.future is not None:
+            job.future.cancel()
+    
+    def _finish(self, job: QueryJob) -> None:
+        """Count a finished job and stop tracking it."""
+        with self._lock:
+            self._running.pop(job.job_id, None)
+            if self._by_session.get(job.session_id) is job:
+                del self._by_session[job.session_id]
+            
+            if job.future.cancelled() or job.cancelled:
+                self.stats['cancelled'] += 1
+            elif job.future.exception() is not None:
+                self.stats['failed'] += 1
+            else:
+                self.stats['completed'] += 1
+    
+    def cancel(self, session_id: str) -> bool:
+        """
+        Cancel a session's current query.
+        
+        Args:
+            session_id: Session whose query to cancel
+        
+        Returns:
+            bool: Whether there was a query to cancel
+        """
+        with self._lock:
+            job = self._by_session.get(session_id)
+        if job is None or job.done():
+            return False
+        self._cancel(job)
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get job counters and what is running now.
+        
+        Returns:
+            Dict[str, Any]: Submitted, completed, failed, cancelled and
+            rejected counts, running jobs (including cancelled ones still
+            reaching a checkpoint) and running jobs per admin
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            per_admin: Dict[str, int] = {}
+            for job in self._running.values():
+                per_admin[job.admin_id] = per_admin.get(job.admin_id, 0) + 1
+            stats['running'] = len(self._running)
+        stats['running_per_admin'] = per_admin
+        return stats
+    
+    def shutdown(self) -> None:
+        """Cancel every query and stop the worker threads once running ones return."""
+        with self._lock:
+            jobs = list(self._running.values())
+        for job in jobs:
+            self._cancel(job)
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,164 @@
+"""
+Result Exporter - Streams query results to CSV and Parquet
+"""
+import io
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+import pandas as pd
+
+
+Destination = Union[str, Path, BinaryIO]
+
+# Rows converted to text at a time when writing CSV
+CSV_CHUNK_ROWS = 50_000
+
+# Rows per Parquet row group
+PARQUET_ROW_GROUP_ROWS = 256_000
+
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Encode a DataFrame as CSV one chunk of rows at a time.
+    
+    Only one chunk is held as text at once, so memory stays constant
+    in the number of rows. Dates are written in ISO format and missing
+    values as empty fields.
+    
+    Args:
+        df: Query results to export
+        chunk_rows: Rows per chunk
+        
+    Yields:
+        bytes: UTF-8 CSV data, the header first
+    """
+    yield df.iloc[:0].to_csv(index=False).encode('utf-8')
+    
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+def export_csv(df: pd.DataFrame, destination: Destination, chunk_rows: int = CSV_CHUNK_ROWS) -> int:
+    """
+    Write query results to a CSV file in chunks.
+    
+    Args:
+        df: Query results to export
+        destination: File path or binary file object
+        chunk_rows: Rows per chunk
+        
+    Returns:
+        int: Number of rows written
+    """
+    if isinstance(destination, (str, Path)):
+        with open(destination, 'wb') as f:
+            return export_csv(df, f, chunk_rows)
+    
+    for chunk in iter_csv_chunks(df, chunk_rows):
+        destination.write(chunk)
+    return len(df)
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """
+    Convert query results to an Arrow table.
+    
+    Numeric and datetime columns are handed to Arrow without copying.
+    
+    Args:
+        df: Query results to export
+        
+    Returns:
+        pyarrow.Table: The results as an Arrow table
+        
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow/Parquet export: pip install pyarrow")
+    
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def export_parquet(
+    df: pd.DataFrame,
+    destination: Destination,
+    row_group_rows: int = PARQUET_ROW_GROUP_ROWS
+) -> int:
+    """
+    Write query results to a Parquet file.
+    
+    Args:
+        df: Query results to export
+        destination: File path or binary file object
+        row_group_rows: Rows per row group
+        
+    Returns:
+        int: Number of rows written
+        
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    table = to_arrow_table(df)
+    
+    import pyarrow.parquet as pq
+    
+    if isinstance(destination, Path):
+        destination = str(destination)
+    pq.write_table(table, destination, row_group_size=row_group_rows)
+    return table.num_rows
+
+
+def export_result(df: pd.DataFrame, destination: Union[str, Path], fmt: Optional[str] = None) -> int:
+    """
+    Export query results for batch jobs, choosing the format by file suffix.
+    
+    Args:
+        df: Query results to export
+        destination: Output file path
+        fmt: 'csv' or 'parquet' (inferred from the suffix if None)
+        
+    Returns:
+        int: Number of rows written
+        
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = (fmt or Path(destination).suffix.lstrip('.')).lower()
+    
+    if fmt == 'csv':
+        return export_csv(df, destination)
+    elif fmt in ('parquet', 'pq'):
+        return export_parquet(df, destination)
+    
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Encode query results as CSV for an in-memory download.
+    
+    Args:
+        df: Query results to export
+        
+    Returns:
+        bytes: UTF-8 CSV data
+    """
+    return b''.join(iter_csv_chunks(df))
+
+
+def parquet_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Encode query results as Parquet for an in-memory download.
+    
+    Args:
+        df: Query results to export
+        
+    Returns:
+        bytes: Parquet file contents
+    """
+    buffer = io.BytesIO()
+    export_parquet(df, buffer)
+    return buffer.getvalue()
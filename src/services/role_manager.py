@@ -3,7 +3,7 @@ Role Manager - Manages admin roles and access control
 """
 import json
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from src.models.admin_role import AdminRole
 
 
@@ -21,6 +21,8 @@ class RoleManager:
         """
         self.roles_file_path = Path(roles_file_path)
         self._roles_cache = None
+        self._admins: Optional[List[AdminRole]] = None
+        self._admins_by_id: Dict[str, AdminRole] = {}
     
     def load_admin_role(self, admin_id: str) -> Optional[AdminRole]:
         """
@@ -32,18 +34,8 @@ class RoleManager:
         Returns:
             AdminRole: The admin role object, or None if not found
         """
-        roles = self._load_all_roles()
-        
-        for role_data in roles:
-            if role_data['admin_id'] == admin_id:
-                return AdminRole(
-                    admin_id=role_data['admin_id'],
-                    name=role_data['name'],
-                    scope_type=role_data['scope_type'],
-                    scope_values=role_data['scope_values']
-                )
-        
-        return None
+        self._build_index()
+        return self._admins_by_id.get(admin_id)
     
     def get_all_admins(self) -> List[AdminRole]:
         """
@@ -52,17 +44,37 @@ class RoleManager:
         Returns:
             List[AdminRole]: List of all admin roles
         """
-        roles = self._load_all_roles()
+        self._build_index()
+        return list(self._admins)
+    
+    def _build_index(self) -> None:
+        """
+        Build the AdminRole objects and the admin_id index once.
         
-        return [
+        AdminRole is immutable, so the same objects (and their compiled
+        scope predicates) are shared by every caller.
+        """
+        if self._admins is not None:
+            return
+        
+        admins = [
             AdminRole(
                 admin_id=role['admin_id'],
                 name=role['name'],
-                scope_type=role['scope_type'],
-                scope_values=role['scope_values']
+                scope_type=role.get('scope_type'),
+                scope_values=role.get('scope_values'),
+                scopes=role.get('scopes')
             )
-            for role in roles
+            for role in self._load_all_roles()
         ]
+        
+        # First definition wins, matching the previous linear scan
+        admins_by_id = {}
+        for admin in admins:
+            admins_by_id.setdefault(admin.admin_id, admin)
+        
+        self._admins_by_id = admins_by_id
+        self._admins = admins
     
     def _load_all_roles(self) -> List[dict]:
         """
@@ -0,0 +1,156 @@
+"""
+Rule-Based Parser - Local keyword parser used when the LLM is unavailable
+"""
+import re
+from typing import Any, Dict, Optional
+from src.models.query_intent import QueryIntent
+from src.services.query_planner import normalize_filter_values
+from src.services.query_refiner import CLASS_PATTERN, GRADE_PATTERN, REGION_PATTERN, STATUS_PATTERNS
+
+
+# Checked in order; the first intent whose pattern matches wins
+INTENT_PATTERNS = [
+    ('homework_analytics', re.compile(
+        r"\b(?:completion|complete[d]?\s+rate|overdue|late|percent(?:age)?|how\s+many)\b.*\b(?:assignment|homework|chapter)s?\b|"
+        r"\b(?:assignment|homework)s?\b.*\b(?:completion|overdue|late)\b",
+        re.IGNORECASE
+    )),
+    ('performance_trend', re.compile(
+        r"\b(?:drop(?:ped|ping)?|declin(?:e|ed|ing)|fell|fall(?:en|ing)?|improv(?:e|ed|ing|ement)|trend(?:s|ing)?|"
+        r"getting\s+(?:worse|better)|over\s+time)\b",
+        re.IGNORECASE
+    )),
+    ('upcoming_quizzes', re.compile(r"\b(?:upcoming|scheduled|next)\b.*\bquiz(?:zes)?\b|\bquiz(?:zes)?\b.*\b(?:upcoming|scheduled|next)\b", re.IGNORECASE)),
+    ('performance', re.compile(r"\b(?:score|scores|grades?\s+(?:data|results)|performance|marks|results|quiz(?:zes)?)\b", re.IGNORECASE)),
+    ('homework_status', re.compile(r"\b(?:homework|assignment|assignments|submit(?:ted)?|submission|pending)\b", re.IGNORECASE))
+]
+
+DATE_RANGES = ['last week', 'this week', 'last month', 'next week', 'upcoming']
+TOP_PATTERN = re.compile(r"\b(top|bottom|latest|lowest|highest|first|last)\s+(\d{1,3})\b", re.IGNORECASE)
+ASSIGNMENT_PATTERN = re.compile(r"\b((?:math|science|english|history|geography)\s+chapter\s+\d+)\b", re.IGNORECASE)
+
+# Default ranking column per intent for "top N" questions
+RANK_COLUMNS = {
+    'performance': 'score',
+    'homework_status': 'submission_date',
+    'homework_analytics': 'completion',
+    'performance_trend': 'slope',
+    'upcoming_quizzes': 'date'
+}
+
+
+def detect_intent(question: str) -> Optional[str]:
+    """
+    Find the intent a question names by its keywords.
+    
+    Args:
+        question: The natural language question
+    
+    Returns:
+        Optional[str]: The first intent whose pattern matches, or None
+    """
+    for intent_type, pattern in INTENT_PATTERNS:
+        if pattern.search(question):
+            return intent_type
+    return None
+
+
+class RuleBasedParser:
+    """
+    Parses questions into QueryIntents with keyword rules.
+    
+    It understands the common shapes of admin questions (intent keywords,
+    class, grade, region, status, date ranges, top N) and needs no network
+    or model, so NLQueryParser can answer with it when LLM calls are being
+    shed. Intents it returns have a fixed, lower confidence.
+    """
+    
+    CONFIDENCE = 0.5
+    
+    def parse_query(self, question: str) -> QueryIntent:
+        """
+        Parse a natural language question into a QueryIntent.
+        
+        Args:
+            question: The natural language question
+        
+        Returns:
+            QueryIntent: Parsed intent with filters
+        
+        Examples:
+            >>> RuleBasedParser().parse_query("Which students have not yet submitted homework?").filters
+            {'status': 'not_submitted'}
+            >>> RuleBasedParser().parse_query("Show submitted homework for 8A").filters
+            {'status': 'submitted', 'class': '8A'}
+        """
+        intent_type = detect_intent(question) or 'general'
+        
+        filters: Dict[str, Any] = {}
+        text = question
+        
+        for status, pattern in STATUS_PATTERNS:
+            if pattern.search(text):
+                filters['status'] = status
+                text = pattern.sub(' ', text)
+                break
+        
+        assignment = ASSIGNMENT_PATTERN.search(text)
+        if assignment:
+            filters['assignment'] = assignment.group(1)
+            text = ASSIGNMENT_PATTERN.sub(' ', text)
+        
+        lowered = text.lower()
+        for date_range in DATE_RANGES:
+            if date_range in lowered:
+                filters['date_range'] = date_range
+                text = re.sub(re.escape(date_range), ' ', text, flags=re.IGNORECASE)
+                break
+        
+        order_by = None
+        ascending = False
+        limit = None
+        top = TOP_PATTERN.search(text)
+        if top:
+            limit = int(top.group(2))
+            ascending = top.group(1).lower() in ('bottom', 'lowest')
+            order_by = RANK_COLUMNS.get(intent_type)
+            text = TOP_PATTERN.sub(' ', text)
+        
+        grades = GRADE_PATTERN.search(text)
+        if grades:
+            values = normalize_filter_values('grade', re.findall(r"\d+", grades.group(1)))
+            filters['grade'] = values[0] if len(values) == 1 else values
+            text = GRADE_PATTERN.sub(' ', text)
+        
+        classes = normalize_filter_values('class', CLASS_PATTERN.findall(text))
+        if classes:
+            filters['class'] = classes[0] if len(classes) == 1 else classes
+        
+        regions = normalize_filter_values('region', REGION_PATTERN.findall(text))
+        if regions:
+            filters['region'] = regions[0] if len(regions) == 1 else regions
+        
+        if intent_type == 'performance_trend':
+            if re.search(r"\b(?:drop|declin|fell|fall|worse)", question, re.IGNORECASE):
+                filters['direction'] = 'declining'
+            elif re.search(r"\b(?:improv|better|rose|risen|ris(?:e|ing))", question, re.IGNORECASE):
+                filters['direction'] = 'improving'
+        
+        if intent_type == 'homework_analytics':
+            extreme = re.search(r"\b(lowest|least|worst|highest|most|best)\s+(completion|overdue|late)\b", question, re.IGNORECASE)
+            if extreme and order_by is None:
+                order_by = extreme.group(2).lower()
+                ascending = extreme.group(1).lower() in ('lowest', 'least', 'worst')
+            if re.search(r"\b(?:per|by|each)\s+class\b", question, re.IGNORECASE):
+                filters['group_by'] = 'class'
+            elif re.search(r"\b(?:per|by|each|which)\s+assignments?\b", question, re.IGNORECASE):
+                filters['group_by'] = 'assignment'
+        
+        return QueryIntent(
+            intent_type=intent_type,
+            filters=filters,
+            confidence=self.CONFIDENCE,
+            order_by=order_by,
+            ascending=ascending,
+            limit=limit
+        )
@@ -1,8 +1,204 @@
 """
 Scope Filter - Applies role-based access control to data
 """
+import threading
+import weakref
+import numpy as np
 import pandas as pd
-from src.models.admin_role import AdminRole
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.models.admin_role import AdminRole, Scope, SCOPE_COLUMN_TYPES
+
+
+def _resolvable_columns(data: pd.DataFrame, students: Optional[pd.DataFrame]) -> Tuple[str, ...]:
+    """Scope columns data lacks that can be taken from its rows' students."""
+    if students is None or students is data or 'student_id' not in data.columns or 'student_id' not in students.columns:
+        return ()
+    return tuple(c for c in SCOPE_COLUMN_TYPES if c not in data.columns and c in students.columns)
+
+
+def student_rows(student_ids: pd.Series, keys: pd.Series) -> np.ndarray:
+    """
+    Find each row's student in the students table.
+    
+    Only distinct ids are looked up, then gathered back to rows.
+    
+    Args:
+        student_ids: student_id column of a table
+        keys: student_id column of the students table
+    
+    Returns:
+        np.ndarray: Students table row per id (the first, if duplicated),
+        -1 where the student is unknown
+    """
+    first = ~keys.duplicated().to_numpy()
+    index = pd.Index(keys[first])
+    positions = np.flatnonzero(first)
+    
+    codes, distinct = pd.factorize(student_ids)
+    found = index.get_indexer(distinct)
+    lookup = np.full(len(distinct) + 1, -1, dtype=np.int64)
+    lookup[:-1][found >= 0] = positions[found[found >= 0]]
+    # factorize codes missing ids as -1, which picks the trailing -1
+    return lookup[codes]
+
+
+class ScopeIndex:
+    """
+    Precomputed scope-column codes for one table.
+    
+    Each scope column is factorized into integer codes, and the codes are
+    combined into a single key per distinct (region, grade, class)
+    combination. A scope is evaluated against the handful of distinct
+    combinations and then gathered back to rows, so checking any number
+    of clauses costs one pass over the table. Tables without a scope
+    column of their own (homework and performance have no region) can
+    take it from each row's student, joined into the combinations.
+    """
+    
+    _cache: Dict[int, 'ScopeIndex'] = {}
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, data: pd.DataFrame, students: Optional[pd.DataFrame] = None):
+        """
+        Build the index for a DataFrame.
+        
+        Args:
+            data: Table to index
+            students: Students table; scope columns data lacks (e.g., region
+                on homework) are then taken from each row's student
+        """
+        self.codes: Dict[str, np.ndarray] = {}
+        self.uniques: Dict[str, pd.Index] = {}
+        for column in SCOPE_COLUMN_TYPES:
+            if column in data.columns:
+                codes, uniques = pd.factorize(data[column])
+                # Shift so that 0 marks a missing value, which never matches a scope
+                self.codes[column] = codes + 1
+                self.uniques[column] = uniques
+        
+        self.resolved = _resolvable_columns(data, students)
+        if self.resolved:
+            student_index = ScopeIndex.for_frame(students)
+            rows = student_rows(data['student_id'], students['student_id'])
+            known = rows >= 0
+            for column in self.resolved:
+                # Rows whose student is unknown get 0, like a missing value
+                self.codes[column] = np.where(known, student_index.codes[column][np.where(known, rows, 0)], 0)
+                self.uniques[column] = student_index.uniques[column]
+        
+        self.columns = tuple(c for c in SCOPE_COLUMN_TYPES if c in self.codes)
+        combined = np.zeros(len(data), dtype=np.int64)
+        for column in self.columns:
+            combined = combined * (len(self.uniques[column]) + 1) + self.codes[column]
+        
+        self.row_combos, combo_keys = pd.factorize(combined)
+        
+        # Decode each distinct combination back to per-column codes
+        self.combo_codes: Dict[str, np.ndarray] = {}
+        remainder = combo_keys
+        for column in reversed(self.columns):
+            base = len(self.uniques[column]) + 1
+            self.combo_codes[column] = remainder % base
+            remainder = remainder // base
+        
+        # Index of the same table with missing columns resolved through
+        # a students table (weak reference to that table, index)
+        self._through: Optional[Tuple[Any, 'ScopeIndex']] = None
+    
+    @classmethod
+    def for_frame(cls, data: pd.DataFrame, students: Optional[pd.DataFrame] = None) -> 'ScopeIndex':
+        """
+        Get the cached index for a DataFrame, building it on first use.
+        
+        Indexes are cached per DataFrame object and dropped when the frame
+        is garbage collected. Indexed frames must not be mutated in place.
+        With a students table, scope columns the frame lacks are resolved
+        through student_id; that index is cached alongside the plain one.
+        
+        Args:
+            data: Table to index
+            students: Students table to resolve missing scope columns through
+        
+        Returns:
+            ScopeIndex: Index for the table
+        """
+        key = id(data)
+        index = cls._cache.get(key)
+        if index is None:
+            index = cls(data)
+            with cls._cache_lock:
+                if key not in cls._cache:
+                    cls._cache[key] = index
+                    weakref.finalize(data, cls._cache.pop, key, None)
+                index = cls._cache[key]
+        
+        if not _resolvable_columns(data, students):
+            return index
+        through = index._through
+        if through is None or through[0]() is not students:
+            through = (weakref.ref(students), cls(data, students))
+            index._through = through
+        return through[1]
+    
+    @classmethod
+    def cached(cls, data: pd.DataFrame) -> Optional['ScopeIndex']:
+        """
+        Get the index already built for a DataFrame, without building one.
+        
+        Args:
+            data: Indexed table
+        
+        Returns:
+            ScopeIndex: The cached index, or None
+        """
+        return cls._cache.get(id(data))
+    
+    def mask(self, scope: Scope) -> np.ndarray:
+        """
+        Evaluate a scope to a boolean row mask.
+        
+        Args:
+            scope: Compiled scope
+        
+        Returns:
+            np.ndarray: True for rows within scope
+        """
+        combos = len(next(iter(self.combo_codes.values()))) if self.combo_codes else 1
+        allowed = np.zeros(combos, dtype=bool)
+        
+        for clause in scope.clauses:
+            # A clause on a dimension this table lacks (and couldn't resolve
+            # through students) matches nothing, which prevents data leakage
+            if any(p.column not in self.codes for p in clause):
+                continue
+            
+            clause_allowed = np.ones(combos, dtype=bool)
+            for predicate in clause:
+                lookup = np.zeros(len(self.uniques[predicate.column]) + 1, dtype=bool)
+                lookup[1:] = self.uniques[predicate.column].isin(predicate.values)
+                clause_allowed &= lookup[self.combo_codes[predicate.column]]
+            allowed |= clause_allowed
+        
+        if not allowed.any():
+            return np.zeros(len(self.row_combos), dtype=bool)
+        return allowed[self.row_combos]
+    
+    def column_mask(self, column: str, values: Iterable[Any], positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluate membership of an indexed column in a set of values.
+        
+        Args:
+            column: Indexed scope column
+            values: Typed values to match
+            positions: Row positions to evaluate (all rows if None)
+        
+        Returns:
+            np.ndarray: Boolean mask aligned with positions
+        """
+        lookup = np.zeros(len(self.uniques[column]) + 1, dtype=bool)
+        lookup[1:] = self.uniques[column].isin(list(values))
+        codes = self.codes[column] if positions is None else self.codes[column][positions]
+        return lookup[codes]
 
 
 class ScopeFilter:
@@ -12,44 +208,43 @@ class ScopeFilter:
     """
     
     @staticmethod
-    def apply_scope(data: pd.DataFrame, admin: AdminRole) -> pd.DataFrame:
+    def scope_mask(data: pd.DataFrame, admin: AdminRole, students: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """
+        Compute which rows of a DataFrame are within the admin's scope.
+        
+        Args:
+            data: DataFrame to check
+            admin: AdminRole defining the access scope
+            students: Students table, to check scope columns data lacks
+                (e.g., region on homework) against each row's student
+        
+        Returns:
+            np.ndarray: Boolean mask, True for rows within scope
+        """
+        return ScopeIndex.for_frame(data, students).mask(admin.scope)
+    
+    @staticmethod
+    def apply_scope(data: pd.DataFrame, admin: AdminRole, students: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Apply scope filtering to a DataFrame based on admin role.
         
         Args:
             data: DataFrame to filter
             admin: AdminRole defining the access scope
-            
+            students: Students table to resolve missing scope columns through
+        
         Returns:
             pd.DataFrame: Filtered DataFrame containing only data within scope
         """
         if data.empty:
             return data
         
-        # Determine which column to filter on based on scope type
-        scope_column = None
-        
-        if admin.scope_type == 'grade' and 'grade' in data.columns:
-            scope_column = 'grade'
-        elif admin.scope_type == 'class' and 'class' in data.columns:
-            scope_column = 'class'
-        elif admin.scope_type == 'region' and 'region' in data.columns:
-            scope_column = 'region'
-        
-        # If the scope column doesn't exist in this data, return empty DataFrame
-        # This prevents data leakage
-        if scope_column is None:
-            return pd.DataFrame(columns=data.columns)
-        
-        # Convert scope values to appropriate type
-        if scope_column == 'grade':
-            # Convert grade scope values to integers for comparison
-            scope_values = [int(v) for v in admin.scope_values]
-        else:
-            scope_values = admin.scope_values
+        # Rows only match clauses whose dimensions exist in this data or
+        # resolve through students, which prevents data leakage
+        mask = ScopeFilter.scope_mask(data, admin, students)
         
         # Filter data to only include rows within scope
-        filtered_data = data[data[scope_column].isin(scope_values)].copy()
+        filtered_data = data[mask]
         
         return filtered_data
     
@@ -61,21 +256,13 @@ class ScopeFilter:
         Args:
             query_params: Dictionary of query parameters
             admin: AdminRole defining the access scope
-            
+        
         Returns:
             bool: True if access is allowed, False otherwise
         """
         # If no specific scope parameters in query, allow (will be filtered by apply_scope)
-        if admin.scope_type not in query_params:
+        if not any(column in query_params for column in admin.scope.columns):
             return True
         
-        # Check if requested values are within admin's scope
-        requested_values = query_params[admin.scope_type]
-        if not isinstance(requested_values, list):
-            requested_values = [requested_values]
-        
-        # Convert to strings for comparison
-        requested_values = [str(v) for v in requested_values]
-        
-        # Check if all requested values are in admin's scope
-        return all(val in admin.scope_values for val in requested_values)
+        # Check if requested values are within one of the admin's scope clauses
+        return admin.scope.allows(query_params)
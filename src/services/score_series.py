@@ -0,0 +1,306 @@
+"""
+Score Series - Per-student score time series for trend and improvement queries
+"""
+import re
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from src.models.admin_role import AdminRole
+from src.models.query_intent import QueryIntent
+from src.services.name_index import NameIndex
+from src.services.query_planner import date_range_predicate, normalize_filter_values, score_percentage
+from src.services.scope_filter import ScopeFilter, ScopeIndex
+
+
+# Scores averaged by the rolling average
+ROLLING_WINDOW = 3
+
+# Fewest scores in the window for a series to have a trend
+MIN_POINTS = 2
+
+# Accepted order_by names mapped to result columns
+ORDER_COLUMNS = {
+    'slope': 'Slope / Week',
+    'trend': 'Slope / Week',
+    'change': 'Change',
+    'delta': 'Change',
+    'improvement': 'Change',
+    'rolling_average': 'Rolling Avg',
+    'average': 'Rolling Avg',
+    'score': 'Last Score',
+    'last_score': 'Last Score',
+    'name': 'Student Name',
+    'student_name': 'Student Name'
+}
+
+
+def _date_window(date_range: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Resolve a relative date range to inclusive day numbers.
+    
+    Args:
+        date_range: Date range phrase (e.g., "last month"), or None
+    
+    Returns:
+        Tuple[Optional[int], Optional[int]]: First and last day since the
+        epoch, None where the range is open
+    """
+    predicate = date_range_predicate('date', date_range) if date_range else None
+    if predicate is None:
+        return None, None
+    
+    def day(value) -> int:
+        return int(np.datetime64(pd.Timestamp(value), 'D').astype(np.int64))
+    
+    if predicate.op == 'between':
+        low, high = predicate.value
+        return day(low), day(high)
+    if predicate.op == 'ge':
+        return day(predicate.value), None
+    if predicate.op == 'le':
+        return None, day(predicate.value)
+    return None, None
+
+
+class ScoreSeries:
+    """
+    Quiz scores stored as one date-sorted series per student.
+    
+    Scores are kept in CSR form: values and days hold every score sorted
+    by (series, date), and series i occupies values[offsets[i]:offsets[i + 1]].
+    A series is one student within one (grade, class, region) combination
+    of the performance table, with scope columns the table lacks taken
+    from the student, so admin scope applies to whole series exactly as
+    it applies to rows. Trends are computed for all selected
+    series at once with bincount and cumulative sums, with no Python loop
+    over students.
+    """
+    
+    def __init__(self, performance: pd.DataFrame, students: pd.DataFrame):
+        """
+        Build the series from the performance table.
+        
+        Args:
+            performance: Performance rows
+            students: Students table, for names and student attributes
+        """
+        self.students = students
+        
+        percentage = score_percentage(performance)
+        days = performance['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        valid = ~np.isnan(percentage) & ~np.isnat(performance['date'].to_numpy(dtype='datetime64[D]'))
+        valid &= performance['student_id'].notna().to_numpy()
+        
+        # One series per student and scope combination
+        student_codes, _ = pd.factorize(performance['student_id'])
+        index = ScopeIndex.for_frame(performance, students)
+        combos = index.row_combos.astype(np.int64)
+        combined = student_codes.astype(np.int64) * (int(combos.max(initial=0)) + 1) + combos
+        
+        rows = np.flatnonzero(valid)
+        series_codes, _ = pd.factorize(combined[rows])
+        order = np.lexsort((days[rows], series_codes))
+        
+        self.codes = series_codes[order]
+        self.values = percentage[rows[order]]
+        self.days = days[rows[order]]
+        
+        counts = np.bincount(self.codes, minlength=int(self.codes.max(initial=-1)) + 1)
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        
+        # Attributes of each series, from its first row
+        first_rows = rows[order][self.offsets[:-1]]
+        columns = ['student_id'] + [c for c in index.columns if c in performance.columns]
+        self.series = performance.iloc[first_rows][columns].reset_index(drop=True)
+        for column in index.resolved:
+            # Decode the student's value; code 0 (unknown student) is missing
+            codes = index.codes[column][first_rows] - 1
+            self.series[column] = index.uniques[column].take(codes, allow_fill=True)
+        names = students.drop_duplicates('student_id').set_index('student_id')['name']
+        self.series['name'] = self.series['student_id'].map(names)
+    
+    def __len__(self) -> int:
+        """Number of series."""
+        return len(self.series)
+    
+    def rolling_average(self, window: int = ROLLING_WINDOW) -> np.ndarray:
+        """
+        Average of each score and up to window - 1 earlier scores of the same series.
+        
+        Args:
+            window: Scores per average
+        
+        Returns:
+            np.ndarray: Rolling average aligned with values
+        """
+        return self._rolling_average(self.values, self.offsets[self.codes], window)
+    
+    @staticmethod
+    def _rolling_average(values: np.ndarray, starts: np.ndarray, window: int) -> np.ndarray:
+        """
+        Rolling average over series-sorted values.
+        
+        Args:
+            values: Scores sorted by series and date
+            starts: Position where each score's series starts
+            window: Scores per average
+        
+        Returns:
+            np.ndarray: Rolling average per score
+        """
+        sums = np.zeros(len(values) + 1)
+        np.cumsum(values, out=sums[1:])
+        positions = np.arange(len(values))
+        low = np.maximum(positions - window + 1, starts)
+        return (sums[positions + 1] - sums[low]) / (positions + 1 - low)
+    
+    def _selected_series(self, intent: QueryIntent, admin: AdminRole) -> np.ndarray:
+        """
+        Mask of series within the admin's scope and the intent's filters.
+        
+        Filters on columns the performance table has apply to each series'
+        own values; other student attributes and names are resolved
+        through the students table.
+        
+        Args:
+            intent: Parsed query intent
+            admin: Admin role for access control
+        
+        Returns:
+            np.ndarray: Boolean mask over series
+        """
+        mask = ScopeFilter.scope_mask(self.series, admin)
+        filters = intent.filters
+        student_ids = self.series['student_id']
+        
+        for key in ('grade', 'class', 'region'):
+            if not filters.get(key):
+                continue
+            values = normalize_filter_values(key, filters[key])
+            if key in self.series.columns:
+                mask &= ScopeIndex.for_frame(self.series).column_mask(key, values)
+            elif key in self.students.columns:
+                matches = ScopeIndex.for_frame(self.students).column_mask(key, values)
+                mask &= student_ids.isin(self.students['student_id'].to_numpy()[matches]).to_numpy()
+        
+        if filters.get('student_name'):
+            names = filters['student_name'] if isinstance(filters['student_name'], list) else [filters['student_name']]
+            name_index = NameIndex.for_frame(self.students)
+            matched = np.concatenate([name_index.lookup(name) for name in names])
+            mask &= student_ids.isin(matched).to_numpy()
+        
+        return mask
+    
+    def trend(self, intent: QueryIntent, admin: AdminRole) -> pd.DataFrame:
+        """
+        Answer a score trend question.
+        
+        For each selected student with at least MIN_POINTS scores in the
+        date range, reports the first and last score, their change, the
+        least-squares slope in percentage points per week and the rolling
+        average of the latest ROLLING_WINDOW scores. The direction filter
+        ('declining' or 'improving') keeps students whose slope is below
+        or above zero.
+        
+        Args:
+            intent: Parsed query intent
+            admin: Admin role for access control
+        
+        Returns:
+            pd.DataFrame: One row per student series
+        """
+        selected = self._selected_series(intent, admin)
+        
+        points = selected[self.codes]
+        first_day, last_day = _date_window(intent.filters.get('date_range'))
+        if first_day is not None:
+            points &= self.days >= first_day
+        if last_day is not None:
+            points &= self.days <= last_day
+        
+        positions = np.flatnonzero(points)
+        codes = self.codes[positions]
+        values = self.values[positions]
+        days = self.days[positions].astype(np.float64)
+        
+        # Per-series sums; centring on the means keeps the slope exact
+        size = len(self.series)
+        counts = np.bincount(codes, minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_day = np.bincount(codes, days, minlength=size) / counts
+            mean_value = np.bincount(codes, values, minlength=size) / counts
+            centred_days = days - mean_day[codes]
+            spread = np.bincount(codes, centred_days * centred_days, minlength=size)
+            covariance = np.bincount(codes, centred_days * (values - mean_value[codes]), minlength=size)
+            slope = covariance / spread * 7
+        
+        # Positions of each series' first and last score in the window
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+        ends = np.r_[starts[1:] - 1, len(codes) - 1] if len(codes) else starts
+        series = codes[starts]
+        
+        run_starts = np.repeat(starts, ends - starts + 1)
+        rolling = self._rolling_average(values, run_starts, ROLLING_WINDOW)
+        
+        keep = counts[series] >= MIN_POINTS
+        direction = str(intent.filters.get('direction', '')).lower()
+        if direction in ('declining', 'decreasing', 'dropped', 'down'):
+            keep &= slope[series] < 0
+        elif direction in ('improving', 'increasing', 'up'):
+            keep &= slope[series] > 0
+        
+        starts, ends, series = starts[keep], ends[keep], series[keep]
+        attributes = self.series.iloc[series]
+        result = pd.DataFrame({
+            'Student Name': attributes['name'].to_numpy(),
+            'Class': attributes['class'].to_numpy() if 'class' in attributes.columns else None,
+            'Scores': counts[series],
+            'First Score': np.round(values[starts], 2),
+            'Last Score': np.round(values[ends], 2),
+            'Change': np.round(values[ends] - values[starts], 2),
+            'Slope / Week': np.round(slope[series], 2),
+            'Rolling Avg': np.round(rolling[ends], 2)
+        })
+        
+        return self._order(result, intent, direction)
+    
+    @staticmethod
+    def _order(result: pd.DataFrame, intent: QueryIntent, direction: str) -> pd.DataFrame:
+        """
+        Sort and cut the trend table.
+        
+        Declining students are listed steepest drop first and improving
+        students steepest rise first, unless the intent names an order.
+        
+        Args:
+            result: Trend table
+            intent: Parsed query intent, for ordering and limit
+            direction: Normalized direction filter
+        
+        Returns:
+            pd.DataFrame: Ordered result
+        """
+        sort_by, ascending = 'Student Name', True
+        if direction in ('declining', 'decreasing', 'dropped', 'down'):
+            sort_by, ascending = 'Slope / Week', True
+        elif direction in ('improving', 'increasing', 'up'):
+            sort_by, ascending = 'Slope / Week', False
+        
+        if intent.order_by:
+            key = re.sub(r"[\s-]+", "_", str(intent.order_by).strip().lower())
+            if key in ORDER_COLUMNS:
+                sort_by, ascending = ORDER_COLUMNS[key], bool(intent.ascending)
+        
+        result = result.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+        result = result.reset_index(drop=True)
+        
+        if intent.limit is not None:
+            try:
+                limit = int(intent.limit)
+            except (TypeError, ValueError):
+                limit = 0
+            if limit > 0:
+                result = result.head(limit)
+        
+        return result
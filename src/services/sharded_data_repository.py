@@ -0,0 +1,465 @@
+"""
+Sharded Data Repository - Region-partitioned data served by worker processes
+"""
+import multiprocessing
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from src.models.admin_role import AdminRole
+from .data_repository import DataRepository
+from .data_validator import ValidationReport
+from .query_planner import QueryPlan, QueryPlanner
+
+
+SHARD_KEYS = ('region', 'grade', 'class')
+
+
+def _filter_frame(df: pd.DataFrame, filters: Optional[Dict]) -> pd.DataFrame:
+    """Apply equality/membership filters to a shard table."""
+    if not filters:
+        return df
+    
+    for key, value in filters.items():
+        if key in df.columns:
+            if isinstance(value, list):
+                df = df[df[key].isin(value)]
+            else:
+                df = df[df[key] == value]
+    
+    return df
+
+
+class _PartitionRepository(DataRepository):
+    """
+    Repository over one shard's tables, used inside its worker process.
+    """
+    
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self._tables = tables
+    
+    def load_data(self) -> Dict[str, pd.DataFrame]:
+        return self._tables
+    
+    def get_students(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return _filter_frame(self._tables['students'], filters)
+    
+    def get_homework(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return _filter_frame(self._tables['homework'], filters)
+    
+    def get_quizzes(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return _filter_frame(self._tables['quizzes'], filters)
+    
+    def get_performance(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return _filter_frame(self._tables['performance'], filters)
+
+
+def _serve_shard(conn, tables: Dict[str, pd.DataFrame]) -> None:
+    """
+    Worker process loop serving requests for one shard.
+    
+    Requests are ('rows', table, filters) for filtered table rows and
+    ('select', plan, admin) for the rows a query plan selects; None shuts
+    the worker down. Indexes the planner builds stay cached in the worker
+    for later requests.
+    """
+    repository = _PartitionRepository(tables)
+    planner = QueryPlanner()
+    
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        
+        if request is None:
+            break
+        
+        try:
+            if request[0] == 'select':
+                _, plan, admin = request
+                conn.send(planner.select_partition(plan, repository, admin))
+            else:
+                _, table, filters = request
+                conn.send(_filter_frame(tables[table], filters))
+        except Exception as e:
+            conn.send(e)
+    
+    conn.close()
+
+
+class _Shard:
+    """
+    Coordinator-side handle to a shard worker process.
+    """
+    
+    def __init__(self, region: str, tables: Dict[str, pd.DataFrame], context):
+        self.region = region
+        self.keys: Dict[str, Set[str]] = {key: set() for key in SHARD_KEYS}
+        for df in tables.values():
+            for key in SHARD_KEYS:
+                if key in df.columns:
+                    self.keys[key].update(str(v) for v in df[key].dropna().unique())
+        
+        self._lock = threading.Lock()
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_serve_shard,
+            args=(child_conn, tables),
+            name=f"shard-{region}",
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+    
+    def overlaps(self, admin: AdminRole) -> bool:
+        """Check whether any shard rows can fall inside the admin's scope."""
+        return any(
+            all(any(str(v) in self.keys[p.column] for v in p.values) for p in clause)
+            for clause in admin.scope.clauses
+        )
+    
+    def send(self, request: tuple) -> None:
+        self._lock.acquire()
+        try:
+            self._conn.send(request)
+        except Exception:
+            self._lock.release()
+            raise
+    
+    def receive(self) -> Any:
+        try:
+            result = self._conn.recv()
+        finally:
+            self._lock.release()
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._conn.close()
+        self._process.join(timeout=5)
+
+
+class ShardedDataRepository(DataRepository):
+    """
+    DataRepository that partitions the tables of a source repository by
+    region and serves each partition from its own worker process.
+    
+    Homework and performance rows carry no region, so they are placed in
+    the shard of the student they belong to, next to that student. Query
+    plans are filtered inside the workers (scope, predicates and the top N
+    where the ranking allows), so only matching rows are sent back and
+    merged in source row order; joins fetch just the rows they match.
+    Requests made through scoped() only reach the shards that overlap the
+    admin's scope. Once partitioned, the tables live only in the workers:
+    the source repository's copy is released, and full tables are merged
+    on request without being kept.
+    """
+    
+    TABLES = ('students', 'homework', 'quizzes', 'performance')
+    
+    def __init__(self, source: DataRepository, start_method: str = 'spawn'):
+        """
+        Initialize the sharded repository and start its worker processes.
+        
+        Args:
+            source: Repository providing the full tables to partition
+            start_method: multiprocessing start method for the workers
+        """
+        self.source = source
+        self._context = multiprocessing.get_context(start_method)
+        self._shards: List[_Shard] = []
+        self._start_shards()
+    
+    def _start_shards(self) -> None:
+        """Partition the source tables and start one worker per region."""
+        started = time.perf_counter()
+        
+        data = self.source.load_data()
+        partitions = self._partition(data)
+        self._shards = [
+            _Shard(region, tables, self._context)
+            for region, tables in partitions.items()
+        ]
+        self._columns = {
+            table: df.columns for table, df in data.items()
+        }
+        self._load_timings = self.source.get_load_timings()
+        self._validation_report = self.source.get_validation_report()
+        
+        # The workers hold the partitions now
+        del data, partitions
+        self.source.release_tables()
+        
+        self.startup_time = time.perf_counter() - started
+    
+    def _partition(self, data: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        Split every table by region, keeping the source row index.
+        
+        Args:
+            data: Full tables from the source repository
+        
+        Returns:
+            Dict[str, Dict[str, pd.DataFrame]]: Tables per region
+        """
+        students = data['students']
+        student_region = students.set_index('student_id')['region'] if not students.empty else pd.Series(dtype=object)
+        
+        region_columns = {}
+        for table, df in data.items():
+            if 'region' in df.columns:
+                region_columns[table] = df['region']
+            elif 'student_id' in df.columns:
+                region_columns[table] = df['student_id'].map(student_region)
+            else:
+                region_columns[table] = pd.Series(pd.NA, index=df.index, dtype=object)
+        
+        regions = set()
+        for column in region_columns.values():
+            regions.update(column.dropna().unique())
+        regions = sorted(str(r) for r in regions)
+        
+        partitions = {}
+        for region in regions:
+            partitions[region] = {
+                table: df[region_columns[table] == region]
+                for table, df in data.items()
+            }
+        
+        # Rows whose region is unknown still need a home
+        unassigned = {
+            table: df[region_columns[table].isna()]
+            for table, df in data.items()
+        }
+        if any(not df.empty for df in unassigned.values()):
+            partitions[''] = unassigned
+        
+        return partitions
+    
+    def _fan_out(self, shards: List[_Shard], request: tuple) -> List[Any]:
+        """
+        Send a request to the given shards and collect their replies.
+        
+        Args:
+            shards: Shards to query
+            request: Request tuple understood by the shard workers
+        
+        Returns:
+            List[Any]: One reply per shard
+        """
+        # Every shard that was sent a request must be read, or its lock
+        # stays held and its reply stays in the pipe for the next caller
+        sent = []
+        replies = []
+        errors = []
+        try:
+            for shard in shards:
+                shard.send(request)
+                sent.append(shard)
+        finally:
+            for shard in sent:
+                try:
+                    replies.append(shard.receive())
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return replies
+    
+    def _gather(self, shards: List[_Shard], table: str, filters: Optional[Dict]) -> pd.DataFrame:
+        """
+        Fan a table request out to the given shards and merge the results.
+        
+        Args:
+            shards: Shards to query
+            table: Table name
+            filters: Optional dictionary of filter criteria
+        
+        Returns:
+            pd.DataFrame: Merged results in source row order
+        """
+        if not shards:
+            return pd.DataFrame(columns=self._columns[table])
+        
+        frames = self._fan_out(shards, ('rows', table, filters))
+        return pd.concat(frames).sort_index().reset_index(drop=True)
+    
+    def _select(self, shards: List[_Shard], plan: QueryPlan, admin: AdminRole) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Filter a plan's scanned table in the given shards and merge the matching rows.
+        
+        Args:
+            shards: Shards to query
+            plan: QueryPlan being executed
+            admin: Admin role for access control
+        
+        Returns:
+            Optional[Tuple[pd.DataFrame, np.ndarray]]: Merged rows in source
+            row order and their positions, or None if no shard has rows in
+            the admin's scope
+        """
+        replies = [rows for rows in self._fan_out(shards, ('select', plan, admin)) if rows is not None]
+        if not replies:
+            return None
+        rows = pd.concat(replies).sort_index().reset_index(drop=True)
+        return rows, np.arange(len(rows))
+    
+    def load_data(self) -> Dict[str, pd.DataFrame]:
+        """
+        Load all data by merging every shard.
+        
+        The merged tables are not kept; queries are filtered in the shards.
+        
+        Returns:
+            Dict[str, pd.DataFrame]: Dictionary containing all data tables
+        """
+        return {table: self._gather(self._shards, table, None) for table in self.TABLES}
+    
+    def get_table(self, name: str) -> pd.DataFrame:
+        """Get a full table merged from all shards (not kept)."""
+        return self._gather(self._shards, name, None)
+    
+    def select_rows(self, plan: QueryPlan, admin: AdminRole, planner: QueryPlanner) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        """Filter a plan's scanned table in every shard; the workers run their own planner."""
+        return self._select(self._shards, plan, admin)
+    
+    def get_matching(self, name: str, column: str, values: Iterable[Any]) -> pd.DataFrame:
+        """Get the rows of a table whose column holds one of values, from all shards."""
+        keys = pd.unique(pd.Series(values).dropna().to_numpy()).tolist()
+        return self._gather(self._shards, name, {column: keys})
+    
+    def get_students(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Get student records from all shards."""
+        return self._gather(self._shards, 'students', filters)
+    
+    def get_homework(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Get homework records from all shards."""
+        return self._gather(self._shards, 'homework', filters)
+    
+    def get_quizzes(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Get quiz records from all shards."""
+        return self._gather(self._shards, 'quizzes', filters)
+    
+    def get_performance(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Get performance records from all shards."""
+        return self._gather(self._shards, 'performance', filters)
+    
+    def scoped(self, admin: AdminRole) -> DataRepository:
+        """
+        Get a view that only queries shards overlapping the admin's scope.
+        
+        Args:
+            admin: AdminRole the queries are served for
+        
+        Returns:
+            DataRepository: Repository view over the overlapping shards
+        """
+        return _ShardView(self, [shard for shard in self._shards if shard.overlaps(admin)])
+    
+    def get_load_timings(self) -> Dict[str, float]:
+        """
+        Get source table load times plus the shard startup time.
+        
+        Returns:
+            Dict[str, float]: Seconds per table name, plus 'shards'
+        """
+        timings = dict(self._load_timings)
+        timings['shards'] = self.startup_time
+        return timings
+    
+    def get_validation_report(self) -> Optional[ValidationReport]:
+        """
+        Get the source repository's validation report.
+        
+        Returns:
+            Optional[ValidationReport]: The report, or None if the data isn't validated
+        """
+        return self._validation_report
+    
+    def reload(self) -> Dict[str, pd.DataFrame]:
+        """
+        Reload the source and restart the shard workers on the new data.
+        
+        Returns:
+            Dict[str, pd.DataFrame]: Dictionary containing all data tables
+        """
+        self.source.reload()
+        self.close()
+        self._start_shards()
+        return self.load_data()
+    
+    def get_data_version(self) -> int:
+        """
+        Get the data version of the source repository.
+        
+        Returns:
+            int: Current data version
+        """
+        return self.source.get_data_version()
+    
+    def get_shard_regions(self) -> List[str]:
+        """
+        Get the region served by each shard.
+        
+        Returns:
+            List[str]: Shard regions ('' for rows without a region)
+        """
+        return [shard.region for shard in self._shards]
+    
+    def close(self) -> None:
+        """Stop all shard worker processes."""
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
+    
+    def __enter__(self) -> 'ShardedDataRepository':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _ShardView(DataRepository):
+    """
+    Read-only view of a ShardedDataRepository restricted to some shards.
+    """
+    
+    def __init__(self, owner: ShardedDataRepository, shards: List[_Shard]):
+        self._owner = owner
+        self._shards = shards
+    
+    def load_data(self) -> Dict[str, pd.DataFrame]:
+        return {
+            table: self._owner._gather(self._shards, table, None)
+            for table in self._owner.TABLES
+        }
+    
+    def get_table(self, name: str) -> pd.DataFrame:
+        return self._owner._gather(self._shards, name, None)
+    
+    def select_rows(self, plan: QueryPlan, admin: AdminRole, planner: QueryPlanner) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        return self._owner._select(self._shards, plan, admin)
+    
+    def get_matching(self, name: str, column: str, values: Iterable[Any]) -> pd.DataFrame:
+        # Joined rows may live in shards outside the view
+        return self._owner.get_matching(name, column, values)
+    
+    def get_students(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return self._owner._gather(self._shards, 'students', filters)
+    
+    def get_homework(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return self._owner._gather(self._shards, 'homework', filters)
+    
+    def get_quizzes(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return self._owner._gather(self._shards, 'quizzes', filters)
+    
+    def get_performance(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return self._owner._gather(self._shards, 'performance', filters)
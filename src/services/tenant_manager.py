@@ -0,0 +1,420 @@
+"""
+Tenant Manager - Serves many schools from one process under a memory budget
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+import pandas as pd
+from src.models.admin_role import AdminRole
+from src.models.query_intent import QueryIntent
+from src.models.tenant import Tenant
+from src.services.data_repository import DataRepository
+from src.services.json_data_repository import JSONDataRepository
+from src.services.query_executor import QueryExecutor
+from src.services.role_manager import RoleManager
+
+
+DEFAULT_TENANT_ID = 'default'
+
+
+def tables_memory_bytes(tables: Dict[str, pd.DataFrame]) -> int:
+    """
+    Measure the memory held by a set of tables, including string contents.
+    
+    Args:
+        tables: Table name to DataFrame
+    
+    Returns:
+        int: Total bytes
+    """
+    return int(sum(df.memory_usage(index=True, deep=True).sum() for df in tables.values()))
+
+
+def load_tenants(tenants_path: Union[str, Path]) -> List[Tenant]:
+    """
+    Load the tenant registry.
+    
+    The file holds {"tenants": [{"tenant_id", "name", "data_file",
+    "roles_file"}, ...]}. Relative file paths are resolved against the
+    registry's directory.
+    
+    Args:
+        tenants_path: Path to the tenants JSON file
+    
+    Returns:
+        List[Tenant]: Registered tenants
+    
+    Raises:
+        FileNotFoundError: If the registry doesn't exist
+        ValueError: If a tenant_id is listed twice
+    """
+    tenants_path = Path(tenants_path)
+    with open(tenants_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    tenants = []
+    seen = set()
+    for entry in data.get('tenants', []):
+        tenant_id = entry['tenant_id']
+        if tenant_id in seen:
+            raise ValueError(f"Duplicate tenant_id in {tenants_path}: {tenant_id}")
+        seen.add(tenant_id)
+        tenants.append(Tenant(
+            tenant_id=tenant_id,
+            name=entry.get('name', tenant_id),
+            data_path=str(tenants_path.parent / entry['data_file']),
+            roles_path=str(tenants_path.parent / entry['roles_file'])
+        ))
+    return tenants
+
+
+class TenantContext:
+    """
+    One tenant's data repository, admin roles and query executor.
+    
+    Queries go through execute(), which only accepts AdminRole objects
+    issued by this tenant's own RoleManager, so an admin of one school can
+    never run queries against another school's data. The data itself is
+    loaded on first use and may be unloaded by the TenantManager.
+    """
+    
+    def __init__(self, tenant: Tenant, manager: 'TenantManager'):
+        """
+        Initialize the tenant context without loading its data.
+        
+        Args:
+            tenant: Tenant served by this context
+            manager: Manager that accounts for this tenant's memory
+        """
+        self.tenant = tenant
+        self.role_manager = RoleManager(tenant.roles_path)
+        self.repository: Optional[DataRepository] = None
+        self.executor: Optional[QueryExecutor] = None
+        self._manager = manager
+        self._load_lock = threading.Lock()
+        
+        self.memory_bytes = 0
+        self.load_seconds = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.queries = 0
+        self.active = 0
+        self.last_used = 0.0
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether the tenant's data is in memory."""
+        return self.executor is not None
+    
+    def check_admin(self, admin: AdminRole) -> None:
+        """
+        Verify that an admin belongs to this tenant.
+        
+        Args:
+            admin: Admin role to check
+        
+        Raises:
+            PermissionError: If the admin wasn't issued by this tenant
+        """
+        if self.role_manager.load_admin_role(admin.admin_id) is not admin:
+            raise PermissionError(
+                f"Admin {admin.admin_id} does not belong to tenant {self.tenant.tenant_id}"
+            )
+    
+    def execute(self, intent: QueryIntent, admin: AdminRole, use_cache: bool = True) -> pd.DataFrame:
+        """
+        Execute a query for one of this tenant's admins.
+        
+        Args:
+            intent: Parsed query intent
+            admin: Admin role issued by this tenant's RoleManager
+            use_cache: Answer from and store in the result cache
+        
+        Returns:
+            pd.DataFrame: Query results filtered by admin scope
+        
+        Raises:
+            PermissionError: If the admin belongs to another tenant
+        """
+        self.check_admin(admin)
+        executor = self._manager.acquire(self)
+        try:
+            return executor.execute(intent, admin, use_cache=use_cache)
+        finally:
+            self._manager.release(self)
+    
+    @property
+    def last_cache_hit(self) -> bool:
+        """Whether the last query executed by the current thread came from the cache."""
+        executor = self.executor
+        return executor.last_cache_hit if executor is not None else False
+    
+    def get_cache_stats(self) -> Dict[str, float]:
+        """
+        Get result cache statistics for the loaded data.
+        
+        Returns:
+            Dict[str, float]: Cache statistics (zeros while unloaded)
+        """
+        executor = self.executor
+        if executor is None:
+            return {'hits': 0, 'misses': 0, 'size': 0, 'hit_rate': 0.0}
+        return executor.get_cache_stats()
+    
+    def load(self, repository_factory: Callable[[Tenant], DataRepository], cache_size: int) -> None:
+        """
+        Load the tenant's data and measure it, unless already loaded.
+        
+        Args:
+            repository_factory: Builds the tenant's data repository
+            cache_size: Result cache size for the executor
+        """
+        with self._load_lock:
+            if self.executor is not None:
+                return
+            
+            started = time.perf_counter()
+            repository = repository_factory(self.tenant)
+            tables = repository.load_data()
+            self.memory_bytes = tables_memory_bytes(tables)
+            self.loads += 1
+            
+            executor = QueryExecutor(repository, cache_size=cache_size)
+            executor.homework_counters()
+            self.load_seconds = time.perf_counter() - started
+            
+            self.repository = repository
+            self.executor = executor
+    
+    def reload(self) -> None:
+        """Reload the tenant's data from disk and drop cached results."""
+        with self._load_lock:
+            if self.repository is None:
+                return
+            started = time.perf_counter()
+            self.memory_bytes = tables_memory_bytes(self.repository.reload())
+            self.executor.homework_counters()
+            self.load_seconds = time.perf_counter() - started
+            self.executor.clear_cache()
+    
+    def unload(self) -> Optional[DataRepository]:
+        """
+        Drop the tenant's data and cached results.
+        
+        Returns:
+            DataRepository: The detached repository, for the caller to close
+        """
+        with self._load_lock:
+            repository = self.repository
+            self.repository = None
+            self.executor = None
+            self.memory_bytes = 0
+            self.evictions += 1
+        return repository
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get this tenant's memory, load time and query counts.
+        
+        Returns:
+            Dict[str, Any]: Tenant statistics
+        """
+        return {
+            'tenant_id': self.tenant.tenant_id,
+            'name': self.tenant.name,
+            'loaded': self.loaded,
+            'memory_mb': self.memory_bytes / 2 ** 20,
+            'load_seconds': self.load_seconds,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'queries': self.queries,
+            'result_cache': self.get_cache_stats()
+        }
+
+
+class TenantManager:
+    """
+    Serves many tenants from one process.
+    
+    A tenant's data is loaded the first time one of its admins runs a
+    query. When the loaded tenants exceed the memory budget, the least
+    recently used tenants with no query in flight are unloaded. Each
+    tenant has its own repository, roles and result cache, so nothing
+    derived from one tenant's data is visible to another.
+    """
+    
+    def __init__(
+        self,
+        tenants: List[Tenant],
+        memory_budget_bytes: int,
+        cache_size: int = 128,
+        repository_factory: Optional[Callable[[Tenant], DataRepository]] = None
+    ):
+        """
+        Initialize the tenant manager without loading any tenant.
+        
+        Args:
+            tenants: Tenants to serve
+            memory_budget_bytes: Memory allowed for all loaded tenants' tables
+            cache_size: Result cache size per tenant
+            repository_factory: Builds a tenant's repository (JSON files by default)
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.cache_size = cache_size
+        self.repository_factory = repository_factory or (
+            lambda tenant: JSONDataRepository(tenant.data_path)
+        )
+        self._contexts = {tenant.tenant_id: TenantContext(tenant, self) for tenant in tenants}
+        self._lru: "OrderedDict[str, TenantContext]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(
+        cls,
+        tenants_path: Union[str, Path],
+        default_data_path: Union[str, Path],
+        default_roles_path: Union[str, Path],
+        memory_budget_bytes: int,
+        **kwargs
+    ) -> 'TenantManager':
+        """
+        Build a manager from the tenant registry, or a single default
+        tenant when there is no registry.
+        
+        Args:
+            tenants_path: Path to the tenants JSON file
+            default_data_path: Data file for the default tenant
+            default_roles_path: Roles file for the default tenant
+            memory_budget_bytes: Memory allowed for all loaded tenants' tables
+            **kwargs: Passed on to TenantManager
+        
+        Returns:
+            TenantManager: The manager
+        """
+        if Path(tenants_path).exists():
+            tenants = load_tenants(tenants_path)
+        else:
+            tenants = [Tenant(DEFAULT_TENANT_ID, 'Default School', str(default_data_path), str(default_roles_path))]
+        return cls(tenants, memory_budget_bytes, **kwargs)
+    
+    def get_tenants(self) -> List[Tenant]:
+        """
+        Get all registered tenants.
+        
+        Returns:
+            List[Tenant]: Tenants in registry order
+        """
+        return [context.tenant for context in self._contexts.values()]
+    
+    def get_contexts(self) -> List[TenantContext]:
+        """
+        Get every tenant's context, loaded or not.
+        
+        Returns:
+            List[TenantContext]: Contexts in registry order
+        """
+        return list(self._contexts.values())
+    
+    def get_tenant(self, tenant_id: str) -> TenantContext:
+        """
+        Get a tenant's context without loading its data.
+        
+        Args:
+            tenant_id: The tenant's unique identifier
+        
+        Returns:
+            TenantContext: The tenant's context
+        
+        Raises:
+            KeyError: If the tenant isn't registered
+        """
+        try:
+            return self._contexts[tenant_id]
+        except KeyError:
+            raise KeyError(f"Unknown tenant: {tenant_id}")
+    
+    def acquire(self, context: TenantContext) -> QueryExecutor:
+        """
+        Mark a tenant as in use, loading its data if needed.
+        
+        Every acquire must be paired with release(). A tenant in use is
+        never evicted.
+        
+        Args:
+            context: Tenant to use
+        
+        Returns:
+            QueryExecutor: The tenant's executor
+        """
+        with self._lock:
+            context.active += 1
+            context.queries += 1
+            context.last_used = time.time()
+            self._lru[context.tenant.tenant_id] = context
+            self._lru.move_to_end(context.tenant.tenant_id)
+        
+        try:
+            context.load(self.repository_factory, self.cache_size)
+        except Exception:
+            self.release(context)
+            raise
+        
+        executor = context.executor
+        self._evict(keep=context)
+        return executor
+    
+    def release(self, context: TenantContext) -> None:
+        """
+        Mark one use of a tenant as finished.
+        
+        Args:
+            context: Tenant that was acquired
+        """
+        with self._lock:
+            context.active -= 1
+    
+    def _evict(self, keep: TenantContext) -> None:
+        """
+        Unload least recently used idle tenants until within the budget.
+        
+        Args:
+            keep: Tenant that must stay loaded
+        """
+        while True:
+            with self._lock:
+                used = sum(c.memory_bytes for c in self._lru.values() if c.loaded)
+                if used <= self.memory_budget_bytes:
+                    return
+                victim = next((
+                    c for c in self._lru.values()
+                    if c is not keep and c.loaded and c.active == 0
+                ), None)
+                if victim is None:
+                    return
+                del self._lru[victim.tenant.tenant_id]
+                # Unload while holding the lock so no query can acquire
+                # the victim half-way through
+                repository = victim.unload()
+            
+            # Sharded repositories own worker processes
+            close = getattr(repository, 'close', None)
+            if close is not None:
+                close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-tenant statistics and overall memory use.
+        
+        Returns:
+            Dict[str, Any]: Budget and used bytes, and one entry per tenant
+        """
+        tenants = [context.get_stats() for context in self._contexts.values()]
+        return {
+            'memory_budget_mb': self.memory_budget_bytes / 2 ** 20,
+            'memory_used_mb': sum(t['memory_mb'] for t in tenants if t['loaded']),
+            'loaded_tenants': sum(1 for t in tenants if t['loaded']),
+            'tenants': tenants
+        }
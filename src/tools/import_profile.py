@@ -0,0 +1,97 @@
+"""
+Import Profile - Reports import time per module for the NL Query System
+
+Usage:
+    python -m src.tools.import_profile [module ...] [--top N]
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+DEFAULT_MODULES = [
+    'src.config',
+    'src.services.role_manager',
+    'src.services.json_data_repository',
+    'src.services.nl_query_parser',
+    'src.services.query_executor'
+]
+
+
+def profile_import(module: str) -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter and collect per-module import times.
+    
+    Args:
+        module: Dotted module name to import
+        
+    Returns:
+        List[Tuple[str, int, int]]: (module, self microseconds, cumulative microseconds)
+        
+    Raises:
+        RuntimeError: If the import fails
+    """
+    project_root = Path(__file__).parent.parent.parent
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=str(project_root),
+        capture_output=True,
+        text=True
+    )
+    
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    
+    return timings
+
+
+def summarize(timings: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """
+    Sum self import time per top-level package.
+    
+    Args:
+        timings: Per-module timings from profile_import
+        
+    Returns:
+        Dict[str, int]: Microseconds per top-level package
+    """
+    totals = defaultdict(int)
+    for name, self_us, _ in timings:
+        top_level = name.split('.')[0]
+        if top_level == 'src':
+            top_level = '.'.join(name.split('.')[:3])
+        totals[top_level] += self_us
+    return dict(totals)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report import time per module.")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help="Modules to profile")
+    parser.add_argument('--top', type=int, default=10, help="Number of packages to list per module")
+    args = parser.parse_args()
+    
+    for module in args.modules:
+        timings = profile_import(module)
+        total_us = sum(self_us for _, self_us, _ in timings)
+        print(f"{module}: {total_us / 1000:.1f} ms total")
+        
+        ranked = sorted(summarize(timings).items(), key=lambda item: item[1], reverse=True)
+        for package, self_us in ranked[:args.top]:
+            print(f"    {package:<45} {self_us / 1000:8.1f} ms")
+        print()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
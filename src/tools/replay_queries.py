@@ -0,0 +1,275 @@
+"""
+Query Replay - Load-tests QueryExecutor with a recorded query log
+
+Each logged query is executed again as its admin. Parsing is stubbed with
+the logged intent by default, or goes through NLQueryParser (and its parse
+cache) with --parse llm. Queries are issued from a thread pool, optionally
+at a fixed rate, and the run reports throughput and latency percentiles.
+Reports can be saved and compared against a baseline from another version.
+
+Usage:
+    python -m src.tools.replay_queries [--log PATH] [--concurrency N] [--rate QPS]
+        [--repeat N] [--save REPORT] [--baseline REPORT] [--threshold PCT]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    SCHOOL_DATA_PATH,
+    ADMIN_ROLES_PATH,
+    QUERY_LOG_PATH,
+    TENANTS_PATH,
+    OPENAI_API_KEY,
+    OPENAI_MODEL
+)
+from src.models.admin_role import AdminRole
+from src.models.query_intent import QueryIntent
+from src.services.json_data_repository import JSONDataRepository
+from src.services.query_executor import QueryExecutor
+from src.services.query_log import read_query_log
+from src.services.role_manager import RoleManager
+from src.services.tenant_manager import DEFAULT_TENANT_ID, load_tenants
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Report metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = [('throughput_qps', True), ('mean_ms', False)] + [
+    (f'p{p}_ms', False) for p in PERCENTILES
+]
+
+
+def load_requests(
+    log_path: Path,
+    role_manager: RoleManager,
+    parse: str,
+    repeat: int = 1,
+    tenant_id: Optional[str] = None
+) -> Tuple[List[Tuple[str, QueryIntent, AdminRole]], int]:
+    """
+    Turn logged queries into requests to replay.
+    
+    Args:
+        log_path: Query log to replay
+        role_manager: Source of admin roles
+        parse: 'logged' to reuse logged intents, 'llm' to parse questions again
+        repeat: Number of passes over the log
+        tenant_id: Only replay this school's entries (None for all)
+    
+    Returns:
+        Tuple[List[Tuple[str, QueryIntent, AdminRole]], int]: (question,
+        intent, admin) requests, and the number of entries skipped because
+        they failed, lack an intent or name an unknown admin. Other
+        schools' entries are ignored.
+    """
+    requests = []
+    skipped = 0
+    for entry in read_query_log(log_path):
+        if tenant_id is not None and entry.get('tenant_id', DEFAULT_TENANT_ID) != tenant_id:
+            continue
+        admin = role_manager.load_admin_role(entry.get('admin_id'))
+        intent_data = entry.get('intent')
+        if admin is None or entry.get('error') or (parse == 'logged' and not intent_data):
+            skipped += 1
+            continue
+        intent = QueryIntent.from_dict(intent_data) if intent_data else None
+        requests.append((entry.get('question', ''), intent, admin))
+    
+    return requests * repeat, skipped
+
+
+def run_load(
+    requests: List[Tuple[str, QueryIntent, AdminRole]],
+    handle: Callable[[str, QueryIntent, AdminRole], Any],
+    concurrency: int,
+    rate: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Replay requests and measure their latency.
+    
+    With a rate, request i is due at i / rate seconds after the start and
+    its latency is measured from that time, so queueing delay counts
+    against the system instead of being hidden by a slow client.
+    
+    Args:
+        requests: Requests to replay
+        handle: Callable serving one request
+        concurrency: Worker threads issuing requests
+        rate: Requests per second (None to issue as fast as possible)
+    
+    Returns:
+        Dict[str, Any]: Throughput, latency percentiles and error count
+    """
+    latencies = np.zeros(len(requests))
+    errors = []
+    errors_lock = threading.Lock()
+    started = time.perf_counter()
+    
+    def replay(i: int):
+        question, intent, admin = requests[i]
+        due = started + i / rate if rate else None
+        if due is not None:
+            time.sleep(max(0.0, due - time.perf_counter()))
+        begin = due if due is not None else time.perf_counter()
+        try:
+            handle(question, intent, admin)
+        except Exception as e:
+            with errors_lock:
+                errors.append(str(e))
+        latencies[i] = time.perf_counter() - begin
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(replay, range(len(requests))))
+    
+    duration = time.perf_counter() - started
+    latencies_ms = latencies * 1000
+    
+    report = {
+        'requests': len(requests),
+        'errors': len(errors),
+        'duration_seconds': duration,
+        'throughput_qps': len(requests) / duration if duration else 0.0,
+        'mean_ms': float(latencies_ms.mean()) if len(requests) else 0.0,
+        'max_ms': float(latencies_ms.max()) if len(requests) else 0.0
+    }
+    for p in PERCENTILES:
+        report[f'p{p}_ms'] = float(np.percentile(latencies_ms, p)) if len(requests) else 0.0
+    if errors:
+        report['first_error'] = errors[0]
+    return report
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    List metrics that got worse than the baseline by more than a threshold.
+    
+    Args:
+        current: Report of this run
+        baseline: Report of the run to compare against
+        threshold: Allowed relative change (0.1 for 10%)
+    
+    Returns:
+        List[str]: One description per regressed metric
+    """
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS:
+        before = baseline.get(metric)
+        after = current.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(f"{metric}: {before:.2f} -> {after:.2f} ({change:+.1%})")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """Print a report, with the baseline value next to each compared metric."""
+    print(f"Requests: {report['requests']} ({report['errors']} errors) in {report['duration_seconds']:.2f} s")
+    for metric in ['throughput_qps', 'mean_ms'] + [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']:
+        line = f"  {metric:<15}{report[metric]:>12.2f}"
+        if baseline and metric in baseline:
+            line += f"   (baseline {baseline[metric]:.2f})"
+        print(line)
+    if 'first_error' in report:
+        print(f"First error: {report['first_error']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a query log against QueryExecutor.")
+    parser.add_argument('--log', type=Path, default=QUERY_LOG_PATH, help="Query log to replay")
+    parser.add_argument('--data', type=Path, default=SCHOOL_DATA_PATH, help="School data file")
+    parser.add_argument('--tenant', default=None,
+                        help="Replay one school from tenants.json, using its data and roles files")
+    parser.add_argument('--parse', choices=['logged', 'llm'], default='logged',
+                        help="Reuse logged intents, or parse questions again through the cached parser")
+    parser.add_argument('--concurrency', type=int, default=4, help="Worker threads")
+    parser.add_argument('--rate', type=float, default=None, help="Requests per second (default: unthrottled)")
+    parser.add_argument('--repeat', type=int, default=1, help="Passes over the log")
+    parser.add_argument('--result-cache', type=int, default=0,
+                        help="Result cache size (default 0, so every request executes)")
+    parser.add_argument('--save', type=Path, default=None, help="Write the report as JSON")
+    parser.add_argument('--baseline', type=Path, default=None, help="Report to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+    
+    data_path, roles_path = args.data, ADMIN_ROLES_PATH
+    if args.tenant is not None and not TENANTS_PATH.exists():
+        # Without a registry the only school is the default one
+        if args.tenant != DEFAULT_TENANT_ID:
+            print(f"Unknown tenant: {args.tenant} ({TENANTS_PATH} not found)", file=sys.stderr)
+            return 1
+    elif args.tenant is not None:
+        tenants = {tenant.tenant_id: tenant for tenant in load_tenants(TENANTS_PATH)}
+        if args.tenant not in tenants:
+            print(f"Unknown tenant: {args.tenant}", file=sys.stderr)
+            return 1
+        data_path, roles_path = tenants[args.tenant].data_path, tenants[args.tenant].roles_path
+    
+    role_manager = RoleManager(str(roles_path))
+    requests, skipped = load_requests(args.log, role_manager, args.parse, args.repeat, args.tenant)
+    if not requests:
+        print(f"No replayable queries in {args.log}", file=sys.stderr)
+        return 1
+    
+    repository = JSONDataRepository(str(data_path))
+    repository.load_data()
+    executor = QueryExecutor(repository, cache_size=args.result_cache)
+    
+    if args.parse == 'llm':
+        from src.services.nl_query_parser import NLQueryParser
+        
+        nl_parser = NLQueryParser(OPENAI_API_KEY, OPENAI_MODEL)
+        
+        def handle(question: str, intent: QueryIntent, admin: AdminRole):
+            return executor.execute(nl_parser.parse_query(question), admin)
+    else:
+        def handle(question: str, intent: QueryIntent, admin: AdminRole):
+            return executor.execute(intent, admin)
+    
+    rate = args.rate if args.rate and args.rate > 0 else None
+    report = run_load(requests, handle, max(1, args.concurrency), rate)
+    report['config'] = {
+        'log': str(args.log),
+        'tenant': args.tenant,
+        'parse': args.parse,
+        'concurrency': args.concurrency,
+        'rate': rate,
+        'result_cache': args.result_cache,
+        'skipped_entries': skipped
+    }
+    
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8')) if args.baseline else None
+    print_report(report, baseline)
+    
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    
+    if baseline:
+        differing = [
+            key for key in ('parse', 'concurrency', 'rate', 'result_cache')
+            if baseline.get('config', {}).get(key) != report['config'][key]
+        ]
+        if differing:
+            print(f"Note: baseline ran with different {', '.join(differing)}")
+        regressions = compare_reports(report, baseline, args.threshold / 100)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0f}%")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
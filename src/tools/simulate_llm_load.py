@@ -0,0 +1,167 @@
+"""
+LLM Load Simulation - Exercises the LLM governor with a local slow fake model
+
+Questions are parsed concurrently through NLQueryParser with a fake chat
+model that sleeps for a configurable latency and can fail or hang. No
+network or API key is needed. The run reports how many questions the model
+answered, how many were parsed locally and why, the breaker's state and
+parse latency percentiles.
+
+Usage:
+    python -m src.tools.simulate_llm_load [--questions N] [--concurrency N]
+        [--latency S] [--failure-rate P] [--hang-rate P] [--timeout S]
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.config import (
+    EXAMPLE_QUERIES,
+    LLM_RATE_PER_SECOND,
+    LLM_BURST,
+    LLM_MAX_IN_FLIGHT,
+    LLM_TIMEOUT_SECONDS,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS
+)
+from src.services.llm_governor import LLMGovernor
+from src.services.nl_query_parser import INTENT_TOOL_NAME, NLQueryParser
+from src.services.rule_based_parser import RuleBasedParser
+
+
+class _FakeResponse:
+    """Chat model response carrying an intent tool call."""
+    
+    def __init__(self, args: Dict[str, Any]):
+        self.tool_calls = [{'name': INTENT_TOOL_NAME, 'args': args, 'id': 'fake'}]
+        self.content = ''
+        self.usage_metadata = {'input_tokens': 150, 'output_tokens': 30}
+
+
+class SlowFakeModel:
+    """
+    Stand-in chat model with injected latency, failures and hangs.
+    
+    It answers every question with the rule-based parse, so results look
+    like a model's without any network access.
+    """
+    
+    def __init__(self, latency: float, failure_rate: float = 0.0, hang_rate: float = 0.0, seed: int = 0):
+        """
+        Initialize the fake model.
+        
+        Args:
+            latency: Seconds each call takes
+            failure_rate: Share of calls that raise an error
+            hang_rate: Share of calls that take 20x the latency
+            seed: Random seed
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._rules = RuleBasedParser()
+    
+    def bind_tools(self, tools: List[Dict[str, Any]], tool_choice: str = None) -> "SlowFakeModel":
+        """Accept the intent tool binding (the fake always calls it)."""
+        return self
+    
+    def invoke(self, messages: List[Any]) -> _FakeResponse:
+        """Answer after the simulated latency, or fail."""
+        with self._random_lock:
+            draw = self._random.random()
+        if draw < self.hang_rate:
+            time.sleep(self.latency * 20)
+        else:
+            time.sleep(self.latency)
+        if self.hang_rate <= draw < self.hang_rate + self.failure_rate:
+            raise RuntimeError("simulated provider error")
+        
+        intent = self._rules.parse_query(messages[-1][1])
+        return _FakeResponse({
+            'intent_type': intent.intent_type,
+            'filters': intent.filters,
+            'order_by': intent.order_by,
+            'order': 'asc' if intent.ascending else 'desc',
+            'limit': intent.limit,
+            'confidence': 0.9
+        })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Simulate LLM load through the governor with a fake model.")
+    parser.add_argument('--questions', type=int, default=200, help="Questions to parse")
+    parser.add_argument('--concurrency', type=int, default=16, help="Client threads")
+    parser.add_argument('--latency', type=float, default=0.5, help="Fake model latency in seconds")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of calls that fail")
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Share of calls that hang")
+    parser.add_argument('--rate', type=float, default=LLM_RATE_PER_SECOND, help="Governor calls per second")
+    parser.add_argument('--burst', type=int, default=LLM_BURST, help="Governor burst size")
+    parser.add_argument('--max-in-flight', type=int, default=LLM_MAX_IN_FLIGHT, help="Governor concurrent calls")
+    parser.add_argument('--timeout', type=float, default=LLM_TIMEOUT_SECONDS, help="Governor call deadline")
+    parser.add_argument('--breaker-failures', type=int, default=LLM_BREAKER_FAILURES,
+                        help="Consecutive failures that open the breaker")
+    parser.add_argument('--breaker-reset', type=float, default=LLM_BREAKER_RESET_SECONDS,
+                        help="Seconds the breaker stays open")
+    args = parser.parse_args()
+    
+    governor = LLMGovernor(
+        rate_per_second=args.rate,
+        burst=args.burst,
+        max_in_flight=args.max_in_flight,
+        timeout_seconds=args.timeout,
+        failure_threshold=args.breaker_failures,
+        reset_seconds=args.breaker_reset
+    )
+    nl_parser = NLQueryParser(
+        llm=SlowFakeModel(args.latency, args.failure_rate, args.hang_rate),
+        cache_size=0,
+        governor=governor,
+        fallback_parser=RuleBasedParser()
+    )
+    
+    # Vary the questions so the parse cache can't answer them
+    questions = [f"{EXAMPLE_QUERIES[i % len(EXAMPLE_QUERIES)]} (#{i})" for i in range(args.questions)]
+    latencies = np.zeros(len(questions))
+    sources: Dict[str, int] = {}
+    reasons: Dict[str, int] = {}
+    counts_lock = threading.Lock()
+    
+    def parse(i: int):
+        started = time.perf_counter()
+        nl_parser.parse_query(questions[i])
+        latencies[i] = time.perf_counter() - started
+        with counts_lock:
+            sources[nl_parser.last_source] = sources.get(nl_parser.last_source, 0) + 1
+            if nl_parser.last_shed_reason:
+                reasons[nl_parser.last_shed_reason] = reasons.get(nl_parser.last_shed_reason, 0) + 1
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        list(pool.map(parse, range(len(questions))))
+    duration = time.perf_counter() - started
+    
+    stats = governor.get_stats()
+    latencies_ms = latencies * 1000
+    print(f"Parsed {len(questions)} questions in {duration:.2f} s")
+    print(f"  by model:        {sources.get('llm', 0)}")
+    print(f"  locally:         {sources.get('local', 0)} {reasons or ''}")
+    print(f"  breaker:         {stats['breaker_state']}")
+    print(f"  calls / failed:  {stats['calls']} / {stats['failed']}")
+    for p in (50, 95, 99):
+        print(f"  p{p}_ms:          {np.percentile(latencies_ms, p):.1f}")
+    print(f"  max_ms:          {latencies_ms.max():.1f}")
+    
+    governor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Data Validation - Checks a school data file and prints the validation report
+
+The file is loaded the way the app loads it, then checked for duplicate or
+missing keys, student and quiz references that don't exist, homework and
+performance rows whose grade, class or region differ from their student's,
+and dates that don't parse (fatal for due, quiz and score dates).
+
+Usage:
+    python -m src.tools.validate_data [DATA_FILE] [--json] [--workers N]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.config import SCHOOL_DATA_PATH
+from src.services.json_data_repository import JSONDataRepository
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate a school data file.")
+    parser.add_argument('data', type=Path, nargs='?', default=SCHOOL_DATA_PATH, help="School data JSON file")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--workers', type=int, default=4, help="Threads used to load and validate")
+    args = parser.parse_args()
+    
+    repository = JSONDataRepository(str(args.data), max_workers=args.workers)
+    started = time.perf_counter()
+    try:
+        repository.load_data()
+    except ValueError:
+        # Fatal issues stop the load; the report still lists them
+        if repository.validation_report is None:
+            raise
+    load_seconds = time.perf_counter() - started
+    report = repository.validation_report
+    
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        rows = sum(report.rows_checked.values())
+        print(f"Checked {rows} rows in {report.seconds * 1000:.1f} ms "
+              f"({report.seconds / load_seconds:.1%} of the {load_seconds:.2f} s load)")
+        for issue in report.issues:
+            print(f"  {issue}")
+        print("OK" if report.ok else f"{len(report.issues)} issues")
+    
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
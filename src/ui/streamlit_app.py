@@ -2,8 +2,12 @@
 Streamlit UI for the Natural Language Query System
 """
 import streamlit as st
+import json
 import sys
+import time
+import uuid
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
@@ -13,13 +17,53 @@ from src.config import (
     ADMIN_ROLES_PATH, 
     OPENAI_API_KEY,
     OPENAI_MODEL,
-    EXAMPLE_QUERIES
+    EXAMPLE_QUERIES,
+    ENABLE_DATA_SHARDING,
+    ENABLE_DATA_VALIDATION,
+    TENANTS_PATH,
+    TENANT_MEMORY_BUDGET_MB,
+    QUERY_LOG_PATH,
+    ENABLE_QUERY_LOG,
+    RESULT_CACHE_SIZE,
+    WARMUP_MAX_QUERIES,
+    WARMUP_BUDGET_SECONDS,
+    WARMUP_WORKERS,
+    MAX_DISPLAY_ROWS,
+    LLM_RATE_PER_SECOND,
+    LLM_BURST,
+    LLM_MAX_IN_FLIGHT,
+    LLM_TIMEOUT_SECONDS,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+    MEMORY_REPORT_ADMINS,
+    MEMORY_REPORT_PORT,
+    MEMORY_REPORT_TOKEN,
+    QUERY_WORKERS,
+    MAX_QUERIES_PER_ADMIN,
+    QUERY_POLL_SECONDS
 )
+from src.models.tenant import Tenant
+from src.services.data_repository import DataRepository
 from src.services.json_data_repository import JSONDataRepository
-from src.services.role_manager import RoleManager
+from src.services.sharded_data_repository import ShardedDataRepository
+from src.services.tenant_manager import TenantManager
 from src.services.nl_query_parser import NLQueryParser
-from src.services.query_executor import QueryExecutor
-from src.utils import format_dataframe_for_display
+from src.services.llm_governor import LLMGovernor
+from src.services.rule_based_parser import RuleBasedParser
+from src.services.query_refiner import QueryRefiner
+from src.services.cache_warmer import CacheWarmer
+from src.services.query_log import QueryLog
+from src.services.query_runner import CancellationToken, QueryCancelled, QueryRejected, QueryRunner
+from src.services.memory_report import (
+    MB,
+    MemoryReportServer,
+    QueryHistory,
+    SessionRegistry,
+    build_memory_report,
+    profile_allocations
+)
+from src.services.result_exporter import csv_bytes, parquet_bytes
+from src.utils import column_display_types, display_rows
 
 
 def initialize_session_state():
@@ -27,25 +71,279 @@ def initialize_session_state():
     if 'selected_admin' not in st.session_state:
         st.session_state.selected_admin = None
     if 'query_history' not in st.session_state:
-        st.session_state.query_history = []
+        st.session_state.query_history = QueryHistory()
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'tenant_id' not in st.session_state:
+        st.session_state.tenant_id = None
+    if 'pending_query' not in st.session_state:
+        st.session_state.pending_query = None
+
+
+def build_repository(tenant: Tenant) -> DataRepository:
+    """Build a tenant's data repository, sharded by region if enabled."""
+    repository = JSONDataRepository(tenant.data_path, validate=ENABLE_DATA_VALIDATION)
+    if ENABLE_DATA_SHARDING:
+        return ShardedDataRepository(repository)
+    return repository
+
+
+@st.cache_resource
+def get_shared_services() -> dict:
+    """
+    Build the query services once per server process.
+    
+    The parser and the tenant manager are shared by all sessions, so their
+    caches serve every admin, and one LLM governor limits model calls for
+    the whole process. Tenants' data is loaded when first queried.
+    """
+    governor = LLMGovernor(
+        rate_per_second=LLM_RATE_PER_SECOND,
+        burst=LLM_BURST,
+        max_in_flight=LLM_MAX_IN_FLIGHT,
+        timeout_seconds=LLM_TIMEOUT_SECONDS,
+        failure_threshold=LLM_BREAKER_FAILURES,
+        reset_seconds=LLM_BREAKER_RESET_SECONDS
+    )
+    services = {
+        'query_log': QueryLog(QUERY_LOG_PATH) if ENABLE_QUERY_LOG else None,
+        'llm_governor': governor,
+        'query_parser': NLQueryParser(
+            OPENAI_API_KEY,
+            OPENAI_MODEL,
+            governor=governor,
+            fallback_parser=RuleBasedParser(),
+            timeout_seconds=LLM_TIMEOUT_SECONDS
+        ),
+        'query_refiner': QueryRefiner(),
+        'tenant_manager': TenantManager.from_config(
+            TENANTS_PATH,
+            SCHOOL_DATA_PATH,
+            ADMIN_ROLES_PATH,
+            memory_budget_bytes=TENANT_MEMORY_BUDGET_MB * 2 ** 20,
+            cache_size=RESULT_CACHE_SIZE,
+            repository_factory=build_repository
+        ),
+        'query_runner': QueryRunner(QUERY_WORKERS, MAX_QUERIES_PER_ADMIN),
+        # Sessions are only tracked while memory reporting is on
+        'session_registry': SessionRegistry() if MEMORY_REPORT_ADMINS or MEMORY_REPORT_PORT else None
+    }
+    
+    if MEMORY_REPORT_PORT:
+        MemoryReportServer(
+            lambda: build_memory_report(
+                services['tenant_manager'],
+                services['query_parser'],
+                services['session_registry'],
+                services['llm_governor']
+            ),
+            port=MEMORY_REPORT_PORT,
+            token=MEMORY_REPORT_TOKEN
+        )
+    return services
+
+
+@st.cache_resource
+def get_cache_warmer(tenant_id: str) -> CacheWarmer:
+    """
+    Start warming a tenant's caches the first time the tenant is opened.
+    
+    Args:
+        tenant_id: Tenant to warm
+    """
+    services = get_shared_services()
+    tenant = services['tenant_manager'].get_tenant(tenant_id)
+    cache_warmer = CacheWarmer(
+        services['query_parser'],
+        tenant,
+        tenant.role_manager,
+        max_queries=WARMUP_MAX_QUERIES,
+        budget_seconds=WARMUP_BUDGET_SECONDS,
+        max_workers=WARMUP_WORKERS,
+        tenant_id=tenant_id
+    )
+    cache_warmer.start(QUERY_LOG_PATH)
+    return cache_warmer
 
 
 def load_components():
     """Load and cache application components."""
-    if 'data_repository' not in st.session_state:
-        st.session_state.data_repository = JSONDataRepository(str(SCHOOL_DATA_PATH))
+    if not OPENAI_API_KEY:
+        st.error("⚠️ OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
+        st.stop()
+    
+    for name, component in get_shared_services().items():
+        if name not in st.session_state:
+            st.session_state[name] = component
+
+
+def select_tenant(tenant_id: str):
+    """
+    Bind the session to a tenant.
+    
+    Switching tenants clears the selected admin and the query history and
+    cancels the running query, so nothing from one school stays on screen
+    for another.
+    
+    Args:
+        tenant_id: Tenant to bind to
+    """
+    if st.session_state.tenant_id != tenant_id:
+        st.session_state.selected_admin = None
+        st.session_state.query_history = QueryHistory()
+        st.session_state.query_runner.cancel(st.session_state.session_id)
+        st.session_state.pending_query = None
+    
+    tenant = st.session_state.tenant_manager.get_tenant(tenant_id)
+    st.session_state.tenant_id = tenant_id
+    st.session_state.role_manager = tenant.role_manager
+    st.session_state.query_executor = tenant
+    st.session_state.cache_warmer = get_cache_warmer(tenant_id)
+
+
+def reload_data():
+    """Reload the tenant's data file, drop stale results and warm the caches again."""
+    tenant = st.session_state.tenant_manager.get_tenant(st.session_state.tenant_id)
+    tenant.reload()
+    st.session_state.cache_warmer.start(QUERY_LOG_PATH)
+
+
+def render_tenant_stats():
+    """Show memory use, load time and query counts per tenant."""
+    stats = st.session_state.tenant_manager.get_stats()
+    st.write(f"**Memory:** {stats['memory_used_mb']:.1f} / {stats['memory_budget_mb']:.0f} MiB, {stats['loaded_tenants']} loaded")
+    for tenant in stats['tenants']:
+        state = f"{tenant['memory_mb']:.1f} MiB, loaded in {tenant['load_seconds'] * 1000:.0f} ms" if tenant['loaded'] else "not loaded"
+        st.write(f"**{tenant['name']}:** {state}; {tenant['queries']} queries, {tenant['evictions']} evictions")
+
+
+def render_warmup_progress():
+    """Show cache warmup progress and cache hit rates."""
+    progress = st.session_state.cache_warmer.progress()
+    done = progress['completed'] + progress['failed'] + progress['skipped']
     
-    if 'role_manager' not in st.session_state:
-        st.session_state.role_manager = RoleManager(str(ADMIN_ROLES_PATH))
+    if progress['total']:
+        st.progress(done / progress['total'])
+    state = "running" if progress['running'] else "done"
+    st.write(f"**Warmup:** {done}/{progress['total']} queries ({state}, {progress['elapsed_seconds']:.1f} s)")
+    if progress['failed'] or progress['skipped']:
+        st.write(f"**Failed / Over Budget:** {progress['failed']} / {progress['skipped']}")
     
-    if 'query_parser' not in st.session_state:
-        if not OPENAI_API_KEY:
-            st.error("⚠️ OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
-            st.stop()
-        st.session_state.query_parser = NLQueryParser(OPENAI_API_KEY, OPENAI_MODEL)
+    for label, key in (("Parse Cache", 'parse_cache'), ("Result Cache", 'result_cache')):
+        stats = progress[key]
+        line = f"**{label}:** {stats['hit_rate']:.0%} hit rate, {stats['size']} entries"
+        if stats.get('post_warmup_hit_rate') is not None:
+            line += f" ({stats['post_warmup_hit_rate']:.0%} since warmup)"
+        st.write(line)
+
+
+def render_llm_status():
+    """Show the LLM circuit breaker state, shed calls and background query counts."""
+    stats = st.session_state.llm_governor.get_stats()
+    usage = st.session_state.query_parser.get_usage_stats()
+    st.write(f"**Circuit Breaker:** {stats['breaker_state'].replace('_', '-')}")
+    st.write(f"**Calls:** {stats['calls']} ({stats['failed']} failed, {stats['in_flight']} in flight)")
+    st.write(
+        f"**Shed:** {stats['shed']} (open {stats['shed_circuit_open']}, rate {stats['shed_rate_limited']}, "
+        f"concurrency {stats['shed_concurrency']}, timeout {stats['shed_timeout']})"
+    )
+    st.write(f"**Parsed Locally:** {usage['local_parses']}")
+    runner = st.session_state.query_runner.get_stats()
+    st.write(
+        f"**Queries:** {runner['running']} running, {runner['cancelled']} cancelled "
+        f"({stats['cancelled']} during an LLM call), {runner['rejected']} rejected"
+    )
+
+
+def track_session():
+    """Register this session's history, tenant and admin for the memory report."""
+    registry = st.session_state.session_registry
+    if registry is not None:
+        registry.track(
+            st.session_state.session_id,
+            st.session_state.query_history,
+            st.session_state.tenant_id,
+            st.session_state.selected_admin.admin_id if st.session_state.selected_admin else None
+        )
+
+
+def render_memory_page():
+    """Show memory held per tenant, table, cache and session, and profile one query."""
+    st.header("Memory")
+    report = build_memory_report(
+        st.session_state.tenant_manager,
+        st.session_state.query_parser,
+        st.session_state.session_registry,
+        st.session_state.llm_governor
+    )
     
-    if 'query_executor' not in st.session_state:
-        st.session_state.query_executor = QueryExecutor(st.session_state.data_repository)
+    process = report['process']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Resident", f"{process['rss_mb']:.0f} MiB" if process['rss_mb'] is not None else "n/a")
+    col2.metric("Peak Resident", f"{process['peak_rss_mb']:.0f} MiB" if process['peak_rss_mb'] is not None else "n/a")
+    col3.metric("Tenants + Sessions", f"{(report['tenants_total_bytes'] + report['sessions_total_bytes']) / MB:.1f} MiB")
+    
+    st.subheader("Tenants")
+    tenant_rows = []
+    for tenant in report['tenants']:
+        row = {'Tenant': tenant['name'], 'Loaded': tenant['loaded']}
+        for table, size in tenant['tables'].items():
+            row[f"{table.title()} MiB"] = size / MB
+        row['Indexes MiB'] = tenant['indexes_bytes'] / MB
+        row['Counters MiB'] = tenant['homework_counters_bytes'] / MB
+        row['Score Series MiB'] = tenant['score_series_bytes'] / MB
+        row['Result Cache MiB'] = tenant['result_cache_bytes'] / MB
+        row['Cached Results'] = tenant['result_cache_entries']
+        row['Total MiB'] = tenant['total_bytes'] / MB
+        tenant_rows.append(row)
+    st.dataframe(tenant_rows, use_container_width=True, hide_index=True)
+    
+    st.subheader("Caches and Sessions")
+    parse_cache = report['caches'].get('parse_cache', {})
+    st.write(f"**Parse Cache:** {parse_cache.get('entries', 0)} entries, {parse_cache.get('bytes', 0) / MB:.2f} MiB")
+    st.write(f"**LLM Calls In Flight:** {report['caches'].get('llm_in_flight_calls', 0)}")
+    st.dataframe(
+        [
+            {
+                'Session': session['session_id'][:8],
+                'Tenant': session['tenant_id'],
+                'Admin': session['admin_id'],
+                'History Entries': session['history_entries'],
+                'MiB': session['bytes'] / MB
+            }
+            for session in report['sessions']
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption("Each object is counted once, for the first owner: tables, indexes, counters, result cache, parse cache, then sessions.")
+    st.download_button(
+        "Download Report (JSON)",
+        data=json.dumps(report, indent=2, default=str),
+        file_name="memory_report.json",
+        mime="application/json"
+    )
+    
+    st.subheader("Profile a Query")
+    question = st.text_input("Question to execute under tracemalloc", key="memory_profile_question")
+    if st.button("Profile") and question:
+        intent = st.session_state.query_parser.parse_query(question)
+        # A cached result would measure a dictionary lookup, not the query
+        profile = profile_allocations(
+            st.session_state.query_executor.execute, intent, st.session_state.selected_admin, use_cache=False
+        )
+        st.write(
+            f"**Execute:** {profile['seconds'] * 1000:.0f} ms (traced), {len(profile['result'])} rows, "
+            f"{profile['allocated_bytes'] / MB:.2f} MiB retained, {profile['peak_bytes'] / MB:.2f} MiB peak"
+        )
+        st.dataframe(
+            [
+                {'Location': stat['location'], 'MiB': stat['size_bytes'] / MB, 'Blocks': stat['count']}
+                for stat in profile['top']
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
 
 
 def main():
@@ -68,6 +366,15 @@ def main():
     
     # Sidebar for admin selection and examples
     with st.sidebar:
+        tenants = st.session_state.tenant_manager.get_tenants()
+        if len(tenants) > 1:
+            st.header("School")
+            tenant_options = {str(tenant): tenant.tenant_id for tenant in tenants}
+            selected_tenant_key = st.selectbox("Select School", options=list(tenant_options.keys()))
+            select_tenant(tenant_options[selected_tenant_key])
+        else:
+            select_tenant(tenants[0].tenant_id)
+        
         st.header("Admin Selection")
         
         # Get all admins
@@ -81,6 +388,13 @@ def main():
         )
         
         st.session_state.selected_admin = admin_options[selected_admin_key]
+        track_session()
+        
+        page = "Query"
+        # Admin ids are only unique within a tenant, so the list names both
+        viewer = f"{st.session_state.tenant_id}:{st.session_state.selected_admin.admin_id}"
+        if viewer in MEMORY_REPORT_ADMINS:
+            page = st.radio("Page", ["Query", "Memory"], horizontal=True)
         
         # Display admin scope
         st.info(f"""
@@ -89,6 +403,31 @@ def main():
         **Scope Values:** {', '.join(st.session_state.selected_admin.scope_values)}
         """)
         
+        # Display per-table startup cost
+        with st.expander("Data Load Timings", expanded=False):
+            repository = st.session_state.query_executor.repository
+            timings = repository.get_load_timings() if repository is not None else {}
+            for table, seconds in timings.items():
+                st.write(f"**{table.title()}:** {seconds * 1000:.1f} ms")
+            report = repository.get_validation_report() if repository is not None else None
+            if report is not None:
+                if report.ok:
+                    st.caption("Data validation passed")
+                for issue in report.issues:
+                    st.warning(str(issue))
+            if st.button("Reload Data", use_container_width=True):
+                reload_data()
+        
+        with st.expander("Cache Warmup", expanded=False):
+            render_warmup_progress()
+        
+        with st.expander("LLM Status", expanded=False):
+            render_llm_status()
+        
+        if len(tenants) > 1:
+            with st.expander("Tenants", expanded=False):
+                render_tenant_stats()
+        
         st.markdown("---")
         
         # Example queries
@@ -98,7 +437,9 @@ def main():
             st.markdown(f"• {example}")
     
     # Main content area
-    if st.session_state.selected_admin:
+    if st.session_state.selected_admin and page == "Memory":
+        render_memory_page()
+    elif st.session_state.selected_admin:
         render_query_interface()
     else:
         st.warning("Please select an admin role from the sidebar.")
@@ -124,6 +465,7 @@ def render_query_interface():
     # Process query
     if submit_button and query:
         process_query(query)
+    render_pending_query()
     
     # Display results
     if st.session_state.query_history:
@@ -133,31 +475,181 @@ def render_query_interface():
 
 def process_query(query: str):
     """
-    Process a natural language query.
+    Submit a natural language query to run in the background.
+    
+    The session's previous query, if still running, is cancelled. The
+    result is picked up by render_pending_query on a later rerun.
     
     Args:
         query: The natural language question
     """
-    with st.spinner("Processing your query..."):
-        try:
+    admin = st.session_state.selected_admin
+    
+    # Only this admin's own previous result may be narrowed
+    history = st.session_state.query_history
+    previous = history[-1] if history and history[-1].get('admin_id') == admin.admin_id else None
+    
+    try:
+        st.session_state.pending_query = st.session_state.query_runner.submit(
+            st.session_state.session_id,
+            f"{st.session_state.tenant_id}:{admin.admin_id}",
+            query,
+            run_query,
+            query,
+            admin,
+            previous,
+            st.session_state.query_parser,
+            st.session_state.query_executor,
+            st.session_state.query_refiner,
+            st.session_state.query_log,
+            st.session_state.tenant_id
+        )
+    except QueryRejected as e:
+        st.warning(str(e))
+
+
+def run_query(
+    token: CancellationToken,
+    query: str,
+    admin,
+    previous: Optional[dict],
+    parser,
+    executor,
+    refiner,
+    query_log,
+    tenant_id: str
+) -> dict:
+    """
+    Refine or parse and execute a query (runs on the query runner's pool).
+    
+    The token is checked between stages, and the parser stops waiting on
+    the LLM once it is cancelled, so a replaced query stops using CPU and
+    LLM quota. Nothing here touches session state.
+    
+    Args:
+        token: The query's CancellationToken
+        query: The natural language question
+        admin: Admin the query runs as
+        previous: The admin's previous history entry, for narrowing follow-ups
+        parser: Shared NLQueryParser
+        executor: The tenant's query executor
+        refiner: Shared QueryRefiner
+        query_log: QueryLog to record the query in (or None)
+        tenant_id: Tenant the query runs against
+    
+    Returns:
+        dict: 'entry' (the history entry) and 'error' (message if the
+        query failed)
+    
+    Raises:
+        QueryCancelled: If the query was cancelled
+    """
+    intent = None
+    results = None
+    error = None
+    entry = None
+    timings = {}
+    cache = {}
+    
+    started = time.perf_counter()
+    try:
+        # Narrowing follow-ups ("only 8A") filter the previous result
+        refined = None
+        if previous is not None:
+            refined = refiner.refine(query, previous['intent'], previous['results'])
+            cache['refined'] = refined is not None
+        
+        if refined is not None:
+            intent = refined['intent']
+            results = refined['results']
+            timings['refine'] = time.perf_counter() - started
+            usage = {}
+        else:
             # Parse the query
-            intent = st.session_state.query_parser.parse_query(query)
+            token.raise_if_cancelled()
+            parsed = time.perf_counter()
+            intent = parser.parse_query(query, cancel_token=token)
+            timings['parse'] = time.perf_counter() - parsed
+            cache['parse'] = parser.last_cache_hit
+            if parser.last_source == 'local':
+                cache['local_parse'] = parser.last_shed_reason
+            usage = dict(parser.last_usage)
             
             # Execute the query
-            results = st.session_state.query_executor.execute(
-                intent,
-                st.session_state.selected_admin
-            )
-            
-            # Store in history
-            st.session_state.query_history.append({
-                'query': query,
-                'intent': intent,
-                'results': results
-            })
-            
-        except Exception as e:
-            st.error(f"Error processing query: {str(e)}")
+            token.raise_if_cancelled()
+            executed = time.perf_counter()
+            results = executor.execute(intent, admin)
+            timings['execute'] = time.perf_counter() - executed
+            cache['result'] = executor.last_cache_hit
+        
+        token.raise_if_cancelled()
+        entry = {
+            'query': query,
+            'admin_id': admin.admin_id,
+            'intent': intent,
+            'results': results,
+            'usage': usage,
+            'parse_source': 'refined' if refined is not None else parser.last_source,
+            'shed_reason': cache.get('local_parse'),
+            'refined_from': previous['query'] if refined is not None else None
+        }
+    
+    except Exception as e:
+        error = 'cancelled' if token.cancelled else str(e)
+    
+    timings['total'] = time.perf_counter() - started
+    
+    if query_log is not None:
+        query_log.record(
+            question=query,
+            admin_id=admin.admin_id,
+            tenant_id=tenant_id,
+            intent=intent,
+            timings=timings,
+            rows=len(results) if results is not None and error is None else None,
+            cache=cache,
+            error=error
+        )
+    
+    token.raise_if_cancelled()
+    return {'entry': entry, 'error': error}
+
+
+def render_pending_query():
+    """
+    Show the session's running query, or store its result once it is done.
+    
+    While the query runs, the script reruns every QUERY_POLL_SECONDS to
+    check on it.
+    """
+    job = st.session_state.pending_query
+    if job is None:
+        return
+    
+    if not job.done():
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.info(f"Processing your query... ({job.elapsed():.1f} s)")
+        with col2:
+            if st.button("Cancel", use_container_width=True):
+                st.session_state.query_runner.cancel(st.session_state.session_id)
+        time.sleep(QUERY_POLL_SECONDS)
+        st.rerun()
+    
+    st.session_state.pending_query = None
+    try:
+        outcome = job.result()
+    except QueryCancelled:
+        st.info("Query cancelled.")
+        return
+    except Exception as e:
+        st.error(f"Error processing query: {e}")
+        return
+    
+    if outcome['error'] is not None:
+        st.error(f"Error processing query: {outcome['error']}")
+    else:
+        st.session_state.query_history.append(outcome['entry'])
 
 
 def display_latest_result():
@@ -172,9 +664,19 @@ def display_latest_result():
     # Display query info
     with st.expander("Query Details", expanded=False):
         st.write(f"**Question:** {latest['query']}")
+        if latest.get('refined_from'):
+            st.write(f"**Refined From:** {latest['refined_from']} (filtered the previous result, no LLM call)")
         st.write(f"**Intent Type:** {latest['intent'].intent_type}")
         st.write(f"**Filters:** {latest['intent'].filters}")
+        if latest['intent'].order_by or latest['intent'].limit:
+            direction = 'ascending' if latest['intent'].ascending else 'descending'
+            st.write(f"**Ranking:** {latest['intent'].order_by or 'table order'} ({direction}), limit {latest['intent'].limit}")
         st.write(f"**Confidence:** {latest['intent'].confidence:.2f}")
+        if latest.get('parse_source') == 'local':
+            st.write(f"**Parsed By:** local rules (LLM answer not used: {latest.get('shed_reason')})")
+        usage = latest.get('usage') or {}
+        if usage:
+            st.write(f"**LLM Tokens:** {usage['input_tokens']} in / {usage['output_tokens']} out")
     
     # Display results
     results_df = latest['results']
@@ -182,11 +684,79 @@ def display_latest_result():
     if results_df.empty:
         st.info("No results found for your query. Try adjusting your question or check your access scope.")
     else:
-        # Format and display
-        formatted_df = format_dataframe_for_display(results_df)
-        st.dataframe(formatted_df, use_container_width=True, hide_index=True)
+        # Display typed columns directly; only the visible rows are sent
+        visible_df = display_rows(results_df, MAX_DISPLAY_ROWS)
+        st.dataframe(
+            visible_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=build_column_config(visible_df)
+        )
         
         st.success(f"Found {len(results_df)} result(s)")
+        if len(visible_df) < len(results_df):
+            st.caption(f"Showing the first {len(visible_df)} rows. Download the results to see all of them.")
+        render_export_buttons(latest)
+
+
+def build_column_config(df) -> dict:
+    """
+    Build Streamlit column configs that render result columns by type.
+    
+    Args:
+        df: Results to display
+    
+    Returns:
+        dict: Column name to column config
+    """
+    config = {}
+    for col, kind in column_display_types(df).items():
+        if kind == 'date':
+            config[col] = st.column_config.DateColumn(col, format="YYYY-MM-DD")
+        elif kind == 'percent':
+            config[col] = st.column_config.NumberColumn(col, format="%.2f%%")
+        elif kind == 'number':
+            config[col] = st.column_config.NumberColumn(col)
+    return config
+
+
+def render_export_buttons(entry: dict):
+    """
+    Offer the typed query results as CSV and Parquet downloads.
+    
+    Exports are built from the raw results, not the display copy, and
+    only when asked for: the bytes live for that one run and are not kept
+    in the query history.
+    
+    Args:
+        entry: Query history entry holding the results
+    """
+    results_df = entry['results']
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Export CSV", use_container_width=True):
+            st.download_button(
+                "Download CSV",
+                data=csv_bytes(results_df),
+                file_name="query_results.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+    
+    with col2:
+        if st.button("Export Parquet", use_container_width=True):
+            try:
+                st.download_button(
+                    "Download Parquet",
+                    data=parquet_bytes(results_df),
+                    file_name="query_results.parquet",
+                    mime="application/octet-stream",
+                    use_container_width=True
+                )
+            except ImportError as e:
+                st.caption(str(e))
 
 
 if __name__ == "__main__":
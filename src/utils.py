@@ -1,17 +1,70 @@
 """
 Utility functions for the NL Query System
 """
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Any
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+from typing import Any, Dict, Optional
 
 
-def format_dataframe_for_display(df: pd.DataFrame) -> pd.DataFrame:
+# Date format used when results are shown as text
+DISPLAY_DATE_FORMAT = '%Y-%m-%d'
+
+
+def display_rows(df: pd.DataFrame, max_rows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Select the rows that will actually be shown.
+    
+    The slice shares memory with the results, so later formatting only
+    touches the visible rows.
+    
+    Args:
+        df: Query results
+        max_rows: Most rows to show (None for all)
+        
+    Returns:
+        pd.DataFrame: The first max_rows rows
+    """
+    if max_rows is None or len(df) <= max_rows:
+        return df
+    return df.iloc[:max_rows]
+
+
+def format_date_column(series: pd.Series) -> pd.Series:
+    """
+    Format a datetime column as DISPLAY_DATE_FORMAT strings without a per-row loop.
+    
+    Works for every datetime unit; tz-aware values are formatted in their
+    own time zone. Missing dates become empty strings.
+    
+    Args:
+        series: Datetime column
+        
+    Returns:
+        pd.Series: Formatted dates
+    """
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    
+    # Results hold few distinct days, so format each day once and gather.
+    # Missing dates get code -1, which picks the trailing empty string.
+    codes, days = pd.factorize(series.to_numpy(dtype='datetime64[D]'))
+    labels = np.append(pd.DatetimeIndex(days).strftime(DISPLAY_DATE_FORMAT).to_numpy(dtype=object), '')
+    return pd.Series(labels.take(codes), index=series.index, name=series.name)
+
+
+def format_dataframe_for_display(df: pd.DataFrame, max_rows: Optional[int] = None) -> pd.DataFrame:
     """
-    Format a DataFrame for better display in Streamlit.
+    Format a DataFrame as text for display.
+    
+    Only the visible rows are formatted, and the input is never modified,
+    since results may be shared through the query cache. Untouched columns
+    are not copied.
     
     Args:
         df: DataFrame to format
+        max_rows: Most rows to format (None for all)
         
     Returns:
         pd.DataFrame: Formatted DataFrame
@@ -19,15 +72,40 @@ def format_dataframe_for_display(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
     
-    # Format date columns
+    df = display_rows(df, max_rows)
+    formatted = df.copy(deep=False)
+    
     for col in df.columns:
-        if df[col].dtype == 'datetime64[ns]':
-            df[col] = df[col].dt.strftime('%Y-%m-%d')
+        series = df[col]
+        if is_datetime64_any_dtype(series.dtype):
+            formatted[col] = format_date_column(series)
+        elif series.hasnans:
+            # Replace NaN/None with empty string for better display
+            formatted[col] = series.astype(object).where(series.notna(), '')
     
-    # Replace NaN/None with empty string for better display
-    df = df.fillna('')
+    return formatted
+
+
+def column_display_types(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Classify result columns so a UI can render them with typed widgets.
     
-    return df
+    Args:
+        df: Query results
+        
+    Returns:
+        Dict[str, str]: Column name to 'date', 'percent', 'number' or 'text'
+    """
+    types = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if is_datetime64_any_dtype(dtype):
+            types[col] = 'date'
+        elif is_numeric_dtype(dtype) and not is_bool_dtype(dtype):
+            types[col] = 'percent' if 'percent' in str(col).lower() else 'number'
+        else:
+            types[col] = 'text'
+    return types
 
 
 def parse_date_string(date_str: str) -> datetime: